@@ -0,0 +1,185 @@
+"""
+输入文件发现与内容哈希基准
+
+Usage:
+    python benchmarks/bench_discovery.py                  # 默认 100000 个文件，运行 3 次
+    python benchmarks/bench_discovery.py 20000 5          # 指定文件数和运行次数
+
+在临时目录中生成多层子文件夹组成的合成目录树 (约 1/4 为非 PDF 文件)，比较:
+  - os.walk + 逐个 os.stat 的完整列举 (原实现的思路) 与 iter_files 的流式遍历，
+    后者同时统计产出第一个文件的耗时 (界面上首批任务出现的时间)
+  - FileDiscovery 线程从启动到发出第一批结果的耗时与总耗时
+  - 顺序读取计算哈希与线程池中内存映射分块计算哈希 (一组 8 MB 文件)
+结果为各次运行的中位数。
+"""
+
+import hashlib
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication  # noqa: E402
+
+from markergui.discovery import (  # noqa: E402
+    MB,
+    FileDiscovery,
+    FileFilter,
+    hash_file,
+    iter_files,
+)
+
+EXTENSIONS = {".pdf"}
+FILES_PER_DIR = 200
+HASH_FILES = 32
+HASH_FILE_SIZE = 8 * MB
+
+
+def build_tree(root, count):
+    """每个文件夹 FILES_PER_DIR 个文件，每 10 个文件夹再嵌套一层"""
+    for i in range(count):
+        folder_index = i // FILES_PER_DIR
+        folder = os.path.join(root, *[f"d{part}" for part in str(folder_index)])
+        if i % FILES_PER_DIR == 0:
+            os.makedirs(folder, exist_ok=True)
+        ext = ".txt" if i % 4 == 3 else ".pdf"
+        with open(os.path.join(folder, f"file{i:06d}{ext}"), "wb") as f:
+            f.write(b"%PDF-1.4\n" + str(i).encode())
+
+
+def build_hash_files(root):
+    os.makedirs(root)
+    block = os.urandom(MB)
+    paths = []
+    for i in range(HASH_FILES):
+        path = os.path.join(root, f"big{i:02d}.pdf")
+        with open(path, "wb") as f:
+            for _ in range(HASH_FILE_SIZE // MB):
+                f.write(block)
+            f.write(str(i).encode())
+        paths.append(path)
+    return paths
+
+
+def walk_and_stat(root):
+    """先完整列出目录树，再逐个 stat 过滤"""
+    found = []
+    for folder, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(folder, name)
+            st = os.stat(path)
+            if os.path.splitext(name)[1].lower() in EXTENSIONS:
+                found.append((path, st))
+    found.sort()
+    return found
+
+
+def time_iter_files(root):
+    start = time.perf_counter()
+    first = None
+    count = 0
+    for _ in iter_files(root, FileFilter(EXTENSIONS), recursive=True):
+        if first is None:
+            first = time.perf_counter() - start
+        count += 1
+    return first, time.perf_counter() - start, count
+
+
+def time_discovery_thread(app, root, hash_workers=0):
+    discovery = FileDiscovery(root, FileFilter(EXTENSIONS), True, hash_workers)
+    times = {}
+    start = time.perf_counter()
+
+    def on_found(_batch):
+        times.setdefault("first", time.perf_counter() - start)
+
+    def on_completed(count):
+        times["total"] = time.perf_counter() - start
+        times["count"] = count
+        app.quit()
+
+    discovery.filesFound.connect(on_found)
+    discovery.completed.connect(on_completed)
+    discovery.start()
+    app.exec()
+    discovery.wait()
+    return times["first"], times["total"], times["count"]
+
+
+def hash_sequential(paths):
+    """逐个文件以 1 MB 块顺序读取"""
+    digests = []
+    for path in paths:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(MB), b""):
+                digest.update(block)
+        digests.append(digest.hexdigest())
+    return digests
+
+
+def hash_parallel(paths):
+    with ThreadPoolExecutor(min(8, os.cpu_count() or 1)) as pool:
+        return list(pool.map(hash_file, paths))
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    app = QCoreApplication(sys.argv)
+
+    workdir = tempfile.mkdtemp(prefix="markergui-bench-")
+    try:
+        tree = os.path.join(workdir, "tree")
+        start = time.perf_counter()
+        build_tree(tree, count)
+        print(f"生成 {count} 个文件: {time.perf_counter() - start:.1f} s")
+        paths = build_hash_files(os.path.join(workdir, "hash"))
+
+        samples = {}
+
+        def add(name, seconds):
+            samples.setdefault(name, []).append(seconds)
+
+        for _ in range(runs):
+            seconds, found = timed(walk_and_stat, tree)
+            add("os.walk + stat 总耗时", seconds)
+            first, total, streamed = time_iter_files(tree)
+            add("iter_files 首个文件", first)
+            add("iter_files 总耗时", total)
+            first, total, emitted = time_discovery_thread(app, tree)
+            add("FileDiscovery 首批", first)
+            add("FileDiscovery 总耗时", total)
+            assert len(found) == streamed == emitted, (len(found), streamed, emitted)
+
+            seconds, sequential = timed(hash_sequential, paths)
+            add("顺序读取哈希", seconds)
+            seconds, parallel = timed(hash_parallel, paths)
+            add("线程池+内存映射哈希", seconds)
+            assert sequential == parallel
+
+        print(f"匹配文件: {len(found)}，哈希: {HASH_FILES} x {HASH_FILE_SIZE // MB} MB")
+        print(f"运行次数: {runs} (中位数)")
+        for name, values in samples.items():
+            print(f"  {name:<20} {statistics.median(values) * 1000:10.1f} ms")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
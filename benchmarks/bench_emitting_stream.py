@@ -0,0 +1,93 @@
+"""
+EmittingStream 吞吐量基准
+
+Usage:
+    python benchmarks/bench_emitting_stream.py                # 使用合成的 marker 日志
+    python benchmarks/bench_emitting_stream.py marker.log     # 使用录制的 marker 日志
+
+将日志按随机大小切块写入 EmittingStream，统计每秒处理的行数。
+合成日志模拟 marker 的 tqdm 进度条 ("\\r" 覆盖写) 和普通日志行。
+"""
+
+import random
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from markergui.utils import DummyWriter, EmittingStream  # noqa: E402
+
+STAGES = [
+    "Recognizing Layout",
+    "Running OCR Error Detection",
+    "Detecting bboxes",
+    "Recognizing Text",
+    "Recognizing tables",
+    "LLM processors running",
+]
+
+
+def synthetic_log(pages=2000):
+    """生成与 marker --debug 输出相似的日志文本"""
+    parts = []
+    for stage in STAGES:
+        parts.append(f"[DEBUG] Starting stage {stage}\n")
+        for i in range(pages + 1):
+            pct = i * 100 // pages
+            parts.append(
+                f"\r{stage}: {pct:3d}%|{'#' * (pct // 10):<10}| {i}/{pages} "
+                f"[00:{i % 60:02d}<00:30, 12.34it/s]"
+            )
+            if i % 50 == 0:
+                parts.append(f"\n[DEBUG] page {i} processed in 0.08s\n")
+        parts.append("\n")
+    return "".join(parts)
+
+
+def chunked(text, seed=0):
+    """按 1~4096 字符的随机大小切块，模拟管道读取"""
+    rng = random.Random(seed)
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, 4096)
+        yield text[pos : pos + size]
+        pos += size
+
+
+def run(text):
+    stream = EmittingStream()
+    stream.original_stdout = DummyWriter()
+    stream.show_debug_gui = True
+    counts = {"lines": 0, "progress": 0}
+    stream.textWritten.connect(lambda _: counts.__setitem__("lines", counts["lines"] + 1))
+    stream.progressWritten.connect(
+        lambda _: counts.__setitem__("progress", counts["progress"] + 1)
+    )
+
+    chunks = list(chunked(text))
+    start = time.perf_counter()
+    for chunk in chunks:
+        stream.write(chunk)
+    stream.flush()
+    elapsed = time.perf_counter() - start
+    return counts, elapsed
+
+
+def main():
+    if len(sys.argv) > 1:
+        text = Path(sys.argv[1]).read_text(encoding="utf-8", errors="replace")
+    else:
+        text = synthetic_log()
+
+    counts, elapsed = run(text)
+    total = counts["lines"] + counts["progress"]
+    print(f"输入大小: {len(text) / 1024:.0f} KiB")
+    print(f"完整行: {counts['lines']}, 进度行: {counts['progress']}")
+    print(f"耗时: {elapsed:.3f}s, 吞吐量: {total / elapsed:,.0f} 行/秒")
+    print(f"字符吞吐量: {len(text) / elapsed / 1024 / 1024:.1f} MiB/秒")
+
+
+if __name__ == "__main__":
+    main()
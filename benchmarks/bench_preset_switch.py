@@ -0,0 +1,85 @@
+"""
+预设切换基准
+
+Usage:
+    python benchmarks/bench_preset_switch.py          # 默认切换 1000 次
+    python benchmarks/bench_preset_switch.py 5000     # 指定切换次数
+
+以 offscreen 平台创建主窗口并构建全部标签页，依次循环切换 config/presets 中的预设，
+统计每次切换的耗时 (中位数、P95、最大值)：
+  增量应用  MarkerGUI.switch_preset，只写入有变化的控件并合并依赖的界面更新
+  全量写入  读取全部控件后逐个写入全部控件、不屏蔽信号 (配置绑定层之前的做法)
+"""
+
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def full_write(window, preset_name):
+    """配置绑定层之前的切换方式：读取全部控件，合并预设后写入全部控件"""
+    preset = window.config_manager.load_preset(preset_name)
+    config = {}
+    for key, (_, getter, _) in window._all_config_specs():
+        widget = window._locate_config_widget(key)
+        config[key] = getattr(widget, getter)() if widget is not None else None
+    config.update((key, value) for key, value in preset.items() if key in config)
+    for key, _ in window._all_config_specs():
+        widget = window._locate_config_widget(key)
+        if widget is not None:
+            window._write_config_widget(key, widget, config[key])
+
+
+def measure(switch, names, count):
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        switch(names[i % len(names)])
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def report(title, samples):
+    ordered = sorted(samples)
+    p95 = ordered[int(len(ordered) * 0.95) - 1]
+    print(
+        f"  {title:<8} 中位数 {statistics.median(samples) * 1000:7.3f} ms"
+        f"  P95 {p95 * 1000:7.3f} ms  最大 {ordered[-1] * 1000:7.3f} ms"
+        f"  总计 {sum(samples):6.2f} s"
+    )
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    os.chdir(ROOT)  # 预设从 config/ 读取
+
+    from PySide6.QtWidgets import QApplication
+    from markergui.main_window import MarkerGUI
+
+    app = QApplication(sys.argv)
+    # 窗口的日志同时回显到原 stdout，基准运行期间丢弃
+    sys.stdout = open(os.devnull, "w", encoding="utf-8")
+    window = MarkerGUI()
+    for index in range(window.tabs.count()):
+        window.ensure_tab_built(index)
+    names = window.config_manager.get_available_presets()
+    app.processEvents()
+
+    incremental = measure(window.switch_preset, names, count)
+    full = measure(lambda name: full_write(window, name), names, count)
+    window.close()
+    sys.stdout = sys.__stdout__
+
+    print(f"切换次数: {count}, 预设: {', '.join(names)}")
+    report("增量应用", incremental)
+    report("全量写入", full)
+
+
+if __name__ == "__main__":
+    main()
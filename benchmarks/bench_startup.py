@@ -0,0 +1,77 @@
+"""
+GUI 冷启动基准
+
+Usage:
+    python benchmarks/bench_startup.py          # 默认运行 5 次
+    python benchmarks/bench_startup.py 10       # 指定运行次数
+
+每次在新的子进程中以 offscreen 平台启动主窗口，窗口首次绘制后立即退出，
+统计各启动阶段 (导入模块、加载配置、构建标签页、首次绘制) 耗时的中位数，
+以及包含解释器启动在内的总耗时。
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# 子进程：与 main.py 相同的启动流程，首次绘制后输出各阶段耗时并退出
+CHILD = """
+import time
+_START = time.perf_counter()
+import json, sys
+sys.path.insert(0, {src!r})
+from markergui.startup import PROFILER
+PROFILER.start(_START)
+from PySide6.QtWidgets import QApplication
+from markergui.main_window import MarkerGUI
+PROFILER.mark("导入模块")
+app = QApplication(sys.argv)
+window = MarkerGUI()
+PROFILER.report = lambda: None
+PROFILER.watch_first_paint(window, app.quit)
+window.show()
+app.exec()
+sys.__stdout__.write(json.dumps(PROFILER.phases, ensure_ascii=False) + "\\n")
+"""
+
+
+def run_once():
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD.format(src=str(ROOT / "src"))],
+        cwd=ROOT,  # 预设从 config/ 读取
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - start
+    phases = json.loads(result.stdout.strip().splitlines()[-1])
+    return phases, wall
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    samples = {}
+    walls = []
+    for _ in range(runs):
+        phases, wall = run_once()
+        for name, seconds in phases:
+            samples.setdefault(name, []).append(seconds)
+        walls.append(wall)
+
+    print(f"运行次数: {runs} (中位数)")
+    for name, values in samples.items():
+        print(f"  {name:<8} {statistics.median(values) * 1000:8.1f} ms")
+    print(f"  {'进程总耗时':<8} {statistics.median(walls) * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
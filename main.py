@@ -5,6 +5,10 @@ This is the entry point for the MarkerGUI application.
 It imports and runs the main window from the markergui package.
 """
 
+import time
+
+_START = time.perf_counter()
+
 import sys
 from pathlib import Path
 
@@ -16,9 +20,16 @@ if not hasattr(sys, 'frozen'):
     if str(src_path) not in sys.path:
         sys.path.insert(0, str(src_path))
 
+from markergui.startup import PROFILER, profiling_requested
+
+if profiling_requested():
+    PROFILER.start(_START)
+
 from PySide6.QtWidgets import QApplication
 from markergui.main_window import MarkerGUI
 
+PROFILER.mark("导入模块")
+
 if __name__ == "__main__":
     app = QApplication(sys.argv)
 
@@ -27,6 +38,7 @@ if __name__ == "__main__":
 
     # 创建主窗口
     window = MarkerGUI()
+    PROFILER.watch_first_paint(window)
     window.show()
 
     # 运行应用程序
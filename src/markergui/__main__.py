@@ -0,0 +1,9 @@
+"""
+python -m markergui 命令行入口
+"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
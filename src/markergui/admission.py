@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""
+内存准入控制
+根据历史运行报告估算每个任务的峰值内存，只有系统可用内存足够时才启动新任务
+"""
+# 本地 imports
+from .command_generator import parse_page_range
+from .run_report import load_run_reports
+
+MB = 1024 * 1024
+
+DEFAULT_JOB_MB = 4096  # 没有历史报告时的估计值 (marker 加载模型后通常需要数 GB)
+SAFETY_FACTOR = 1.2
+HISTORY_LIMIT = 200
+
+
+def available_memory():
+    """读取 /proc/meminfo 中的 MemAvailable (字节)，不支持时返回 None"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def job_pages(job):
+    """
+    任务要转换的页数：优先使用 --page_range，否则使用提交时已统计的 PDF 页数，未知时为 0
+    准入检查在界面线程中进行，这里不读取 PDF (批处理的页数由文件发现线程统计)
+    """
+    if "--page_range" in job.argv[:-1]:
+        try:
+            return len(parse_page_range(job.argv[job.argv.index("--page_range") + 1]))
+        except ValueError:
+            pass
+    return job.pages or 0
+
+
+class MemoryEstimator:
+    """
+    任务峰值内存估算
+    用历史报告的 (页数, 峰值内存) 拟合 "基础内存 + 每页内存"，结果乘以安全系数
+    """
+
+    def __init__(self):
+        self.samples = []  # [(页数, 峰值内存 MB)]
+        self._loaded_dirs = set()
+
+    def load(self, output_dir):
+        """读取输出目录中的历史报告 (每个目录只读一次)"""
+        if output_dir in self._loaded_dirs:
+            return
+        self._loaded_dirs.add(output_dir)
+        for report in load_run_reports(output_dir):
+            self.observe(report)
+
+    def observe(self, report):
+        if not report.get("succeeded") or not report.get("peak_rss_mb"):
+            return
+        self.samples.append((report.get("pages") or 0, report["peak_rss_mb"]))
+        del self.samples[:-HISTORY_LIMIT]
+
+    def estimate_mb(self, pages):
+        if not self.samples:
+            return DEFAULT_JOB_MB
+        peaks = [peak for _, peak in self.samples]
+        estimate = max(peaks)
+
+        # 最小二乘拟合，页数样本不足两种时直接取历史最大值
+        xs = [p for p, _ in self.samples]
+        if pages and len(set(xs)) > 1:
+            n = len(xs)
+            mean_x = sum(xs) / n
+            mean_y = sum(peaks) / n
+            var = sum((x - mean_x) ** 2 for x in xs)
+            slope = max(0.0, sum((x - mean_x) * (y - mean_y) for x, y in self.samples) / var)
+            estimate = max(min(peaks), mean_y + slope * (pages - mean_x))
+        return estimate * SAFETY_FACTOR
+
+
+class AdmissionController:
+    """
+    准入控制器
+    可用预算 = MemAvailable - 保留内存 - 运行中任务尚未占用的预计内存
+    没有运行中的任务时总是放行，避免估计值过大导致队列永远无法开始
+    """
+
+    def __init__(self, reserve_mb=2048):
+        self.enabled = True
+        self.reserve_mb = reserve_mb
+        self.estimator = MemoryEstimator()
+        self.status = ""  # 最近一次检查的预算说明
+
+    def estimate(self, job):
+        """估算任务峰值内存 (MB)，结果缓存在任务上"""
+        if job.memory_estimate is None:
+            self.estimator.load(job.output_dir)
+            job.memory_estimate = self.estimator.estimate_mb(job_pages(job))
+        return job.memory_estimate
+
+    def pending_mb(self, running):
+        """运行中任务预计还会再占用的内存 (刚启动的任务尚未加载模型)"""
+        pending = 0.0
+        for job in running:
+            rss = job.sampler.rss / MB if job.sampler is not None else 0.0
+            pending += max(0.0, self.estimate(job) - rss)
+        return pending
+
+    def admit(self, job, running):
+        """返回 (是否放行, 等待原因)"""
+        available = available_memory()
+        if not self.enabled or available is None:
+            self.status = ""
+            return True, ""
+
+        needed = self.estimate(job)
+        budget = available / MB - self.reserve_mb - self.pending_mb(running)
+        self.status = (
+            f"可用内存 {available / MB:.0f} MB, 保留 {self.reserve_mb} MB, "
+            f"剩余预算 {max(0.0, budget):.0f} MB"
+        )
+        if not running or needed <= budget:
+            return True, ""
+        return False, f"等待内存: 预计需要 {needed:.0f} MB, 剩余预算 {max(0.0, budget):.0f} MB"
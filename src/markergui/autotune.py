@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+自动调优
+在输入文档的少量样本页上依次试运行不同的工作进程数，选出每秒页数最高的设置
+每次试运行都是新启动的 marker 进程，模型加载往往比样本页的转换更久：先以 1 页样本预热一次
+(同时让模型文件和磁盘缓存进入内存)，预热的耗时作为启动开销从各次试运行中扣除，预热结果不参与比较
+"""
+# 标准库 imports
+import os
+import shutil
+import tempfile
+
+# 第三方库 imports
+from PySide6.QtCore import QObject, Signal
+
+# 本地 imports
+from .command_generator import format_page_range, override_option, parse_page_range
+from .job_runner import Job, JobRunner
+from .progress import ProgressModel
+from .run_report import count_pages
+
+SAMPLE_PAGES = 5
+
+
+def sample_page_range(page_range, count=SAMPLE_PAGES):
+    """在用户指定的页面范围内取前 count 页作为样本"""
+    pages = parse_page_range(page_range) if page_range.strip() else range(count)
+    return format_page_range(list(pages)[:count])
+
+
+def candidate_workers(cpu_count=None):
+    """pdftext_workers 候选值：1 到 CPU 核数之间的 2 的幂 (上限 16)"""
+    cpu_count = cpu_count or os.cpu_count() or 4
+    candidates = [n for n in (1, 2, 4, 8, 16) if n <= cpu_count]
+    return candidates or [1]
+
+
+class TuneTrial:
+    """单次试运行的结果"""
+
+    def __init__(self, settings):
+        self.settings = settings  # {配置项: 值}
+        self.job = None
+        self.pages = 0
+        self.baseline = (0.0, 0)  # 预热试运行的 (耗时, 页数)，即启动开销
+
+    @property
+    def succeeded(self):
+        return self.job is not None and self.job.succeeded
+
+    @property
+    def pages_per_sec(self):
+        """扣除启动开销 (模型加载和 1 页转换) 后的每秒页数"""
+        if not self.succeeded:
+            return 0.0
+        seconds = self.job.elapsed - self.baseline[0]
+        pages = self.pages - self.baseline[1]
+        if seconds <= 0 or pages <= 0:
+            # 预热失败或样本只有 1 页时无法扣除
+            seconds, pages = self.job.elapsed, self.pages
+        return pages / seconds if seconds else 0.0
+
+    @property
+    def peak_rss_mb(self):
+        if self.job is None or self.job.sampler is None:
+            return None
+        return self.job.sampler.peak_rss / 1024 / 1024
+
+
+class AutoTuner(QObject):
+    """
+    后台自动调优
+    使用独立的 JobRunner 逐个运行试验，避免与正在进行的转换互相干扰；可随时取消
+    """
+
+    trialFinished = Signal(object)  # TuneTrial
+    finished = Signal(object)  # 最佳 TuneTrial，全部失败或取消时为 None
+
+    def __init__(self, input_path, option_args, page_range="", parent=None):
+        super().__init__(parent)
+        self.input_path = input_path
+        self.option_args = list(option_args)
+        self.sample_range = sample_page_range(page_range)
+        self.sample_pages = len(parse_page_range(self.sample_range))
+        self.trials = [
+            TuneTrial({"pdftext_workers": workers}) for workers in candidate_workers()
+        ]
+        self.warmup = TuneTrial(dict(self.trials[0].settings))
+        self.warmup_range = format_page_range(parse_page_range(self.sample_range)[:1])
+        self.cancelled = False
+        self._done = False
+        self._index = -1
+        self._current = None
+        self._output_dir = tempfile.mkdtemp(prefix="markergui_tune_")
+
+        # 解析进度条得到实际转换的页数 (文档可能少于样本页数)
+        self.progress_model = ProgressModel(self)
+        self.runner = JobRunner(self)
+        self.runner.jobOutput.connect(lambda job, line: self.progress_model.feed(job.id, line))
+        self.runner.jobProgress.connect(lambda job, line: self.progress_model.feed(job.id, line))
+        self.runner.jobFinished.connect(self._on_job_finished)
+
+    def start(self):
+        self._run(self.warmup)
+
+    def cancel(self):
+        self.cancelled = True
+        self.runner.shutdown()
+
+    def _build_args(self, trial):
+        page_range = self.warmup_range if trial is self.warmup else self.sample_range
+        args = override_option(self.option_args, "--output_dir", self._output_dir)
+        args = override_option(args, "--page_range", page_range)
+        args = override_option(args, "--pdftext_workers", trial.settings["pdftext_workers"])
+        return ["marker_single", self.input_path] + args
+
+    def _next(self):
+        self._index += 1
+        if self.cancelled or self._index >= len(self.trials):
+            self._finish()
+            return
+        self._run(self.trials[self._index])
+
+    def _run(self, trial):
+        self._current = trial
+        label = "调优预热" if trial is self.warmup else f"调优 {trial.settings}"
+        trial.job = Job(self._build_args(trial), label=label)
+        self.runner.submit(trial.job)
+
+    def _on_job_finished(self, job):
+        if self.cancelled:
+            self._finish()
+            return
+        trial = self._current
+        sample_pages = 1 if trial is self.warmup else self.sample_pages
+        trial.pages = count_pages(self.progress_model.job_stages(job.id)) or sample_pages
+        if trial is self.warmup:
+            if trial.succeeded:
+                for other in self.trials:
+                    other.baseline = (trial.job.elapsed, trial.pages)
+                print(f"[INFO] 自动调优: 预热完成，启动开销约 {trial.job.elapsed:.1f}s (不参与比较)")
+            else:
+                print("[WORRY] 自动调优: 预热运行失败，试运行耗时将包含模型加载")
+        else:
+            self.trialFinished.emit(trial)
+        self._next()
+
+    def best_trial(self):
+        """每秒页数最高者胜出，相近 (5% 以内) 时选内存占用较低的"""
+        done = [trial for trial in self.trials if trial.succeeded]
+        if not done:
+            return None
+        fastest = max(trial.pages_per_sec for trial in done)
+        close = [trial for trial in done if trial.pages_per_sec >= fastest * 0.95]
+        return min(close, key=lambda trial: trial.peak_rss_mb or 0)
+
+    def _finish(self):
+        if self._done:
+            return
+        self._done = True
+        shutil.rmtree(self._output_dir, ignore_errors=True)
+        self.finished.emit(None if self.cancelled else self.best_trial())
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+并行批处理
+将输入文件夹拆分为逐文件的 marker_single 任务，交由 JobRunner 并发执行
+"""
+# 标准库 imports
+import os
+
+# 本地 imports
+from .discovery import FileFilter, iter_files
+from .job_runner import Job
+from .manifest import input_signature
+
+# marker 支持的输入文件类型
+SUPPORTED_EXTENSIONS = {
+    ".pdf",
+    ".png",
+    ".jpg",
+    ".jpeg",
+    ".gif",
+    ".bmp",
+    ".tif",
+    ".tiff",
+    ".webp",
+    ".pptx",
+    ".docx",
+    ".xlsx",
+    ".html",
+    ".htm",
+    ".epub",
+}
+
+
+def scan_input_files(folder):
+    """
+    列出文件夹中可转换的文件 (不递归)，返回 [(路径, os.stat 结果)]
+    按文件大小从大到小排序，先处理大文件可以缩短批处理的尾部等待时间
+    """
+    files = list(iter_files(folder, FileFilter(SUPPORTED_EXTENSIONS)))
+    files.sort(key=lambda item: item[1].st_size, reverse=True)
+    return files
+
+
+def filter_outdated(files, manifest, fingerprint, root=None, output_format=None):
+    """
+    过滤掉输入和选项均未变化的文件，返回需要重新转换的 [(路径, os.stat 结果)]
+    root 与 build_batch_jobs 相同，用于找到递归扫描时子目录中文件的输出；
+    给出 output_format 时按其主输出文件判断输出是否存在
+    """
+    return [
+        (path, st)
+        for path, st in files
+        if not manifest.is_up_to_date(
+            path, input_signature(st), fingerprint, root, output_format
+        )
+    ]
+
+
+def _with_output_subdir(option_args, subdir):
+    """将 --output_dir 参数改为其下的子目录"""
+    args = list(option_args)
+    if subdir and "--output_dir" in args[:-1]:
+        index = args.index("--output_dir") + 1
+        args[index] = os.path.join(args[index], subdir)
+    return args
+
+
+def build_batch_jobs(files, option_args, output_dir="", fingerprint="", root=None):
+    """
+    为每个文件生成一个 marker_single 任务，files 为 [(路径, os.stat 结果)]
+    给出 root 时按文件相对 root 的子目录输出，避免递归扫描时不同子目录中的同名文件互相覆盖
+    """
+    jobs = []
+    for path, st in files:
+        subdir = os.path.relpath(os.path.dirname(path), root) if root else ""
+        job = Job(
+            ["marker_single", path]
+            + _with_output_subdir(option_args, "" if subdir == "." else subdir),
+            label=os.path.basename(path),
+            input_path=path,
+            output_dir=output_dir,
+        )
+        job.input_signature = input_signature(st)
+        job.options_fingerprint = fingerprint
+        job.size = st.st_size
+        jobs.append(job)
+    return jobs
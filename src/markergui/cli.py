@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""
+命令行入口 (无界面)
+从已保存的预设生成 marker 命令并在子进程中运行，不加载 Qt，可在没有显示服务器的服务器上使用
+
+    python -m markergui run --preset high_quality --input doc.pdf --output-dir out
+    python -m markergui presets
+"""
+# 标准库 imports
+import argparse
+import json
+import os
+import subprocess
+import time
+
+# 本地 imports
+from .command_generator import build_device_commands, format_command, quote_arg
+from .config_manager import ConfigManager
+from .options import coerce_option, resolve_config
+
+
+def parse_set_option(text):
+    """解析 --set KEY=VALUE，值按 JSON 解析 (如 true、8)，失败时作为字符串"""
+    if "=" not in text:
+        raise argparse.ArgumentTypeError(f"格式应为 KEY=VALUE: {text}")
+    key, value = text.split("=", 1)
+    try:
+        value = json.loads(value)
+    except ValueError:
+        pass
+    return key.strip(), value
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="markergui", description="MarkerGUI 命令行入口 (不启动图形界面)"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run = subparsers.add_parser("run", help="使用预设运行转换")
+    run.add_argument("--preset", default="default", help="预设名称 (默认: default)")
+    run.add_argument("--input", required=True, help="输入文件或文件夹")
+    run.add_argument("--output-dir", help="输出目录 (覆盖预设)")
+    run.add_argument("--page-range", help="页面范围，如 0,5-10 (覆盖预设)")
+    run.add_argument(
+        "--set",
+        dest="overrides",
+        action="append",
+        default=[],
+        type=parse_set_option,
+        metavar="KEY=VALUE",
+        help="覆盖任意配置项，可重复使用，如 --set use_llm=true",
+    )
+    run.add_argument("--dry-run", action="store_true", help="只打印命令，不运行")
+
+    subparsers.add_parser("presets", help="列出可用预设")
+    return parser
+
+
+def load_config(args, config_manager):
+    """默认配置 + 预设设置 + 命令行覆盖项 (按配置项类型转换，无法转换时抛出 ValueError)"""
+    if not config_manager.preset_exists(args.preset):
+        raise ValueError(f"预设 '{args.preset}' 不存在")
+    settings = config_manager.presets[args.preset].get("settings", {})
+
+    overrides = dict(args.overrides)
+    unknown = [key for key in overrides if key not in resolve_config()]
+    if unknown:
+        raise ValueError(f"未知的配置项: {', '.join(unknown)}")
+    overrides = {key: coerce_option(key, value) for key, value in overrides.items()}
+    overrides["input_path"] = args.input
+    if args.output_dir is not None:
+        overrides["output_dir"] = args.output_dir
+    if args.page_range is not None:
+        overrides["page_range"] = args.page_range
+    return resolve_config(settings, overrides)
+
+
+def _start(env, argv):
+    process_env = dict(os.environ)
+    process_env.update(env)
+    process_env["PYTHONUNBUFFERED"] = "1"
+    try:
+        return subprocess.Popen(argv, env=process_env)
+    except OSError as e:
+        print(f"[ERROR] 启动失败: {str(e)} (请确认 marker 已安装并在 PATH 中)")
+        return None
+
+
+def run_commands(commands):
+    """
+    同时运行所有命令 (每个设备槽位一条)，输出直接写到当前终端
+    返回退出码，任一命令失败时为第一个非零退出码
+    """
+    start = time.monotonic()
+    processes = [_start(env, argv) for env, argv in commands]
+    exit_codes = []
+    try:
+        for process in processes:
+            exit_codes.append(127 if process is None else process.wait())
+    except KeyboardInterrupt:
+        for process in processes:
+            if process is not None and process.poll() is None:
+                process.terminate()
+        exit_codes = [127 if p is None else p.wait() for p in processes]
+    elapsed = time.monotonic() - start
+
+    exit_code = next((code for code in exit_codes if code != 0), 0)
+    if exit_code == 0:
+        print(f"[INFO] 执行完成: 退出码 {exit_code}, 耗时 {elapsed:.1f}s")
+    else:
+        print(f"[ERROR] 执行失败: 退出码 {exit_code}, 耗时 {elapsed:.1f}s")
+    return exit_code
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    config_manager = ConfigManager()
+
+    if args.command == "presets":
+        for name, preset in config_manager.presets.items():
+            print(f"{name}\t{preset.get('description', '')}")
+        return 0
+
+    try:
+        config = load_config(args, config_manager)
+        commands = build_device_commands(config)
+    except ValueError as e:
+        print(f"[ERROR] {str(e)}")
+        return 2
+
+    for env, command in commands:
+        env_prefix = "".join(f"{name}={quote_arg(value)} " for name, value in env.items())
+        print(
+            f"[INFO] 开始执行命令: {env_prefix}"
+            f"{format_command(command[0], command[1], command[2:])}",
+            flush=True,
+        )
+    if args.dry_run:
+        return 0
+    return run_commands(commands)
@@ -1,5 +1,9 @@
 import os
-from PySide6.QtWidgets import QMessageBox
+import re
+from functools import lru_cache
+
+from .devices import device_slots, uses_device_slots
+from .options import resolve_config
 
 # 预设配置数据
 PRESET_CONFIGS = {
@@ -43,215 +47,458 @@ def get_preset_config(preset_name):
     return PRESET_CONFIGS.get(preset_name, PRESET_CONFIGS["default"])
 
 
+# 命令字符串中需要加引号的参数 (路径和自由文本)
+_QUOTED_OPTIONS = {
+    "--output_dir",
+    "--page_range",
+    "--vertex_project_id",
+    "--vertex_location",
+    "--ollama_base_url",
+    "--ollama_model",
+    "--claude_api_key",
+    "--claude_model_name",
+    "--openai_api_key",
+    "--openai_model",
+    "--openai_base_url",
+    "--gemini_api_key",
+    "--gemini_model_name",
+    "--processors",
+    "--debug_data_folder",
+}
+
+
+# 不需要加引号的参数
+_PLAIN_ARG = re.compile(r"[\w@%+=:,./-]+")
+
+
+def quote_arg(arg, force=False):
+    """
+    命令字符串中的单个参数：force 时总是加引号，否则只在包含空格或特殊字符时加引号
+    引号内的特殊字符按当前平台的 shell 规则转义，复制到终端后得到原参数
+    """
+    if not force and _PLAIN_ARG.fullmatch(arg):
+        return arg
+    if os.name == "nt":
+        # CommandLineToArgvW: 引号前和结尾的反斜杠需要加倍
+        arg = re.sub(r'(\\*)"', r'\1\1\\"', arg)
+        arg = re.sub(r"(\\+)$", r"\1\1", arg)
+        return f'"{arg}"'
+    return '"' + re.sub(r'([\\"$`])', r"\\\1", arg) + '"'
+
+
+def format_command(program, input_path, option_args):
+    """将参数列表格式化为可显示的命令字符串 (仅用于显示和复制，运行时直接使用 argv)"""
+    parts = [quote_arg(program), quote_arg(input_path, force=True)]
+    for i, arg in enumerate(option_args):
+        parts.append(quote_arg(arg, force=i > 0 and option_args[i - 1] in _QUOTED_OPTIONS))
+    return " ".join(parts)
+
+
+def override_option(option_args, flag, value=None):
+    """
+    替换参数列表中的选项值，value 为 None 时移除该选项
+    """
+    args = []
+    skip = False
+    for i, arg in enumerate(option_args):
+        if skip:
+            skip = False
+            continue
+        if arg == flag:
+            # 带值的选项同时跳过其值
+            skip = i + 1 < len(option_args) and not option_args[i + 1].startswith("--")
+            continue
+        args.append(arg)
+    if value is not None:
+        args += [flag, str(value)]
+    return args
+
+
+def split_options(args):
+    """将命令行参数拆分为 [(参数名, 值)]，开关参数的值为 None"""
+    options = []
+    i = 0
+    while i < len(args):
+        name = args[i]
+        value = None
+        if i + 1 < len(args) and not args[i + 1].startswith("--"):
+            value = args[i + 1]
+            i += 1
+        options.append((name, value))
+        i += 1
+    return options
+
+
+def option_value(args, name):
+    for option, value in split_options(args):
+        if option == name:
+            return value
+    return None
+
+
+def parse_page_range(spec):
+    """
+    解析页面范围 (如 "0,5-10,20")，返回排序后的页码列表
+    格式错误时抛出 ValueError
+    """
+    pages = set()
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            start, end = int(start), int(end)
+            if end < start:
+                raise ValueError(f"无效的页面范围: {part}")
+            pages.update(range(start, end + 1))
+        else:
+            pages.add(int(part))
+    return sorted(pages)
+
+
+def format_page_range(pages):
+    """将页码列表格式化为紧凑的页面范围字符串"""
+    parts = []
+    pages = sorted(set(pages))
+    i = 0
+    while i < len(pages):
+        j = i
+        while j + 1 < len(pages) and pages[j + 1] == pages[j] + 1:
+            j += 1
+        parts.append(str(pages[i]) if i == j else f"{pages[i]}-{pages[j]}")
+        i = j + 1
+    return ",".join(parts)
+
+
+# 选项参数按分段生成，每段只依赖少数配置项，生成结果按这些配置项的值缓存；
+# 修改一个配置项 (如输入时逐字修改输出目录) 只需重新生成其所在的分段
+_SEGMENTS = []
+
+
+def _segment(*keys):
+    def decorator(func):
+        @lru_cache(maxsize=32)
+        def cached(values):
+            return tuple(func(dict(zip(keys, values))))
+
+        _SEGMENTS.append((keys, cached))
+        return func
+
+    return decorator
+
+
+def _text(config, key):
+    return str(config[key] or "").strip()
+
+
+@_segment("output_dir")
+def _output_dir_args(config):
+    # 输出目录
+    output_dir = _text(config, "output_dir")
+    return ["--output_dir", output_dir] if output_dir else []
+
+
+@_segment("output_format")
+def _output_format_args(config):
+    # 输出格式
+    output_format = config["output_format"]
+    return ["--output_format", output_format] if output_format != "markdown" else []
+
+
+@_segment("page_range")
+def _page_range_args(config):
+    # 页面范围
+    page_range = _text(config, "page_range")
+    return ["--page_range", page_range] if page_range else []
+
+
+@_segment(
+    "paginate_output",
+    "image_extraction_mode",
+    "debug_mode",
+    "disable_multiprocessing",
+    "pdftext_workers",
+)
+def _basic_args(config):
+    args = []
+    # 基本选项
+    if config["paginate_output"]:
+        args.append("--paginate_output")
+
+    # 图片处理模式
+    image_mode = config["image_extraction_mode"]
+    if "禁用" in image_mode:
+        args.append("--disable_image_extraction")
+    # "提取图片 (默认)"不需要标志
+
+    if config["debug_mode"]:
+        args.append("--debug")
+    if config["disable_multiprocessing"]:
+        args.append("--disable_multiprocessing")
+
+    # PDF文本提取工作进程数
+    pdftext_workers = config["pdftext_workers"]
+    if pdftext_workers != 4:
+        args += ["--pdftext_workers", str(pdftext_workers)]
+    return args
+
+
+@_segment(
+    "format_lines",
+    "ocr_mode",
+    "strip_existing_ocr",
+    "ocr_task_name",
+    "disable_ocr_math",
+    "drop_repeated_text",
+)
+def _ocr_args(config):
+    args = []
+    # OCR选项
+    if config["format_lines"]:
+        args.append("--format_lines")
+
+    # OCR处理模式
+    ocr_mode = config["ocr_mode"]
+    if "禁用OCR" in ocr_mode:
+        args.append("--disable_ocr")
+    elif "强制OCR" in ocr_mode:
+        args.append("--force_ocr")
+    # "标准OCR (默认)"不需要添加标志
+
+    if config["strip_existing_ocr"]:
+        args.append("--strip_existing_ocr")
+
+    # OCR任务模式
+    ocr_task = config["ocr_task_name"]
+    if ocr_task != "ocr_with_boxes":
+        args += ["--ocr_task_name", ocr_task]
+    if config["disable_ocr_math"]:
+        args.append("--disable_ocr_math")
+    if config["drop_repeated_text"]:
+        args.append("--drop_repeated_text")
+    return args
+
+
+@_segment("converter_cls", "force_layout_block")
+def _converter_args(config):
+    args = []
+    # 转换器设置
+    converter_cls = config["converter_cls"]
+    if "TableConverter" in converter_cls:
+        args += ["--converter_cls", "marker.converters.table.TableConverter"]
+    elif "OCRConverter" in converter_cls:
+        args += ["--converter_cls", "marker.converters.ocr.OCRConverter"]
+    elif "ExtractionConverter" in converter_cls:
+        args += ["--converter_cls", "marker.converters.extraction.ExtractionConverter"]
+
+    force_layout = _text(config, "force_layout_block")
+    if force_layout:
+        args += ["--force_layout_block", force_layout]
+    return args
+
+
+@_segment("keep_pageheader_in_output", "keep_pagefooter_in_output", "disable_links")
+def _content_args(config):
+    args = []
+    # 输出内容控制
+    if config["keep_pageheader_in_output"]:
+        args.append("--keep_pageheader_in_output")
+    if config["keep_pagefooter_in_output"]:
+        args.append("--keep_pagefooter_in_output")
+    if config["disable_links"]:
+        args.append("--disable_links")
+    return args
+
+
+@_segment(
+    "use_llm",
+    "redo_inline_math",
+    "llm_service",
+    "gemini_api_key",
+    "gemini_model_name",
+    "vertex_project_id",
+    "vertex_location",
+    "ollama_base_url",
+    "ollama_model",
+    "claude_api_key",
+    "claude_model_name",
+    "openai_api_key",
+    "openai_model",
+    "openai_base_url",
+    "max_concurrency",
+    "timeout",
+    "max_retries",
+)
+def _llm_args(config):
+    # LLM选项
+    if not config["use_llm"]:
+        return []
+
+    def text(key):
+        return _text(config, key)
+
+    args = ["--use_llm"]
+    if config["redo_inline_math"]:
+        args.append("--redo_inline_math")
+
+    # LLM服务配置
+    service = config["llm_service"]
+    if "Vertex" in service:
+        args += ["--llm_service", "marker.services.vertex.GoogleVertexService"]
+        if text("vertex_project_id"):
+            args += ["--vertex_project_id", text("vertex_project_id")]
+        if text("vertex_location"):
+            args += ["--vertex_location", text("vertex_location")]
+    elif "Ollama" in service:
+        args += ["--llm_service", "marker.services.ollama.OllamaService"]
+        if text("ollama_base_url"):
+            args += ["--ollama_base_url", text("ollama_base_url")]
+        if text("ollama_model"):
+            args += ["--ollama_model", text("ollama_model")]
+    elif "Claude" in service:
+        args += ["--llm_service", "marker.services.claude.ClaudeService"]
+        if text("claude_api_key"):
+            args += ["--claude_api_key", text("claude_api_key")]
+        if text("claude_model_name"):
+            args += ["--claude_model_name", text("claude_model_name")]
+    elif "OpenAI" in service:
+        args += ["--llm_service", "marker.services.openai.OpenAIService"]
+        if text("openai_api_key"):
+            args += ["--openai_api_key", text("openai_api_key")]
+        if text("openai_model"):
+            args += ["--openai_model", text("openai_model")]
+        if text("openai_base_url"):
+            args += ["--openai_base_url", text("openai_base_url")]
+    else:  # Gemini
+        if text("gemini_api_key"):
+            args += ["--gemini_api_key", text("gemini_api_key")]
+        if text("gemini_model_name") != "gemini-2.0-flash":
+            args += ["--gemini_model_name", text("gemini_model_name")]
+
+    # LLM高级选项
+    if config["max_concurrency"] != 3:
+        args += ["--max_concurrency", str(config["max_concurrency"])]
+    if config["timeout"] != 30:
+        args += ["--timeout", str(config["timeout"])]
+    if config["max_retries"] != 2:
+        args += ["--max_retries", str(config["max_retries"])]
+    return args
+
+
+@_segment("processors")
+def _processor_args(config):
+    # 高级选项
+    processors = _text(config, "processors")
+    return ["--processors", processors] if processors else []
+
+
+@_segment("debug_data_folder", "debug_layout_images", "debug_pdf_images", "debug_json")
+def _debug_args(config):
+    args = []
+    # 调试选项
+    debug_data_folder = _text(config, "debug_data_folder")
+    if debug_data_folder:
+        args += ["--debug_data_folder", debug_data_folder]
+    if config["debug_layout_images"]:
+        args.append("--debug_layout_images")
+    if config["debug_pdf_images"]:
+        args.append("--debug_pdf_images")
+    if config["debug_json"]:
+        args.append("--debug_json")
+    return args
+
+
+def build_config_args(config):
+    """
+    根据配置字典生成 marker 选项参数列表 (不含程序名和输入路径)
+    配置形状与 get_current_config 相同，缺少的项使用 DEFAULT_OPTIONS
+    """
+    config = resolve_config(config)
+    args = []
+    for keys, cached in _SEGMENTS:
+        args += cached(tuple(config[key] for key in keys))
+    return args
+
+
+def build_command(config):
+    """
+    根据配置字典生成 (环境变量, argv)
+    文件夹输入使用 marker，单文件使用 marker_single
+    输入路径为空时抛出 ValueError
+    """
+    config = resolve_config(config)
+    input_path = str(config["input_path"] or "").strip()
+    if not input_path:
+        raise ValueError("请输入有效的文件或目录路径")
+
+    program = "marker" if os.path.isdir(input_path) else "marker_single"
+    return {}, [program, input_path] + build_config_args(config)
+
+
+def build_device_commands(config):
+    """
+    多设备：每个设备槽位一条命令 [(环境变量, argv)]，每条命令都带完整的选项参数
+    文件夹输入时各槽位的 marker 以 --num_chunks/--chunk_idx 处理文件列表中不同的部分，
+    --workers 为每个设备的工作进程数；单文件只在第一个槽位上运行
+    未使用设备槽位时返回单条不修改环境变量的命令；设备编号无效时抛出 ValueError
+    """
+    config = resolve_config(config)
+    env, argv = build_command(config)
+    if not uses_device_slots(config):
+        return [(env, argv)]
+    slots = device_slots(config)
+    if argv[0] != "marker" or len(slots) == 1:
+        return [(dict(env, **slots[0].env), argv)]
+    commands = []
+    for slot in slots:
+        chunk_args = ["--num_chunks", str(len(slots)), "--chunk_idx", str(slot.index)]
+        commands.append(
+            (dict(env, **slot.env), argv + chunk_args + ["--workers", str(slot.workers)])
+        )
+    return commands
+
+
+def build_option_args(window):
+    """
+    根据主窗口的UI设置生成 marker 选项参数列表 (不含程序名和输入路径)
+    """
+    return build_config_args(window.get_current_config())
+
+
 def generate_command(window):
     """
     根据主窗口的UI设置生成Marker命令
+    返回 (环境变量, argv)，出错时弹窗提示并返回 None
     """
+    # 延迟导入，命令行入口使用本模块时无需加载 Qt 控件
+    from PySide6.QtWidgets import QMessageBox
+
     try:
-        command = ""
-        input_path = window.input_path.text().strip()
-
-        # 确定是单文件还是批量处理
-        if input_path and os.path.isdir(input_path):
-            command += "marker "
-            # 当输入是文件夹且输出路径为空时打印警告
-            output_dir = window.output_dir.text().strip()
-            if not output_dir:
-                print("[WARNING]当前未设置输出路径")
-        elif input_path:
-            command += "marker_single "
-        else:
-            QMessageBox.warning(window, "输入错误", "请输入有效的文件或目录路径")
-            return ""
-
-        command += f'"{input_path}"'
-
-        # 输出目录
-        output_dir = window.output_dir.text().strip()
-        if output_dir:
-            command += f' --output_dir "{output_dir}"'
-
-        # 输出格式
-        output_format = window.output_format.currentText()
-        if output_format != "markdown":
-            command += f" --output_format {output_format}"
-
-        # 页面范围
-        page_range = window.page_range.text().strip()
-        if page_range:
-            command += f' --page_range "{page_range}"'
-
-        # 基本选项
-        if window.paginate_output.isChecked():
-            command += " --paginate_output"
-
-        # 图片处理模式
-        image_mode = window.image_extraction_mode.currentText()
-        if "禁用" in image_mode:
-            command += " --disable_image_extraction"
-        # "提取图片 (默认)"不需要标志
-
-        if window.debug_mode.isChecked():
-            command += " --debug"
-        if window.disable_multiprocessing.isChecked():
-            command += " --disable_multiprocessing"
-
-        # PDF文本提取工作进程数
-        pdftext_workers = window.pdftext_workers.value()
-        if pdftext_workers != 4:
-            command += f" --pdftext_workers {pdftext_workers}"
-
-        # OCR选项
-        if window.format_lines.isChecked():
-            command += " --format_lines"
-
-        # OCR处理模式
-        ocr_mode = window.ocr_mode.currentText()
-        if "禁用OCR" in ocr_mode:
-            command += " --disable_ocr"
-        elif "强制OCR" in ocr_mode:
-            command += " --force_ocr"
-        # "标准OCR (默认)"不需要添加标志
-
-        if window.strip_existing_ocr.isChecked():
-            command += " --strip_existing_ocr"
-
-        # OCR任务模式
-        ocr_task = window.ocr_task_name.currentText()
-        if ocr_task != "ocr_with_boxes":
-            command += f" --ocr_task_name {ocr_task}"
-        if window.disable_ocr_math.isChecked():
-            command += " --disable_ocr_math"
-        if window.drop_repeated_text.isChecked():
-            command += " --drop_repeated_text"
-
-        # 转换器设置
-        converter_cls = window.converter_cls.currentText()
-        if "TableConverter" in converter_cls:
-            command += " --converter_cls marker.converters.table.TableConverter"
-        elif "OCRConverter" in converter_cls:
-            command += " --converter_cls marker.converters.ocr.OCRConverter"
-        elif "ExtractionConverter" in converter_cls:
-            command += (
-                " --converter_cls marker.converters.extraction.ExtractionConverter"
-            )
+        config = window.get_current_config()
+        input_path = str(config["input_path"]).strip()
 
-        force_layout = window.force_layout_block.text().strip()
-        if force_layout:
-            command += f" --force_layout_block {force_layout}"
-
-        # 输出内容控制
-        if window.keep_pageheader_in_output.isChecked():
-            command += " --keep_pageheader_in_output"
-        if window.keep_pagefooter_in_output.isChecked():
-            command += " --keep_pagefooter_in_output"
-        if window.disable_links.isChecked():
-            command += " --disable_links"
-
-        # LLM选项
-        if window.use_llm.isChecked():
-            command += " --use_llm"
-
-            if window.redo_inline_math.isChecked():
-                command += " --redo_inline_math"
-
-            # LLM服务配置
-            service = window.llm_service.currentText()
-            if "Vertex" in service:
-                command += " --llm_service marker.services.vertex.GoogleVertexService"
-                if window.vertex_project_id.text().strip():
-                    command += f' --vertex_project_id "{window.vertex_project_id.text().strip()}"'
-                if window.vertex_location.text().strip():
-                    command += (
-                        f' --vertex_location "{window.vertex_location.text().strip()}"'
-                    )
-            elif "Ollama" in service:
-                command += " --llm_service marker.services.ollama.OllamaService"
-                if window.ollama_base_url.text().strip():
-                    command += (
-                        f' --ollama_base_url "{window.ollama_base_url.text().strip()}"'
-                    )
-                if window.ollama_model.text().strip():
-                    command += f' --ollama_model "{window.ollama_model.text().strip()}"'
-            elif "Claude" in service:
-                command += " --llm_service marker.services.claude.ClaudeService"
-                if window.claude_api_key.text().strip():
-                    command += (
-                        f' --claude_api_key "{window.claude_api_key.text().strip()}"'
-                    )
-                if window.claude_model_name.text().strip():
-                    command += f' --claude_model_name "{window.claude_model_name.text().strip()}"'
-            elif "OpenAI" in service:
-                command += " --llm_service marker.services.openai.OpenAIService"
-                if window.openai_api_key.text().strip():
-                    command += (
-                        f' --openai_api_key "{window.openai_api_key.text().strip()}"'
-                    )
-                if window.openai_model.text().strip():
-                    command += f' --openai_model "{window.openai_model.text().strip()}"'
-                if window.openai_base_url.text().strip():
-                    command += (
-                        f' --openai_base_url "{window.openai_base_url.text().strip()}"'
-                    )
-            else:  # Gemini
-                if window.gemini_api_key.text().strip():
-                    command += (
-                        f' --gemini_api_key "{window.gemini_api_key.text().strip()}"'
-                    )
-                if window.gemini_model_name.text().strip() != "gemini-2.0-flash":
-                    command += f' --gemini_model_name "{window.gemini_model_name.text().strip()}"'
-
-            # LLM高级选项
-            if window.max_concurrency.value() != 3:
-                command += f" --max_concurrency {window.max_concurrency.value()}"
-            if window.timeout.value() != 30:
-                command += f" --timeout {window.timeout.value()}"
-            if window.max_retries.value() != 2:
-                command += f" --max_retries {window.max_retries.value()}"
-
-        # 高级选项 - 从AdvancedTab获取
-        advanced_tab = window.tabs.widget(3)  # 第4个标签页是AdvancedTab
-        if (
-            hasattr(advanced_tab, "processors")
-            and advanced_tab.processors.text().strip()
-        ):
-            processors = advanced_tab.processors.text().strip()
-            command += f' --processors "{processors}"'
-
-        # 调试选项
-        if (
-            hasattr(advanced_tab, "debug_data_folder")
-            and advanced_tab.debug_data_folder.text().strip()
-        ):
-            debug_folder = advanced_tab.debug_data_folder.text().strip()
-            command += f' --debug_data_folder "{debug_folder}"'
-        if (
-            hasattr(advanced_tab, "debug_layout_images")
-            and advanced_tab.debug_layout_images.isChecked()
-        ):
-            command += " --debug_layout_images"
-        if (
-            hasattr(advanced_tab, "debug_pdf_images")
-            and advanced_tab.debug_pdf_images.isChecked()
-        ):
-            command += " --debug_pdf_images"
-        if hasattr(advanced_tab, "debug_json") and advanced_tab.debug_json.isChecked():
-            command += " --debug_json"
-
-        # 多GPU设置
-        if (
-            hasattr(advanced_tab, "num_devices")
-            and advanced_tab.num_devices.value() > 1
-        ):
-            num_devices = advanced_tab.num_devices.value()
-            num_workers = (
-                advanced_tab.num_workers.value()
-                if hasattr(advanced_tab, "num_workers")
-                else 1
-            )
-            command = f'NUM_DEVICES={num_devices} NUM_WORKERS={num_workers} marker_chunk_convert "{input_path}" "{output_dir if output_dir else "output_dir"}"'
+        # 当输入是文件夹且输出路径为空时打印警告
+        if input_path and os.path.isdir(input_path) and not config["output_dir"].strip():
+            print("[WARNING]当前未设置输出路径")
 
-        return command
+        try:
+            env, argv = build_command(config)
+        except ValueError as e:
+            QMessageBox.warning(window, "输入错误", str(e))
+            return None
+
+        # 多设备时运行命令会把输入文件分配到各设备槽位，每个槽位使用相同的选项
+        if uses_device_slots(config):
+            try:
+                slots = device_slots(config)
+            except ValueError as e:
+                QMessageBox.warning(window, "输入错误", str(e))
+                return None
+            print(
+                f"[INFO] 多设备: 运行时分配到 {', '.join(slot.label for slot in slots)}, "
+                f"每个设备 {slots[0].workers} 个工作进程"
+            )
+        return env, argv
     except Exception as e:
         QMessageBox.critical(window, "生成命令错误", f"发生错误: {str(e)}")
-        return ""
+        return None
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+配置绑定层
+在内存中保存全部配置项的当前值 (类型与 DEFAULT_OPTIONS 一致)，控件被编辑时通过其变化信号同步，
+读取配置时不再逐个访问控件；应用配置 (如切换预设) 时只写入与当前值不同的控件，
+写入期间屏蔽控件信号，写入完成后每个依赖这些配置项的界面更新只运行一次
+"""
+# 标准库 imports
+from functools import partial
+
+# 第三方库 imports
+from PySide6.QtCore import QObject, Signal
+
+# 本地 imports
+from .options import DEFAULT_OPTIONS, coerce_option
+
+# 获取方法 -> 控件值变化信号
+CHANGE_SIGNALS = {
+    "text": "textChanged",
+    "currentText": "currentTextChanged",
+    "isChecked": "toggled",
+    "value": "valueChanged",
+}
+
+
+class ConfigBinding(QObject):
+    """
+    specs:  配置项 -> (获取方法, 设置方法)，顺序即 values() 的顺序
+    locate: locate(配置项) 返回对应控件，尚未构建时返回 None
+    write:  write(配置项, 控件, 值) 将值写入控件，默认调用设置方法
+    """
+
+    changed = Signal(object)  # 有变化的配置项集合
+
+    def __init__(self, specs, locate, write=None, parent=None):
+        super().__init__(parent)
+        self.specs = specs
+        self._locate = locate
+        self._write = write or self._default_write
+        self._values = {key: DEFAULT_OPTIONS.get(key) for key in specs}
+        self._widgets = {}  # 已绑定的控件
+        self._unbound = list(specs)
+        self._dependents = []  # [(配置项集合, 回调)]
+
+    def _default_write(self, key, widget, value):
+        getattr(widget, self.specs[key][1])(value)
+
+    def value(self, key):
+        return self._values[key]
+
+    def values(self):
+        """当前配置 (副本)"""
+        return dict(self._values)
+
+    def add_dependent(self, keys, callback):
+        """keys 中任一配置项被 apply 改变时运行 callback()，同一次 apply 中只运行一次"""
+        self._dependents.append((frozenset(keys), callback))
+
+    def attach(self):
+        """
+        绑定新构建的控件：控件值与模型不同时写入模型的值 (即控件构建前应用的配置)
+        返回被写入的配置项集合，并运行依赖它们的界面更新
+        """
+        if not self._unbound:
+            return set()
+        written = set()
+        unbound = []
+        for key in self._unbound:
+            widget = self._locate(key)
+            if widget is None:
+                unbound.append(key)
+                continue
+            self._widgets[key] = widget
+            getter = self.specs[key][0]
+            getattr(widget, CHANGE_SIGNALS[getter]).connect(partial(self._on_widget_changed, key))
+            if getattr(widget, getter)() != self._values[key]:
+                self._set_widget(key, widget, self._values[key])
+                written.add(key)
+        self._unbound = unbound
+        self._run_dependents(written)
+        return written
+
+    def apply(self, config):
+        """
+        应用配置，未知配置项忽略，缺少的配置项保持不变
+        只写入有变化的控件，返回有变化的配置项集合
+        """
+        self.attach()
+        changed = set()
+        for key, value in config.items():
+            if key not in self._values:
+                continue
+            try:
+                value = coerce_option(key, value)
+            except ValueError as e:
+                print(f"[WARNING] 忽略配置项: {str(e)}")
+                continue
+            if value == self._values[key]:
+                continue
+            self._values[key] = value
+            changed.add(key)
+            widget = self._widgets.get(key)
+            if widget is not None:
+                self._set_widget(key, widget, value)
+        self._run_dependents(changed)
+        if changed:
+            self.changed.emit(changed)
+        return changed
+
+    def _set_widget(self, key, widget, value):
+        blocked = widget.blockSignals(True)
+        try:
+            self._write(key, widget, value)
+        finally:
+            widget.blockSignals(blocked)
+        # 控件可能修正写入的值 (如超出范围的数值)，以控件为准
+        self._values[key] = getattr(widget, self.specs[key][0])()
+
+    def _run_dependents(self, keys):
+        if not keys:
+            return
+        for dependent_keys, callback in self._dependents:
+            if dependent_keys & keys:
+                callback()
+
+    def _on_widget_changed(self, key, value):
+        if self._values[key] != value:
+            self._values[key] = value
+            self.changed.emit({key})
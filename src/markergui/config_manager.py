@@ -1,73 +1,202 @@
 import os
 import json
-from pathlib import Path
-from PySide6.QtWidgets import QMessageBox
+
+# QMessageBox 仅在需要弹窗时导入，命令行入口加载预设时不依赖 Qt 控件
+
+# 文件名中不允许出现的字符 (Windows 限制)，按 %XX 转义
+_UNSAFE_CHARS = set('<>:"/\\|?*%')
+
+
+def preset_filename(preset_name):
+    """预设名称对应的文件名，保留中文等可读字符"""
+    escaped = "".join(
+        f"%{ord(c):02X}" if c in _UNSAFE_CHARS or ord(c) < 32 else c
+        for c in preset_name
+    )
+    return escaped + ".json"
 
 
 class ConfigManager:
+    """
+    预设存储
+    每个预设保存为 config/presets/ 下的单独文件，写入时先写临时文件再原子替换，
+    内存中维护预设索引，按文件修改时间和大小检测其他实例对预设的修改
+    首次运行时从旧版的 config/default.json 导入全部预设
+    """
+
     CONFIG_DIR = "config"
+    PRESET_DIR = os.path.join(CONFIG_DIR, "presets")
     DEFAULT_PRESET_FILE = os.path.join(CONFIG_DIR, "default.json")
 
     def __init__(self):
+        self.presets = {}  # 预设名称 -> {"description", "settings"}
+        self._files = {}  # 文件名 -> ((修改时间, 大小), 预设名称)
         # 确保配置文件存在
         self.ensure_default_config()
         self.presets = self.load_default_presets()
         self.current_config = {}
 
     def ensure_default_config(self):
-        """确保默认配置文件存在，如果不存在则创建"""
-        if not os.path.exists(self.DEFAULT_PRESET_FILE):
-            config_dir = Path(self.CONFIG_DIR)
-            config_dir.mkdir(exist_ok=True)
-
-            default_configs = {
-                "default": {
-                    "description": "默认配置",
-                    "settings": {"output_format": "markdown", "use_llm": False},
-                },
-                "high_quality": {
-                    "description": "高质量转换",
-                    "settings": {
-                        "output_format": "markdown",
-                        "use_llm": True,
-                        "llm_service": "Google Gemini",
-                        "gemini_model_name": "gemini-2.0-flash",
-                    },
+        """确保预设目录存在；首次运行时导入 default.json，没有时创建内置预设"""
+        if os.path.isdir(self.PRESET_DIR):
+            return
+        os.makedirs(self.PRESET_DIR, exist_ok=True)
+
+        if os.path.exists(self.DEFAULT_PRESET_FILE):
+            count = self.import_presets(self.DEFAULT_PRESET_FILE)
+            print(f"[INFO] 已从 {self.DEFAULT_PRESET_FILE} 导入 {count} 个预设")
+            return
+
+        default_configs = {
+            "default": {
+                "description": "默认配置",
+                "settings": {"output_format": "markdown", "use_llm": False},
+            },
+            "high_quality": {
+                "description": "高质量转换",
+                "settings": {
+                    "output_format": "markdown",
+                    "use_llm": True,
+                    "llm_service": "Google Gemini",
+                    "gemini_model_name": "gemini-2.0-flash",
                 },
-                "table_extraction": {
-                    "description": "表格提取",
-                    "settings": {
-                        "converter_cls": "marker.converters.table.TableConverter",
-                        "image_extraction_mode": "禁用图片提取",
-                    },
+            },
+            "table_extraction": {
+                "description": "表格提取",
+                "settings": {
+                    "converter_cls": "marker.converters.table.TableConverter",
+                    "image_extraction_mode": "禁用图片提取",
                 },
-                "pure_ocr": {
-                    "description": "纯OCR处理",
-                    "settings": {
-                        "converter_cls": "marker.converters.ocr.OCRConverter",
-                        "ocr_mode": "强制OCR (扫描所有)",
-                        "use_llm": False,
-                    },
+            },
+            "pure_ocr": {
+                "description": "纯OCR处理",
+                "settings": {
+                    "converter_cls": "marker.converters.ocr.OCRConverter",
+                    "ocr_mode": "强制OCR (扫描所有)",
+                    "use_llm": False,
                 },
+            },
+        }
+
+        for name, preset in default_configs.items():
+            self._write_preset(name, preset)
+
+    def import_presets(self, path):
+        """导入 default.json 格式的预设文件 ({名称: {"description", "settings"}})，返回导入数量"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                presets = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] 导入预设失败: {str(e)}")
+            return 0
+
+        count = 0
+        for name, preset in presets.items():
+            if isinstance(preset, dict):
+                try:
+                    self._write_preset(name, preset)
+                    count += 1
+                except OSError as e:
+                    print(f"[ERROR] 导入预设 '{name}' 失败: {str(e)}")
+        return count
+
+    def _preset_path(self, preset_name):
+        return os.path.join(self.PRESET_DIR, preset_filename(preset_name))
+
+    def _write_preset(self, preset_name, preset):
+        """原子写入单个预设：临时文件写完后再替换，写入中断不会损坏已有预设"""
+        path = self._preset_path(preset_name)
+        data = {
+            "name": preset_name,
+            "description": preset.get("description", ""),
+            "settings": preset.get("settings", {}),
+        }
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        st = os.stat(path)
+        self._files[os.path.basename(path)] = ((st.st_mtime_ns, st.st_size), preset_name)
+        self.presets[preset_name] = {
+            "description": data["description"],
+            "settings": data["settings"],
+        }
+
+    def refresh(self):
+        """
+        重新扫描预设目录，只读取新增或修改过的文件
+        返回被其他实例新增、修改或删除的预设名称列表
+        """
+        changed = []
+        seen = set()
+        try:
+            entries = list(os.scandir(self.PRESET_DIR))
+        except OSError:
+            entries = []
+
+        for entry in entries:
+            if not entry.name.endswith(".json") or not entry.is_file():
+                continue
+            seen.add(entry.name)
+            try:
+                st = entry.stat()
+            except OSError:
+                continue
+            stamp = (st.st_mtime_ns, st.st_size)
+            known = self._files.get(entry.name)
+            if known is not None and known[0] == stamp:
+                continue
+
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[ERROR] 读取预设文件失败: {entry.name}: {str(e)}")
+                continue
+            name = data.get("name") or entry.name[: -len(".json")]
+            self._files[entry.name] = (stamp, name)
+            self.presets[name] = {
+                "description": data.get("description", ""),
+                "settings": data.get("settings", {}),
             }
+            changed.append(name)
 
-            with open(self.DEFAULT_PRESET_FILE, "w", encoding="utf-8") as f:
-                json.dump(default_configs, f, indent=2, ensure_ascii=False)
+        for filename in list(self._files):
+            if filename not in seen:
+                _, name = self._files.pop(filename)
+                self.presets.pop(name, None)
+                changed.append(name)
+        return changed
 
     def load_default_presets(self):
-        """从default.json加载预设配置"""
-        if not os.path.exists(self.DEFAULT_PRESET_FILE):
-            return {}
+        """加载预设目录中的全部预设，default 排在最前"""
+        self.refresh()
+        names = sorted(self.presets, key=lambda name: (name != "default", name))
+        return {name: self.presets[name] for name in names}
 
+    def _modified_elsewhere(self, preset_name):
+        """预设文件在本实例读取之后是否被其他实例修改或删除"""
+        filename = preset_filename(preset_name)
+        known = self._files.get(filename)
+        if known is None:
+            return os.path.exists(self._preset_path(preset_name))
         try:
-            with open(self.DEFAULT_PRESET_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception as e:
-            QMessageBox.critical(None, "配置错误", f"加载默认配置失败: {str(e)}")
-            return {}
+            st = os.stat(self._preset_path(preset_name))
+        except OSError:
+            return True
+        return known[0] != (st.st_mtime_ns, st.st_size)
 
     def get_available_presets(self):
         """获取可用预设列表"""
+        self.refresh()
         return list(self.presets.keys())
 
     def preset_exists(self, preset_name):
@@ -82,21 +211,25 @@ class ConfigManager:
         if preset_name == "default":
             return False
 
-        # 从预设字典中删除
-        del self.presets[preset_name]
-
-        # 保存更新后的预设到文件
         try:
-            with open(self.DEFAULT_PRESET_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.presets, f, indent=2, ensure_ascii=False)
-            return True
-        except Exception as e:
+            os.remove(self._preset_path(preset_name))
+        except FileNotFoundError:
+            pass  # 已被其他实例删除
+        except OSError as e:
             print(f"[ERROR] 删除预设失败: {str(e)}")
             return False
 
+        # 从预设索引中删除
+        del self.presets[preset_name]
+        self._files.pop(preset_filename(preset_name), None)
+        return True
+
     def load_preset(self, preset_name):
         """加载指定预设"""
+        self.refresh()
         if preset_name not in self.presets:
+            from PySide6.QtWidgets import QMessageBox
+
             QMessageBox.warning(None, "配置错误", f"预设 '{preset_name}' 不存在")
             return {}
 
@@ -104,8 +237,27 @@ class ConfigManager:
         return self.current_config
 
     def save_preset(self, preset_name, config_data, description="", overwrite=False):
-        """保存当前配置为新预设"""
+        """
+        保存当前配置为新预设
+        预设文件在本实例读取后被其他实例修改或删除时，即使 overwrite 为 True 也先询问，拒绝时不写入并返回 False
+        """
+        if self._modified_elsewhere(preset_name):
+            from PySide6.QtWidgets import QMessageBox
+
+            reply = QMessageBox.question(
+                None,
+                "预设已被修改",
+                f"预设 '{preset_name}' 已被其他实例修改或删除。是否用当前配置覆盖？",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            )
+            if reply != QMessageBox.StandardButton.Yes:
+                print(f"[WORRY] 预设 '{preset_name}' 已被其他实例修改，未保存")
+                return False
+            overwrite = True
+
         if preset_name in self.presets and not overwrite:
+            from PySide6.QtWidgets import QMessageBox
+
             reply = QMessageBox.question(
                 None,
                 "覆盖预设",
@@ -115,20 +267,17 @@ class ConfigManager:
             if reply == QMessageBox.StandardButton.No:
                 return False
 
-        # 更新预设
-        self.presets[preset_name] = {
-            "description": description,
-            "settings": config_data,
-        }
-
-        # 保存到文件
+        # 只写入该预设的文件
         try:
-            with open(self.DEFAULT_PRESET_FILE, "w", encoding="utf-8") as f:
-                json.dump(self.presets, f, indent=2, ensure_ascii=False)
+            self._write_preset(
+                preset_name, {"description": description, "settings": config_data}
+            )
             # 更新当前配置为新保存的配置
             self.current_config = config_data
             return True
         except Exception as e:
+            from PySide6.QtWidgets import QMessageBox
+
             QMessageBox.critical(None, "保存失败", f"保存预设时出错: {str(e)}")
             return False
 
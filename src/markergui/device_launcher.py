@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+多设备转换
+将批处理的输入文件按大小均衡分配到各设备槽位，每个文件一个 marker_single 任务，
+任务带有所属槽位的环境变量 (CUDA_VISIBLE_DEVICES / TORCH_DEVICE)，
+每个槽位同时运行的任务数由 JobRunner.slot_limits 限制，并汇总各槽位的进度和结果
+"""
+# 第三方库 imports
+from PySide6.QtCore import QObject, Signal
+
+
+class SlotProgress:
+    """单个设备槽位的统计"""
+
+    def __init__(self, slot):
+        self.slot = slot
+        self.total = 0
+        self.finished = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.busy_seconds = 0.0  # 各任务耗时之和
+        self.assigned_bytes = 0  # 已分配文件的总大小
+
+    @property
+    def done(self):
+        return self.finished + self.failed + self.cancelled
+
+    def format(self):
+        text = f"{self.slot.label}: {self.done}/{self.total}"
+        notes = []
+        if self.failed:
+            notes.append(f"失败 {self.failed}")
+        if self.cancelled:
+            notes.append(f"取消 {self.cancelled}")
+        if notes:
+            text += f" ({', '.join(notes)})"
+        return text
+
+
+class MultiDeviceConversion(QObject):
+    """
+    一次多设备转换
+    跟踪分配到各槽位的任务，失败后由重试管理器重新提交的任务接替原任务，全部结束后发出 finished
+    """
+
+    progress = Signal(object)  # 自身
+    finished = Signal(object)  # 自身
+
+    def __init__(self, slots, parent=None):
+        super().__init__(parent)
+        self.slots = slots
+        self.stats = {slot.index: SlotProgress(slot) for slot in slots}
+        self.jobs = []
+        self._runner = None
+        self._retry_manager = None
+        self._limits = {slot.index: slot.workers for slot in slots}
+        self._pending = set()  # 运行中或排队中的任务 ID
+        self._retrying = set()  # 等待重试的失败任务 ID
+        self._closed = False  # 文件已全部提交
+
+    def assign(self, files):
+        """
+        将一批 [(路径, os.stat 结果)] 分配到各槽位，返回 [(槽位, 文件列表)]
+        大文件先分配，每个文件分给已分配总大小最小的槽位，分批到达的文件也能保持均衡
+        """
+        groups = {slot.index: [] for slot in self.slots}
+        for item in sorted(files, key=lambda item: item[1].st_size, reverse=True):
+            stats = min(self.stats.values(), key=lambda stats: stats.assigned_bytes)
+            stats.assigned_bytes += item[1].st_size
+            groups[stats.slot.index].append(item)
+        return [(slot, groups[slot.index]) for slot in self.slots]
+
+    def connect_runner(self, runner, retry_manager=None):
+        self._runner = runner
+        runner.slot_limits = self._limits
+        runner.jobFinished.connect(self._on_job_finished)
+        self._retry_manager = retry_manager
+        if retry_manager is not None:
+            retry_manager.retryScheduled.connect(self._on_retry_scheduled)
+            retry_manager.jobRetried.connect(self._on_job_retried)
+            retry_manager.retryCancelled.connect(self._on_retry_cancelled)
+
+    def add_jobs(self, slot, jobs):
+        """登记分配到 slot 的任务并设置其环境变量；任务由调用方提交"""
+        for job in jobs:
+            job.env.update(slot.env)
+            job.slot = slot.index
+            job.device = slot.label
+            job.label = f"[{slot.label}] {job.label}"
+            self._pending.add(job.id)
+        self.jobs.extend(jobs)
+        self.stats[slot.index].total += len(jobs)
+
+    def close(self):
+        """所有文件都已提交，之后任务全部结束时完成"""
+        self._closed = True
+        self._check_finished()
+
+    @property
+    def status(self):
+        return "  ".join(stats.format() for stats in self.stats.values())
+
+    @property
+    def succeeded(self):
+        return all(not stats.failed and not stats.cancelled for stats in self.stats.values())
+
+    def summary(self):
+        """各槽位的完成数、失败数和累计运行时间"""
+        return [
+            f"{stats.format()}, 累计运行 {stats.busy_seconds:.1f}s"
+            for stats in self.stats.values()
+        ]
+
+    def _on_retry_scheduled(self, job, delay):
+        if job.id in self._pending:
+            self._retrying.add(job.id)
+
+    def _on_job_retried(self, job, retry):
+        if job.id in self._retrying:
+            self._retrying.discard(job.id)
+            self._pending.add(retry.id)
+            self.jobs.append(retry)
+
+    def _on_retry_cancelled(self, job):
+        if job.id in self._retrying:
+            self._retrying.discard(job.id)
+            self.stats[job.slot].cancelled += 1
+            self.progress.emit(self)
+            self._check_finished()
+
+    def _on_job_finished(self, job):
+        if job.id not in self._pending:
+            return
+        self._pending.discard(job.id)
+        stats = self.stats[job.slot]
+        stats.busy_seconds += job.elapsed
+        # 等待重试的任务由重试任务接替，暂不计入结果
+        if job.id not in self._retrying:
+            if job.succeeded:
+                stats.finished += 1
+            elif job.cancelled:
+                stats.cancelled += 1
+            else:
+                stats.failed += 1
+        self.progress.emit(self)
+        self._check_finished()
+
+    def _check_finished(self):
+        if not self._closed or self._pending or self._retrying:
+            return
+        self._runner.jobFinished.disconnect(self._on_job_finished)
+        if self._retry_manager is not None:
+            self._retry_manager.retryScheduled.disconnect(self._on_retry_scheduled)
+            self._retry_manager.jobRetried.disconnect(self._on_job_retried)
+            self._retry_manager.retryCancelled.disconnect(self._on_retry_cancelled)
+        # 之后又开始了其他多设备转换时保留其槽位限制
+        if self._runner.slot_limits is self._limits:
+            self._runner.slot_limits = {}
+        self.finished.emit(self)
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""
+多设备槽位
+为每个设备 (GPU 或模拟的 CPU 槽位) 生成独立的环境变量
+不依赖 Qt，命令行入口也可使用
+"""
+DEVICE_TYPES = {
+    "GPU (CUDA)": "cuda",
+    "CPU (模拟设备槽位)": "cpu",
+}
+
+
+class DeviceSlot:
+    """一个设备槽位：启动 marker 时使用的环境变量和同时运行的工作进程数"""
+
+    def __init__(self, index, device, device_id, workers):
+        self.index = index
+        self.device = device
+        self.device_id = device_id
+        self.workers = workers
+
+    @property
+    def label(self):
+        return f"{'GPU' if self.device == 'cuda' else 'CPU'} {self.device_id}"
+
+    @property
+    def env(self):
+        if self.device == "cuda":
+            return {"CUDA_VISIBLE_DEVICES": str(self.device_id), "TORCH_DEVICE": "cuda"}
+        # 隐藏所有 GPU，在没有 GPU 的机器上模拟多个设备槽位
+        return {"CUDA_VISIBLE_DEVICES": "", "TORCH_DEVICE": "cpu"}
+
+
+def parse_device_ids(text):
+    """解析 "0,2,3" 形式的设备编号列表，空字符串返回空列表"""
+    ids = []
+    for part in str(text or "").replace(";", ",").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if not part.isdigit():
+            raise ValueError(f"无效的设备编号: {part}")
+        if int(part) not in ids:
+            ids.append(int(part))
+    return ids
+
+
+def device_slots(config):
+    """
+    根据配置生成设备槽位列表
+    指定了设备编号时按编号生成，否则使用 0 ~ num_devices-1；无效的设备编号抛出 ValueError
+    """
+    device = DEVICE_TYPES.get(config["device_type"], "cuda")
+    ids = parse_device_ids(config["device_ids"]) or list(range(config["num_devices"]))
+    return [
+        DeviceSlot(index, device, device_id, max(1, config["num_workers"]))
+        for index, device_id in enumerate(ids)
+    ]
+
+
+def uses_device_slots(config):
+    """设置了多个设备、指定了设备编号或使用 CPU 时按设备槽位运行"""
+    return (
+        config["num_devices"] > 1
+        or bool(str(config["device_ids"]).strip())
+        or DEVICE_TYPES.get(config["device_type"]) == "cpu"
+    )
@@ -0,0 +1,249 @@
+# -*- coding: utf-8 -*-
+"""
+输入文件发现
+在后台线程中用 os.scandir 遍历 (可递归) 输入文件夹，按扩展名、大小和通配符过滤，
+结果分批发送给界面，不必等待整个目录列完；可选在线程池中以内存映射分块计算内容哈希、
+统计 PDF 页数 (供内存准入估算，避免在界面线程中读取 PDF)；单个文件的内容哈希由 HashThread 在后台计算
+"""
+# 标准库 imports
+import fnmatch
+import hashlib
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 第三方库 imports
+from PySide6.QtCore import QThread, Signal
+
+# 本地 imports
+from .pdf_pages import count_pdf_pages
+
+MB = 1024 * 1024
+HASH_CHUNK = 4 * MB
+# 小文件直接读取，内存映射的建立开销大于收益
+MMAP_THRESHOLD = 1 * MB
+# 统计 PDF 页数的线程数 (主要等待磁盘读取)
+PAGE_COUNT_WORKERS = min(16, (os.cpu_count() or 1) * 2)
+
+
+class FileFilter:
+    """
+    文件过滤条件
+    extensions 为允许的扩展名 (小写，含点)；patterns 为文件名通配符，满足其一即可；
+    min_size / max_size 为字节数，0 表示不限
+    """
+
+    def __init__(self, extensions=None, patterns=(), min_size=0, max_size=0):
+        self.extensions = set(extensions) if extensions else None
+        self.patterns = [pattern.lower() for pattern in patterns if pattern]
+        self.min_size = min_size
+        self.max_size = max_size
+
+    @classmethod
+    def from_config(cls, config, extensions=None):
+        patterns = config["batch_patterns"].replace(",", ";").split(";")
+        return cls(
+            extensions,
+            [pattern.strip() for pattern in patterns],
+            config["batch_min_size"] * 1024,
+            config["batch_max_size"] * MB,
+        )
+
+    def match_name(self, name):
+        lower = name.lower()
+        if self.extensions is not None and os.path.splitext(lower)[1] not in self.extensions:
+            return False
+        return not self.patterns or any(
+            fnmatch.fnmatchcase(lower, pattern) for pattern in self.patterns
+        )
+
+    def match_size(self, size):
+        if size < self.min_size:
+            return False
+        return not self.max_size or size <= self.max_size
+
+
+def iter_files(root, file_filter=None, recursive=False):
+    """
+    逐个产出符合条件的文件 [(路径, os.stat 结果)]
+    先按文件名过滤再 stat，网络共享盘上可省去大部分 stat 调用；无法访问的子目录跳过
+    """
+    file_filter = file_filter or FileFilter()
+    stack = [root]
+    while stack:
+        folder = stack.pop()
+        try:
+            with os.scandir(folder) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if recursive:
+                                stack.append(entry.path)
+                            continue
+                        if not entry.is_file() or not file_filter.match_name(entry.name):
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    if file_filter.match_size(st.st_size):
+                        yield entry.path, st
+        except OSError:
+            if folder == root:
+                raise
+            continue
+
+
+def hash_file(path, chunk_size=HASH_CHUNK):
+    """
+    计算文件内容的 SHA-256
+    大文件以内存映射分块送入 hashlib (计算时释放 GIL，多线程可并行)
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < MMAP_THRESHOLD:
+            digest.update(f.read())
+            return digest.hexdigest()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, size, chunk_size):
+                    digest.update(view[offset : offset + chunk_size])
+            finally:
+                view.release()
+    return digest.hexdigest()
+
+
+def _hash_or_none(path):
+    try:
+        return hash_file(path)
+    except (OSError, ValueError):
+        return None
+
+
+def _pages_or_none(path, st, page_counts):
+    """PDF 页数，先查页数缓存 (planner.PageCountCache)；非 PDF 或无法读取时返回 None"""
+    if not path.lower().endswith(".pdf"):
+        return None
+    pages = page_counts.get(path, st)
+    if pages is None:
+        try:
+            pages = count_pdf_pages(path) or None
+        except (OSError, ValueError):
+            return None
+        if pages is not None:
+            page_counts.put(path, st, pages)
+    return pages
+
+
+def _inspect(path, st, hash_content, page_counts):
+    digest = _hash_or_none(path) if hash_content else None
+    pages = _pages_or_none(path, st, page_counts) if page_counts is not None else None
+    return digest, pages
+
+
+class FileDiscovery(QThread):
+    """
+    后台文件发现线程
+    每凑满 BATCH_SIZE 个文件或每隔 BATCH_INTERVAL 秒发送一批 [(路径, os.stat 结果, 内容哈希, 页数)]，
+    未要求计算哈希时哈希为 None，未给出页数缓存时页数为 None
+    """
+
+    BATCH_SIZE = 500
+    BATCH_INTERVAL = 0.2  # 秒
+
+    filesFound = Signal(list)
+    failed = Signal(str)
+    completed = Signal(int)  # 文件总数
+
+    def __init__(self, root, file_filter=None, recursive=False, hash_workers=0,
+                 page_counts=None, parent=None):
+        super().__init__(parent)
+        self.root = root
+        self.file_filter = file_filter
+        self.recursive = recursive
+        self.hash_workers = hash_workers  # 0 表示不计算内容哈希
+        self.page_counts = page_counts  # 页数缓存，给出时统计 PDF 页数
+        self.count = 0
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        workers = self.hash_workers or (PAGE_COUNT_WORKERS if self.page_counts is not None else 0)
+        pool = ThreadPoolExecutor(workers) if workers else None
+        batch = []
+        pending = None  # 已提交哈希计算、尚未发送的上一批
+        last_emit = time.monotonic()
+        try:
+            for path, st in iter_files(self.root, self.file_filter, self.recursive):
+                if self._cancelled:
+                    break
+                batch.append((path, st))
+                now = time.monotonic()
+                if len(batch) >= self.BATCH_SIZE or now - last_emit >= self.BATCH_INTERVAL:
+                    # 本批哈希和页数在线程池中计算时继续扫描，下次发送前再等待结果
+                    self._emit(pending)
+                    pending = self._submit(batch, pool)
+                    if pool is None:
+                        self._emit(pending)
+                        pending = None
+                    batch = []
+                    last_emit = now
+            if not self._cancelled:
+                self._emit(pending)
+                self._emit(self._submit(batch, pool))
+        except OSError as e:
+            self.failed.emit(str(e))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+            if self.page_counts is not None:
+                self.page_counts.save()
+        self.completed.emit(self.count)
+
+    def _submit(self, batch, pool):
+        if pool is None:
+            return batch, [(None, None)] * len(batch)
+        hash_content = bool(self.hash_workers)
+        return batch, [
+            pool.submit(_inspect, path, st, hash_content, self.page_counts) for path, st in batch
+        ]
+
+    def _emit(self, pending):
+        if not pending or not pending[0]:
+            return
+        batch, results = pending
+        results = [r.result() if not isinstance(r, tuple) else r for r in results]
+        self.count += len(batch)
+        self.filesFound.emit(
+            [(path, st, digest, pages) for (path, st), (digest, pages) in zip(batch, results)]
+        )
+
+
+class HashThread(QThread):
+    """
+    后台计算若干文件的内容哈希 (单个文件和分片转换提交前使用，结果缓存查询时不在界面线程中读取文件)
+    完成后 results 为 [(路径, os.stat 结果, 内容哈希)]，无法读取的文件哈希为 None
+    """
+
+    def __init__(self, paths, parent=None):
+        super().__init__(parent)
+        self.paths = list(paths)
+        self.results = []
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        for path in self.paths:
+            if self.cancelled:
+                return
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            self.results.append((path, st, _hash_or_none(path)))
@@ -0,0 +1,612 @@
+# -*- coding: utf-8 -*-
+# 标准库 imports
+import codecs
+import locale
+import os
+import signal
+import time
+from collections import deque
+
+# 第三方库 imports
+from PySide6.QtCore import QObject, QProcess, QProcessEnvironment, QTimer, Signal
+
+# 本地 imports
+from .run_report import ProcessSampler, process_tree
+from .utils import LineSplitter
+
+# 任务优先级，数值越大越先启动
+PRIORITY_LEVELS = {
+    "低": -1,
+    "普通": 0,
+    "高": 1,
+    "紧急": 2,
+}
+
+
+class Job:
+    """
+    单个转换任务
+    记录命令、运行状态、退出码及耗时
+    """
+
+    _next_id = 1
+    TAIL_LINES = 20  # 保留最后若干行输出，用于判断失败原因
+
+    def __init__(self, argv, env=None, label="", input_path="", output_dir=""):
+        self.id = Job._next_id
+        Job._next_id += 1
+
+        self.argv = list(argv)
+        self.launch_argv = self.argv  # 实际启动的参数，LLM 请求预算会改写服务地址和并发数
+        self.env = dict(env or {})
+        self.label = label or (self.argv[0] if self.argv else "")
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.input_signature = None  # [大小, 修改时间(ns)]，用于增量清单
+        self.options_fingerprint = ""
+        self.config = {}  # 提交时的配置快照，用于运行报告
+        self.sampler = None
+        self.pages = None  # 输入 PDF 的页数，批处理时由文件发现线程统计，未知为 None
+        self.memory_estimate = None  # 预计峰值内存 (MB)，由准入控制器填写
+        self.wait_reason = ""  # 排队等待的原因
+        self.persistent = True  # 是否记录到持久化任务队列 (分片任务由分片转换统一管理)
+        self.store_id = None  # 持久化任务队列中的记录 ID
+        self.timeout = 0  # 超时时间 (秒)，0 表示不限
+        self.timed_out = False
+        self.failure = ""  # 失败原因说明，由重试管理器填写
+        self.tail = deque(maxlen=self.TAIL_LINES)
+        self.worker = None  # 在预热进程中运行时为对应的工作进程
+        self.warm_stats = None  # 预热进程的模型加载耗时和本次转换耗时
+        self.cache_hit = False  # 输出直接取自结果缓存
+        self.output_snapshot = None  # 启动前输出目录中已有的文件，结果缓存只保存本次产生的文件
+        self.llm_stats = None  # 经过 LLM 请求预算代理时的请求统计
+        self.slot = None  # 多设备运行时所属的设备槽位编号
+        self.device = ""  # 设备名称 (如 GPU 0)，用于显示和运行报告
+        self.priority = 0  # 见 PRIORITY_LEVELS
+        self.queue_group = None  # 排队分组，提交时分配；同一批处理的任务共用一个分组
+        self.size = 0  # 输入文件大小 (字节)，同一分组内大文件先启动
+        self.queue_rank = None  # 手动调整排队顺序后取代 (排队分组, -文件大小) 的排序位置
+        self.paused = False
+        self.cancelled = False
+        self.paused_seconds = 0.0  # 累计暂停时间，不计入耗时
+        self._pause_clock = None
+
+        self.state = "pending"  # pending / running / finished / failed / cancelled
+        self.exit_code = None
+        self.crashed = False
+        self.error = ""
+        self.start_time = None  # 墙钟时间 (time.time)
+        self._start_clock = None
+        self._end_clock = None
+
+        self.process = None
+        self._decoder = None
+        self._splitter = LineSplitter()
+
+    @property
+    def elapsed(self):
+        """运行耗时 (秒)，不含暂停时间，未启动时为 0"""
+        if self._start_clock is None:
+            return 0.0
+        end = self._end_clock if self._end_clock is not None else time.monotonic()
+        paused = self.paused_seconds
+        if self._pause_clock is not None:
+            paused += end - self._pause_clock
+        return end - self._start_clock - paused
+
+    @property
+    def succeeded(self):
+        return self.state == "finished"
+
+    @property
+    def queue_position(self):
+        """同一优先级内的排序位置：手动调整过顺序时为 queue_rank，否则为 (排队分组, -文件大小)"""
+        if self.queue_rank is not None:
+            return self.queue_rank
+        return self.queue_group, -self.size
+
+
+class JobRunner(QObject):
+    """
+    基于 QProcess 的任务执行器
+    以非阻塞方式启动子进程，逐行转发输出，并记录退出状态和耗时
+    排队的任务按提交顺序启动 (同一批处理分组内大文件优先)，同时运行的任务数不超过 max_concurrent
+    运行期间定时采样子进程树的内存和 CPU 占用，超过 job.timeout 的任务被强制结束
+    设置 admission 准入控制器后，内存不足时暂停启动新任务并定时重新检查
+    设置 warm_pool 预热进程池后，池接管的任务在常驻工作进程中运行，不再单独启动子进程
+    设置 result_cache 结果缓存后，命中缓存的任务直接输出缓存结果，成功的任务输出写入缓存
+    slot_limits 限制每个设备槽位同时运行的任务数，槽位已满时先启动其后其他槽位的任务
+    设置 llm_proxy LLM 请求预算后，启用 LLM 的任务按预算改写参数启动，结束时记录其 LLM 请求统计
+    队列按优先级排列，高优先级的任务排在所有低优先级的排队任务之前 (不影响已在运行的任务)；
+    运行中的任务可以暂停/继续 (SIGSTOP/SIGCONT) 或取消 (先 SIGTERM，超时后 SIGKILL 整个进程树)
+    已结束的任务只保留最近 MAX_FINISHED 个，更早的 (或 clear_finished 清除的) 从 jobs 中移除并发送 jobsForgotten
+    """
+
+    SAMPLE_INTERVAL = 500  # 毫秒
+    ADMISSION_INTERVAL = 1000  # 毫秒
+    CANCEL_GRACE = 5000  # 毫秒，取消时等待进程自行退出的时间
+    MAX_FINISHED = 1000  # 保留的已结束任务数
+    TRIM_BATCH = 200  # 超出 MAX_FINISHED 这么多个后一次移除，界面不必每结束一个任务就重排表格
+
+    jobQueued = Signal(object)
+    jobStarted = Signal(object)
+    jobFinished = Signal(object)
+    jobOutput = Signal(object, str)
+    jobProgress = Signal(object, str)
+    jobWaiting = Signal(object)  # 队首任务因准入控制等待
+    jobChanged = Signal(object)  # 暂停、继续、优先级或排队顺序变化
+    jobsForgotten = Signal(list)  # 移除的已结束任务
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._jobs = {}  # 任务 ID -> 任务 (按提交顺序)，已结束的任务只保留最近 MAX_FINISHED 个
+        self._finished = deque()  # 已结束的任务，按结束顺序
+        self.queue = deque()  # 排队中的任务，按启动顺序
+        self._queued = set()  # 排队中的任务 ID
+        self._running = {}  # 运行中的任务 ID -> 任务 (按启动顺序)
+        self._queued_slots = {}  # 设备槽位编号 -> 排队中的任务数
+        self.max_concurrent = 1
+        self.admission = None
+        self.warm_pool = None
+        self.result_cache = None
+        self.llm_proxy = None
+        self.slot_limits = {}  # 设备槽位编号 -> 同时运行的任务数上限
+        self._last_group = 0
+        self._encoding = locale.getpreferredencoding(False) or "utf-8"
+
+        self._sample_timer = QTimer(self)
+        self._sample_timer.setInterval(self.SAMPLE_INTERVAL)
+        self._sample_timer.timeout.connect(self._sample)
+
+        self._admission_timer = QTimer(self)
+        self._admission_timer.setInterval(self.ADMISSION_INTERVAL)
+        self._admission_timer.timeout.connect(self._dispatch)
+
+    @property
+    def jobs(self):
+        return list(self._jobs.values())
+
+    def running_jobs(self):
+        return list(self._running.values())
+
+    def is_queued(self, job):
+        return job.id in self._queued
+
+    def new_queue_group(self):
+        """新的排队分组，晚于之前所有分组；批处理的各批文件使用同一分组，整体按大小排序"""
+        self._last_group += 1
+        return self._last_group
+
+    def submit(self, job):
+        """提交任务，有空闲槽位时立即启动"""
+        self._jobs[job.id] = job
+        if job.queue_group is None:
+            job.queue_group = self.new_queue_group()
+        self._enqueue(job)
+        self.jobQueued.emit(job)
+        self._dispatch()
+        return job
+
+    @staticmethod
+    def _queue_key(job):
+        return (-job.priority,) + tuple(job.queue_position)
+
+    def _enqueue(self, job):
+        """
+        按 (优先级, 排队分组, 文件大小) 二分查找插入位置：插到同优先级的较早分组之后、低优先级任务之前，
+        同一分组内插到较小的文件之前，其余相同时按提交顺序
+        """
+        key = self._queue_key(job)
+        low, high = 0, len(self.queue)
+        while low < high:
+            middle = (low + high) // 2
+            if self._queue_key(self.queue[middle]) <= key:
+                low = middle + 1
+            else:
+                high = middle
+        self.queue.insert(low, job)
+        self._queued.add(job.id)
+        self._queued_slots[job.slot] = self._queued_slots.get(job.slot, 0) + 1
+
+    def _dequeue(self, job):
+        """移出排队中的任务 (队首任务 O(1))"""
+        if self.queue and self.queue[0] is job:
+            self.queue.popleft()
+        else:
+            self.queue.remove(job)
+        self._queued.discard(job.id)
+        self._queued_slots[job.slot] -= 1
+
+    # ---- 排队顺序 ----
+
+    def set_priority(self, job, priority):
+        job.priority = priority
+        job.queue_rank = None
+        if self.is_queued(job):
+            self._dequeue(job)
+            self._enqueue(job)
+        self.jobChanged.emit(job)
+        self._dispatch()
+
+    def move_job(self, job, index):
+        """
+        将排队中的任务移到队列的 index 位置
+        移过不同优先级的任务时改用相邻任务的优先级，并取与相邻任务相同的排序位置，
+        队列仍按 _queue_key 有序，之后提交的任务照常二分插入
+        """
+        if not self.is_queued(job):
+            return
+        self.queue.remove(job)
+        index = max(0, min(index, len(self.queue)))
+        self.queue.insert(index, job)
+        after = self.queue[index + 1] if index + 1 < len(self.queue) else None
+        before = self.queue[index - 1] if index > 0 else None
+        if after is not None:
+            job.priority = max(job.priority, after.priority)
+        if before is not None:
+            job.priority = min(job.priority, before.priority)
+        for neighbour in (after, before):
+            if neighbour is not None and neighbour.priority == job.priority:
+                job.queue_rank = neighbour.queue_position
+                break
+        self.jobChanged.emit(job)
+        self._dispatch()
+
+    # ---- 取消与暂停 ----
+
+    def _job_pid(self, job):
+        if job.worker is not None:
+            return job.worker.pid
+        if job.process is not None:
+            return job.process.processId()
+        return 0
+
+    def _signal_tree(self, job, sig):
+        pid = self._job_pid(job)
+        if not pid:
+            return
+        for target in process_tree(pid):
+            try:
+                os.kill(target, sig)
+            except OSError:
+                continue
+
+    @property
+    def can_pause(self):
+        return hasattr(signal, "SIGSTOP")
+
+    def pause(self, job):
+        """暂停运行中的任务 (向整个进程树发送 SIGSTOP)，暂停时间不计入耗时和超时"""
+        if job.state != "running" or job.paused or not self.can_pause or not self._job_pid(job):
+            return False
+        self._signal_tree(job, signal.SIGSTOP)
+        job.paused = True
+        job._pause_clock = time.monotonic()
+        self.jobChanged.emit(job)
+        return True
+
+    def resume(self, job):
+        if not job.paused:
+            return False
+        self._signal_tree(job, signal.SIGCONT)
+        self._unpause(job)
+        self.jobChanged.emit(job)
+        return True
+
+    def _unpause(self, job):
+        if job._pause_clock is not None:
+            job.paused_seconds += time.monotonic() - job._pause_clock
+        job.paused = False
+        job._pause_clock = None
+
+    def cancel(self, job):
+        """
+        取消任务：排队中的任务直接移出队列；运行中的任务先发送 SIGTERM，
+        CANCEL_GRACE 毫秒后仍未退出时强制结束整个进程树
+        """
+        if job.state == "pending":
+            if self.is_queued(job):
+                self._dequeue(job)
+            job.cancelled = True
+            job.state = "cancelled"
+            job._start_clock = job._end_clock = time.monotonic()
+            job.start_time = time.time()
+            self._emit_finished(job)
+            self._dispatch()
+            return
+        if job.state != "running" or job.cancelled:
+            return
+        job.cancelled = True
+        if job.paused:
+            # 停止的进程要先继续运行才能处理 SIGTERM
+            self._signal_tree(job, signal.SIGCONT)
+            self._unpause(job)
+        if hasattr(signal, "SIGKILL"):
+            self._signal_tree(job, signal.SIGTERM)
+        elif job.process is not None:
+            job.process.terminate()
+        self.jobChanged.emit(job)
+        QTimer.singleShot(
+            self.CANCEL_GRACE, lambda: self._kill(job) if job.state == "running" else None
+        )
+
+    def cancel_all(self):
+        """取消所有排队中和运行中的任务"""
+        pending = list(self.queue)
+        self._clear_queue()
+        for job in pending:
+            self.cancel(job)
+        for job in self.running_jobs():
+            self.cancel(job)
+
+    def _clear_queue(self):
+        self.queue.clear()
+        self._queued.clear()
+        self._queued_slots.clear()
+
+    def set_max_concurrent(self, count):
+        self.max_concurrent = max(1, int(count))
+        self._dispatch()
+
+    def _dispatch(self):
+        """在并发上限和内存预算内按顺序启动排队中的任务"""
+        while self.queue:
+            running = self.running_jobs()
+            if len(running) >= self.max_concurrent:
+                break
+            job = self._next_job(running)
+            if job is None:
+                break
+            # 预热进程中的任务不新增模型内存，不受准入控制
+            if self.admission is not None and not self._is_warm(job):
+                admitted, reason = self.admission.admit(job, running)
+                if not admitted:
+                    if job.wait_reason != reason:
+                        job.wait_reason = reason
+                        self.jobWaiting.emit(job)
+                    self._admission_timer.start()
+                    return
+            job.wait_reason = ""
+            self._dequeue(job)
+            self._start(job)
+        self._admission_timer.stop()
+
+    def _next_job(self, running):
+        """队列中第一个所属槽位未满的任务"""
+        if not self.slot_limits:
+            return self.queue[0]
+        busy = {}
+        for job in running:
+            busy[job.slot] = busy.get(job.slot, 0) + 1
+        # 有空位的槽位都没有排队中的任务时不必遍历队列
+        if not any(
+            count and (slot not in self.slot_limits or busy.get(slot, 0) < self.slot_limits[slot])
+            for slot, count in self._queued_slots.items()
+        ):
+            return None
+        for job in self.queue:
+            limit = self.slot_limits.get(job.slot)
+            if limit is None or busy.get(job.slot, 0) < limit:
+                return job
+        return None
+
+    def set_warm_pool(self, pool):
+        self.warm_pool = pool
+        pool.jobOutput.connect(self._feed)
+        pool.jobDone.connect(self._on_warm_done)
+
+    def _is_warm(self, job):
+        return self.warm_pool is not None and self.warm_pool.accepts(job)
+
+    def _start(self, job):
+        if not job.argv:
+            self._fail(job, "命令为空")
+            return
+        if self.result_cache is not None:
+            if self.result_cache.materialize(job):
+                self._start_cached(job)
+                return
+            self.result_cache.snapshot_outputs(job)
+        if self.llm_proxy is not None:
+            job.launch_argv = self.llm_proxy.prepare(job)
+        if self._is_warm(job):
+            self._start_warm(job)
+            return
+
+        process = QProcess(self)
+        process.setProcessChannelMode(QProcess.MergedChannels)
+
+        env = QProcessEnvironment.systemEnvironment()
+        # 让子进程中的 Python 立即刷新输出，便于实时显示
+        env.insert("PYTHONUNBUFFERED", "1")
+        for name, value in job.env.items():
+            env.insert(name, str(value))
+        process.setProcessEnvironment(env)
+
+        process.started.connect(lambda: self._on_started(job))
+        process.readyReadStandardOutput.connect(lambda: self._on_ready_read(job))
+        process.finished.connect(
+            lambda code, status: self._on_finished(job, code, status)
+        )
+        process.errorOccurred.connect(lambda error: self._on_error(job, error))
+
+        job.process = process
+        job._decoder = codecs.getincrementaldecoder(self._encoding)(errors="replace")
+        self._set_running(job)
+        job.start_time = time.time()
+        job._start_clock = time.monotonic()
+        self.jobStarted.emit(job)
+
+        process.start(job.launch_argv[0], job.launch_argv[1:])
+
+    def _set_running(self, job):
+        job.state = "running"
+        self._running[job.id] = job
+
+    def _start_warm(self, job):
+        job._decoder = None
+        self._set_running(job)
+        job.start_time = time.time()
+        job._start_clock = time.monotonic()
+        self.jobStarted.emit(job)
+
+        job.sampler = ProcessSampler(self.warm_pool.run(job))
+        # 工作进程之前的 CPU 时间 (如模型加载) 不计入本任务
+        job.sampler.sample()
+        job.sampler.cpu_seconds = 0.0
+        if not self._sample_timer.isActive():
+            self._sample_timer.start()
+
+    def _start_cached(self, job):
+        job.cache_hit = True
+        self._set_running(job)
+        job.start_time = time.time()
+        job._start_clock = time.monotonic()
+        self.jobStarted.emit(job)
+        # 推迟到下一轮事件循环完成，连续命中时不会在 _dispatch 中递归
+        QTimer.singleShot(0, lambda: self._complete(job, 0, False))
+
+    def _on_warm_done(self, job, exit_code, error):
+        if job.state != "running":
+            return
+        if error:
+            self._fail(job, error)
+            return
+        self._complete(job, exit_code, job.crashed)
+
+    def _on_started(self, job):
+        job.sampler = ProcessSampler(job.process.processId())
+        job.sampler.sample()
+        if not self._sample_timer.isActive():
+            self._sample_timer.start()
+
+    def _sample(self):
+        running = self.running_jobs()
+        if not running:
+            self._sample_timer.stop()
+        for job in running:
+            if job.paused:
+                continue
+            if job.sampler is not None:
+                job.sampler.sample()
+            if job.timeout and job.elapsed > job.timeout and not job.timed_out:
+                job.timed_out = True
+                self._kill(job)
+
+    def _kill(self, job):
+        """强制结束任务的整个进程树 (marker 的工作进程不会随父进程退出)"""
+        if job.worker is not None:
+            self.warm_pool.kill(job)
+            return
+        process = job.process
+        if process is None:
+            return
+        pid = process.processId()
+        if pid and hasattr(signal, "SIGKILL"):
+            for child in process_tree(pid)[1:]:
+                try:
+                    os.kill(child, signal.SIGKILL)
+                except OSError:
+                    continue
+        process.kill()
+
+    def _on_ready_read(self, job):
+        data = bytes(job.process.readAllStandardOutput())
+        self._feed(job, job._decoder.decode(data))
+
+    def _feed(self, job, text):
+        """按行转发输出，进度条覆盖写作为临时行单独发送"""
+        self._emit_lines(job, job._splitter.feed(text))
+
+    def _emit_lines(self, job, events):
+        for line, final in events:
+            if final:
+                job.tail.append(line)
+                self.jobOutput.emit(job, line)
+            else:
+                self.jobProgress.emit(job, line)
+
+    def _flush(self, job):
+        if job._decoder is not None:
+            self._feed(job, job._decoder.decode(b"", final=True))
+        self._emit_lines(job, job._splitter.flush())
+
+    def _on_finished(self, job, exit_code, exit_status):
+        if job.state != "running":
+            return
+        self._on_ready_read(job)
+        self._complete(job, exit_code, exit_status == QProcess.CrashExit)
+
+    def _complete(self, job, exit_code, crashed):
+        self._flush(job)
+        if job.paused:
+            self._unpause(job)
+        job._end_clock = time.monotonic()
+        job.exit_code = exit_code
+        job.crashed = crashed
+        if job.cancelled:
+            job.state = "cancelled"
+        else:
+            job.state = "finished" if exit_code == 0 and not job.crashed else "failed"
+        if job.succeeded and not job.cache_hit and self.result_cache is not None:
+            self.result_cache.store(job)
+        self._cleanup(job)
+        self._emit_finished(job)
+        self._dispatch()
+
+    def _on_error(self, job, error):
+        # 仅处理启动失败，其余错误会随 finished 信号一并处理
+        if error == QProcess.FailedToStart and job.state == "running":
+            self._fail(job, job.process.errorString())
+
+    def _fail(self, job, message):
+        if job._start_clock is None:
+            job._start_clock = time.monotonic()
+            job.start_time = time.time()
+        job._end_clock = time.monotonic()
+        job.state = "failed"
+        job.error = message
+        self._cleanup(job)
+        self._emit_finished(job)
+        self._dispatch()
+
+    def _emit_finished(self, job):
+        self._finished.append(job)
+        self.jobFinished.emit(job)
+        if len(self._finished) > self.MAX_FINISHED + self.TRIM_BATCH:
+            excess = len(self._finished) - self.MAX_FINISHED
+            self._forget([self._finished.popleft() for _ in range(excess)])
+
+    def clear_finished(self):
+        """移除所有已结束的任务"""
+        finished = list(self._finished)
+        self._finished.clear()
+        self._forget(finished)
+
+    def _forget(self, jobs):
+        for job in jobs:
+            self._jobs.pop(job.id, None)
+        if jobs:
+            self.jobsForgotten.emit(jobs)
+
+    def _cleanup(self, job):
+        self._running.pop(job.id, None)
+        if self.llm_proxy is not None:
+            job.llm_stats = self.llm_proxy.release(job)
+        if job.process is not None:
+            job.process.deleteLater()
+            job.process = None
+
+    def shutdown(self):
+        """清空队列并终止所有运行中的任务 (窗口关闭时调用)"""
+        self._clear_queue()
+        self._admission_timer.stop()
+        for job in self.running_jobs():
+            process = job.process
+            self._kill(job)
+            if process is not None:
+                process.waitForFinished(3000)
+        if self.warm_pool is not None:
+            self.warm_pool.shutdown()
+        if self.llm_proxy is not None:
+            self.llm_proxy.shutdown()
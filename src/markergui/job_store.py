@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+持久化任务队列
+将提交的每个任务 (完整命令、状态变化、开始/结束时间、退出码) 记录到 SQLite，
+程序关闭或崩溃后重新启动时可以恢复未完成的任务、重新运行失败的任务
+"""
+# 标准库 imports
+import json
+import os
+import sqlite3
+import time
+
+JOB_STORE_PATH = os.path.join("config", "jobs.sqlite3")
+
+# 除 Job 的状态外，已处理的历史记录标记为 resumed (已重新提交)、retried (已自动重试)
+# 或 dismissed (用户选择忽略)
+UNFINISHED_STATES = ("pending", "running")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    label TEXT NOT NULL,
+    argv TEXT NOT NULL,
+    env TEXT NOT NULL,
+    input_path TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    config TEXT NOT NULL,
+    input_signature TEXT,
+    options_fingerprint TEXT NOT NULL,
+    state TEXT NOT NULL,
+    submitted_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    exit_code INTEGER,
+    error TEXT NOT NULL DEFAULT '',
+    priority INTEGER NOT NULL DEFAULT 0,
+    timeout REAL NOT NULL DEFAULT 0,
+    retry TEXT,
+    queue_position TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state);
+"""
+
+# 较早版本创建的记录表没有这些列，打开时补上
+_ADDED_COLUMNS = (
+    ("priority", "INTEGER NOT NULL DEFAULT 0"),
+    ("timeout", "REAL NOT NULL DEFAULT 0"),
+    ("retry", "TEXT"),
+    ("queue_position", "TEXT"),
+)
+
+
+class StoredJob:
+    """数据库中的一条任务记录"""
+
+    def __init__(self, row):
+        self.id = row["id"]
+        self.label = row["label"]
+        self.argv = json.loads(row["argv"])
+        self.env = json.loads(row["env"])
+        self.input_path = row["input_path"]
+        self.output_dir = row["output_dir"]
+        self.config = json.loads(row["config"])
+        self.input_signature = json.loads(row["input_signature"] or "null")
+        self.options_fingerprint = row["options_fingerprint"]
+        self.state = row["state"]
+        self.exit_code = row["exit_code"]
+        self.priority = row["priority"]
+        self.timeout = row["timeout"]
+        # [重试策略 (RetryPolicy.to_record), 本次为第几次运行]，未按策略重试的任务为 None
+        self.retry = json.loads(row["retry"] or "null")
+        # 同一优先级内的排队顺序 (Job.queue_position)，较早版本的记录为 None
+        self.queue_position = json.loads(row["queue_position"] or "null")
+
+
+class JobStore:
+    """
+    SQLite 任务记录
+    写入不立即提交，由调用方合并提交 (commit)，批量提交上万个任务时只产生一次磁盘同步；
+    按状态建立索引，历史记录达到十万条以上时查询未完成任务仍然很快
+    """
+
+    def __init__(self, path=JOB_STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.row_factory = sqlite3.Row
+        # WAL 模式下写入不阻塞读取，synchronous=NORMAL 只在检查点同步磁盘
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        for name, definition in _ADDED_COLUMNS:
+            if name not in columns:
+                self.conn.execute(f"ALTER TABLE jobs ADD COLUMN {name} {definition}")
+        self.conn.commit()
+
+    def add(self, job, retry=None):
+        """
+        记录新提交的任务，数据库 ID 保存在 job.store_id
+        retry 为 [重试策略记录, 本次为第几次运行]，恢复任务时据此继续按策略重试
+        """
+        cursor = self.conn.execute(
+            "INSERT INTO jobs (label, argv, env, input_path, output_dir, config,"
+            " input_signature, options_fingerprint, state, submitted_at, priority, timeout, retry,"
+            " queue_position)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                job.label,
+                json.dumps(job.argv, ensure_ascii=False),
+                json.dumps(job.env, ensure_ascii=False),
+                job.input_path,
+                job.output_dir,
+                json.dumps(job.config, ensure_ascii=False),
+                json.dumps(job.input_signature),
+                job.options_fingerprint,
+                job.state,
+                time.time(),
+                job.priority,
+                job.timeout,
+                json.dumps(retry, ensure_ascii=False) if retry is not None else None,
+                json.dumps(list(job.queue_position)),
+            ),
+        )
+        job.store_id = cursor.lastrowid
+
+    def update(self, job):
+        """记录任务状态、优先级和排队顺序的变化"""
+        if job.store_id is None:
+            return
+        finished_at = time.time() if job.state in ("finished", "failed", "cancelled") else None
+        self.conn.execute(
+            "UPDATE jobs SET state = ?, started_at = ?, finished_at = ?,"
+            " exit_code = ?, error = ?, priority = ?, queue_position = ? WHERE id = ?",
+            (
+                job.state,
+                job.start_time,
+                finished_at,
+                job.exit_code,
+                job.error,
+                job.priority,
+                json.dumps(list(job.queue_position)),
+                job.store_id,
+            ),
+        )
+
+    def commit(self):
+        self.conn.commit()
+
+    def _select(self, states):
+        placeholders = ", ".join("?" for _ in states)
+        rows = self.conn.execute(
+            f"SELECT * FROM jobs WHERE state IN ({placeholders}) ORDER BY id", states
+        )
+        return [StoredJob(row) for row in rows]
+
+    def unfinished(self):
+        """上次运行时排队中或运行中 (被中断) 的任务"""
+        return self._select(UNFINISHED_STATES)
+
+    def failed(self):
+        """失败且尚未处理的任务"""
+        return self._select(("failed",))
+
+    def mark(self, ids, state):
+        """将历史记录标记为已处理 (resumed / dismissed / retried)，之后不再提示"""
+        self.conn.executemany(
+            "UPDATE jobs SET state = ? WHERE id = ?", [(state, id) for id in ids]
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
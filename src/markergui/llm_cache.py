@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 响应缓存
+以请求内容 (模型、提示词/消息、图片及其他请求参数) 的哈希为键，将 LLM 服务的成功响应保存到磁盘，
+由 LLM 代理 (llm_proxy.py) 在转发前查询：再次以相同的请求调用时直接返回保存的响应
+"""
+# 标准库 imports
+import hashlib
+import json
+import os
+import threading
+import time
+
+LLM_CACHE_DIR = os.path.join("cache", "llm")
+MB = 1024 * 1024
+
+# 保存的响应头 (其余响应头与内容无关)
+_KEPT_HEADERS = {"content-type", "content-encoding"}
+
+
+def request_key(path, body):
+    """
+    缓存键：请求路径 (如 /chat/completions、/api/generate) 和请求体的哈希，与服务地址和 API 密钥无关
+    JSON 请求体按键排序后计算，流式请求返回 None (不缓存)
+    """
+    try:
+        data = json.loads(body)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return hashlib.sha256(path.encode("utf-8") + b"\0" + body).hexdigest()
+    if data.get("stream"):
+        return None
+    material = json.dumps([path, data], sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    磁盘 LLM 响应缓存 (可在代理的多个线程中同时使用)
+    文件结构: <root>/<键前两位>/<键>.resp，第一行为响应头 JSON，其后为响应体；
+    文件修改时间作为最近使用时间，超过容量上限时淘汰最久未使用的条目
+    """
+
+    def __init__(self, root=LLM_CACHE_DIR, max_bytes=1024 * MB):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._index = None  # 键 -> [最近使用时间, 字节数]
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + ".resp")
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        self._index = {}
+        if not os.path.isdir(self.root):
+            return
+        for bucket in os.scandir(self.root):
+            if not bucket.is_dir() or len(bucket.name) != 2:
+                continue
+            for entry in os.scandir(bucket.path):
+                if not entry.name.endswith(".resp"):
+                    continue
+                try:
+                    st = entry.stat()
+                except OSError:
+                    continue
+                self._index[entry.name[: -len(".resp")]] = [st.st_mtime, st.st_size]
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            self._load_index()
+            return sum(size for _, size in self._index.values())
+
+    def _evict(self):
+        total = sum(size for _, size in self._index.values())
+        for key, (_, size) in sorted(self._index.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            del self._index[key]
+            total -= size
+
+    def get(self, key):
+        """命中时返回 (响应头, 响应体)，否则返回 None"""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                headers = json.loads(f.readline())
+                body = f.read()
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self._load_index()
+            self._index[key] = [time.time(), os.path.getsize(path)]
+        return [tuple(header) for header in headers], body
+
+    def put(self, key, headers, body):
+        """保存成功的响应；写入失败时清理临时文件后抛出 OSError (由调用方在界面线程中提示)"""
+        kept = [[name, value] for name, value in headers if name.lower() in _KEPT_HEADERS]
+        data = json.dumps(kept).encode("utf-8") + b"\n" + body
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            raise
+        with self._lock:
+            self._load_index()
+            self._index[key] = [time.time(), len(data)]
+            self._evict()
+
+    @property
+    def status(self):
+        """命中统计与占用空间，显示在任务队列页"""
+        lookups = self.hits + self.misses
+        ratio = f" ({self.hits / lookups:.0%})" if lookups else ""
+        return (
+            f"命中 {self.hits} / 查询 {lookups}{ratio}, "
+            f"占用 {self.total_bytes / MB:.0f} / {self.max_bytes / MB:.0f} MB"
+        )
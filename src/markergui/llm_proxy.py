@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+"""
+LLM 请求代理
+在本机启动一个 HTTP 代理，启用 LLM 的任务启动时其 OpenAI / Ollama 服务地址被改写为代理地址
+(每个任务一个路径前缀)，代理将请求转发到任务原来的服务地址：
+  请求预算  对所有同时运行的任务统一限制 LLM 并发请求数和每分钟请求数；服务返回 429 时减半并发上限
+            并按 Retry-After 暂停发送新请求，之后请求成功时逐步恢复。
+            经过代理的任务的 --max_concurrency 设为全局并发数，由代理统一限制，任务结束后其余任务即可用满预算
+  响应缓存  相同的请求直接返回磁盘缓存中的响应 (见 llm_cache.py)，不占用请求预算
+代理按任务统计请求数、重试 (再次发往服务的相同请求)、超时、限流次数和缓存命中，写入运行报告；
+等待预算超过任务的 --timeout 时不再转发 (marker 已放弃该请求)，直接返回 504
+Gemini / Vertex / Claude 服务的地址无法改写，只能在启动时从同一全局并发数中为其预留一份 --max_concurrency
+(预留期间代理相应少发请求)；每分钟请求数上限和限流退避对这些服务不起作用
+"""
+# 标准库 imports
+import hashlib
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 第三方库 imports
+from PySide6.QtCore import QObject, Signal
+
+# 本地 imports
+from .command_generator import option_value, override_option
+from .llm_cache import request_key
+from .options import DEFAULT_OPTIONS
+
+PROXY_HOST = "127.0.0.1"
+RATE_WINDOW = 60.0  # 秒，每分钟请求数的统计窗口
+DEFAULT_RETRY_AFTER = 2.0  # 秒，服务返回 429 但未给出 Retry-After 时暂停的时间
+MAX_RETRY_AFTER = 60.0
+
+# 服务类 -> (服务地址参数, marker 的默认服务地址)
+BASE_URL_OPTIONS = {
+    "marker.services.openai.OpenAIService": ("--openai_base_url", "https://api.openai.com/v1"),
+    "marker.services.ollama.OllamaService": ("--ollama_base_url", "http://localhost:11434"),
+}
+
+# 逐跳请求头和由代理重新设置的请求头，不转发
+_HOP_HEADERS = {
+    "connection",
+    "keep-alive",
+    "proxy-authenticate",
+    "proxy-authorization",
+    "te",
+    "trailers",
+    "transfer-encoding",
+    "upgrade",
+    "host",
+    "content-length",
+    "accept-encoding",
+}
+
+
+class LLMStats:
+    """单个任务的 LLM 请求统计"""
+
+    def __init__(self):
+        self.requests = 0  # 任务发出的全部请求，含缓存命中
+        self.retries = 0  # 再次发往服务的相同请求 (缓存命中不计)
+        self.timeouts = 0  # 等待服务响应超时
+        self.rate_limited = 0  # 服务返回 429
+        self.errors = 0  # 其他失败 (连接失败、5xx 等)
+        self.wait_seconds = 0.0  # 在代理中等待预算的时间
+        self.cache_lookups = 0
+        self.cache_hits = 0
+        self._seen = set()
+
+    def record_upstream(self, key):
+        """记录一次发往服务的请求，之前发往服务过的相同请求计为重试"""
+        if key in self._seen:
+            self.retries += 1
+        self._seen.add(key)
+
+    def report(self):
+        """写入运行报告的字段"""
+        return {
+            "llm_requests": self.requests,
+            "llm_retries": self.retries,
+            "llm_timeouts": self.timeouts,
+            "llm_rate_limited": self.rate_limited,
+            "llm_errors": self.errors,
+            "llm_wait_s": round(self.wait_seconds, 3),
+            "llm_cache_hits": self.cache_hits,
+            "llm_cache_hit_ratio": (
+                round(self.cache_hits / self.cache_lookups, 3) if self.cache_lookups else None
+            ),
+        }
+
+
+class RateGate:
+    """
+    全局 LLM 请求闸门
+    同时发出的请求数不超过 limit，最近一分钟发出的请求数不超过 rpm (0 表示不限)；
+    限流时 limit 减半并暂停发送，之后每连续成功 limit 个请求 limit 加一，直到恢复为 max_concurrency
+    reserved 为不经过代理的任务预留的并发数，经过代理的请求同时不超过 max_concurrency - reserved
+    """
+
+    def __init__(self, max_concurrency=1, rpm=0):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.rpm = rpm
+        self.active = 0
+        self.reserved = 0
+        self.paused_until = 0.0
+        self._starts = deque()  # 最近一分钟内各请求的发出时间
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def configure(self, max_concurrency, rpm):
+        with self._cond:
+            self.max_concurrency = max(1, max_concurrency)
+            self.limit = min(self.limit, self.max_concurrency) if self.active else self.max_concurrency
+            self.rpm = max(0, rpm)
+            self._cond.notify_all()
+
+    def reserve(self, count):
+        """为不经过代理的任务预留 (count 为负时归还) 并发数"""
+        with self._cond:
+            self.reserved = max(0, self.reserved + count)
+            self._cond.notify_all()
+
+    def acquire(self, deadline=None):
+        """等待预算，返回等待的秒数；到 deadline (time.monotonic) 仍未得到预算时返回 None"""
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if deadline is not None and now >= deadline:
+                    return None
+                while self._starts and self._starts[0] <= now - RATE_WINDOW:
+                    self._starts.popleft()
+                if self.paused_until > now:
+                    wait = self.paused_until - now
+                elif self.active >= min(self.limit, self.max_concurrency - self.reserved):
+                    wait = None  # 等待其他请求完成或预留归还
+                elif self.rpm and len(self._starts) >= self.rpm:
+                    wait = self._starts[0] + RATE_WINDOW - now
+                else:
+                    self.active += 1
+                    self._starts.append(now)
+                    return now - start
+                if deadline is not None:
+                    wait = deadline - now if wait is None else min(wait, deadline - now)
+                self._cond.wait(wait)
+
+    def release(self, status, retry_after=None):
+        with self._cond:
+            self.active -= 1
+            if status == 429:
+                self.limit = max(1, self.limit // 2)
+                self._successes = 0
+                pause = DEFAULT_RETRY_AFTER if retry_after is None else retry_after
+                self.paused_until = max(self.paused_until, time.monotonic() + pause)
+            elif 200 <= status < 300 and self.limit < self.max_concurrency:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._cond.notify_all()
+
+    @property
+    def status(self):
+        with self._cond:
+            now = time.monotonic()
+            recent = sum(1 for t in self._starts if t > now - RATE_WINDOW)
+            parts = [f"进行中 {self.active}/{self.limit}"]
+            if self.reserved:
+                parts.append(f"其他服务预留 {self.reserved}")
+            if self.limit < self.max_concurrency:
+                parts.append(f"限流后并发上限 {self.limit}/{self.max_concurrency}")
+            parts.append(f"最近一分钟 {recent} 次" + (f" (上限 {self.rpm})" if self.rpm else ""))
+            if self.paused_until > now:
+                parts.append(f"限流暂停 {self.paused_until - now:.0f}s")
+            return ", ".join(parts)
+
+
+def _retry_after(headers):
+    value = headers.get("Retry-After") if headers is not None else None
+    try:
+        return min(MAX_RETRY_AFTER, max(0.0, float(value)))
+    except (TypeError, ValueError):
+        return None
+
+
+class _Route:
+    """任务的代理路径 -> 原服务地址"""
+
+    def __init__(self, upstream, timeout):
+        self.upstream = upstream.rstrip("/")
+        self.timeout = timeout
+        self.stats = LLMStats()
+
+
+class _ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self._forward()
+
+    def do_POST(self):
+        self._forward()
+
+    def _forward(self):
+        proxy = self.server.proxy
+        route, path = proxy.route(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length) if length else b""
+        if route is None:
+            self._reply(404, [], b"unknown markergui proxy route")
+            return
+        headers = {
+            name: value for name, value in self.headers.items() if name.lower() not in _HOP_HEADERS
+        }
+        status, reply_headers, data = proxy.forward(route, self.command, path, headers, body)
+        self._reply(status, reply_headers, data)
+
+    def _reply(self, status, headers, data):
+        try:
+            self.send_response(status)
+            for name, value in headers:
+                if name.lower() not in _HOP_HEADERS:
+                    self.send_header(name, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except OSError:
+            # marker 超时后已断开连接，不在代理线程中输出异常
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        # 不输出每个请求的访问日志
+        pass
+
+
+class _ProxyServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+class LLMProxy(QObject):
+    """
+    JobRunner 的 LLM 请求代理
+    enabled 为请求预算开关，cache 为 LLMResponseCache (None 表示不缓存)，两者都未启用时任务按原命令运行；
+    代理在第一个需要改写的任务启动时才开始监听
+    代理线程中产生的提示通过 message 信号发送，由界面线程输出到运行日志
+    """
+
+    message = Signal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.enabled = False
+        self.cache = None
+        self.max_concurrency = DEFAULT_OPTIONS["llm_global_concurrency"]
+        self.rpm = DEFAULT_OPTIONS["llm_rpm"]
+        self.gate = RateGate(self.max_concurrency, self.rpm)
+        self._routes = {}  # 任务 ID -> _Route
+        # 运行中的 LLM 任务 ID -> (进程内的 LLM 客户端数 (marker 的 --workers), 在闸门中预留的并发数)
+        self._active = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def configure(self, max_concurrency, rpm):
+        self.max_concurrency = max(1, max_concurrency)
+        self.rpm = max(0, rpm)
+        self.gate.configure(self.max_concurrency, self.rpm)
+
+    @property
+    def url(self):
+        if self._server is None:
+            return ""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _ensure_server(self):
+        if self._server is None:
+            self._server = _ProxyServer((PROXY_HOST, 0), _ProxyHandler)
+            self._server.proxy = self
+            self._thread = threading.Thread(
+                target=self._server.serve_forever, name="markergui-llm-proxy", daemon=True
+            )
+            self._thread.start()
+            print(f"[INFO] LLM 请求预算: 代理已在 {self.url} 启动")
+
+    def prepare(self, job):
+        """
+        返回任务实际运行的参数：未启用或任务未使用 LLM 时为原参数，否则 OpenAI / Ollama 服务地址改为代理地址
+        启用请求预算时，经过代理的任务的 --max_concurrency 设为全局并发数 (同时发出的请求由 RateGate 统一限制，
+        不会因启动时的静态分配而在其他任务结束后用不满预算)；无法经过代理的服务按同时运行的 LLM 客户端数
+        分得一份 (不超过尚未预留的并发数，至少为 1)，并在闸门中预留，经过代理的请求相应减少
+        """
+        argv = job.argv
+        args = argv[2:]
+        if not (self.enabled or self.cache is not None) or "--use_llm" not in args:
+            return list(argv)
+        service = BASE_URL_OPTIONS.get(option_value(args, "--llm_service"))
+        if self.enabled:
+            workers = max(1, int(option_value(args, "--workers") or 1))
+            reserved = 0
+            with self._lock:
+                clients = workers + sum(n for n, _ in self._active.values())
+                if service is not None:
+                    share = self.max_concurrency
+                else:
+                    available = self.max_concurrency - self.gate.reserved
+                    share = max(1, min(self.max_concurrency // clients, available // workers))
+                    reserved = share * workers
+                self._active[job.id] = (workers, reserved)
+            if reserved:
+                self.gate.reserve(reserved)
+            args = override_option(args, "--max_concurrency", share)
+
+        if service is not None:
+            flag, default_url = service
+            timeout = int(option_value(args, "--timeout") or DEFAULT_OPTIONS["timeout"])
+            self._ensure_server()
+            with self._lock:
+                self._routes[job.id] = _Route(option_value(args, flag) or default_url, timeout)
+            args = override_option(args, flag, f"{self.url}/j/{job.id}")
+        return argv[:2] + args
+
+    def release(self, job):
+        """任务结束，返回其 LLM 请求统计 (未经过代理时为 None)"""
+        with self._lock:
+            _, reserved = self._active.pop(job.id, (0, 0))
+            route = self._routes.pop(job.id, None)
+        if reserved:
+            self.gate.reserve(-reserved)
+        return route.stats if route is not None else None
+
+    def route(self, path):
+        """代理路径 /j/<任务 ID>/... -> (_Route, 原服务地址下的路径)"""
+        parts = path.split("/", 3)
+        if len(parts) < 3 or parts[1] != "j" or not parts[2].isdigit():
+            return None, ""
+        with self._lock:
+            route = self._routes.get(int(parts[2]))
+        return route, "/" + parts[3] if len(parts) > 3 else ""
+
+    def forward(self, route, method, path, headers, body):
+        """缓存命中时返回缓存的响应，否则在预算内将请求转发到原服务，返回 (状态码, 响应头, 响应体)"""
+        stats = route.stats
+        with self._lock:
+            stats.requests += 1
+
+        cache = self.cache
+        cache_key = request_key(path, body) if cache is not None and method == "POST" else None
+        if cache_key is not None:
+            cached = cache.get(cache_key)
+            with self._lock:
+                stats.cache_lookups += 1
+                if cached is not None:
+                    stats.cache_hits += 1
+            if cached is not None:
+                return (200,) + cached
+
+        # marker 等待响应超过 --timeout 后放弃请求，届时仍未得到预算的请求不再转发
+        deadline = time.monotonic() + route.timeout
+        gate = self.gate if self.enabled else None
+        waited = gate.acquire(deadline) if gate is not None else 0.0
+        if waited is None:
+            with self._lock:
+                stats.wait_seconds += route.timeout
+                stats.timeouts += 1
+            return 504, [], b"markergui proxy: timed out waiting for the request budget"
+
+        key = hashlib.sha1(method.encode("utf-8") + path.encode("utf-8") + b"\0" + body).digest()
+        with self._lock:
+            stats.record_upstream(key)
+        status, reply_headers, data = 502, [], b""
+        retry_after = None
+        try:
+            request = urllib.request.Request(
+                route.upstream + path, data=body or None, headers=headers, method=method
+            )
+            try:
+                timeout = max(0.1, deadline - time.monotonic())
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    status, reply_headers, data = response.status, response.getheaders(), response.read()
+            except urllib.error.HTTPError as e:
+                status, reply_headers, data = e.code, list(e.headers.items()), e.read()
+                retry_after = _retry_after(e.headers)
+        except TimeoutError:
+            status, data = 504, b"markergui proxy: upstream timed out"
+        except urllib.error.URLError as e:
+            if isinstance(e.reason, TimeoutError):
+                status, data = 504, b"markergui proxy: upstream timed out"
+            else:
+                data = f"markergui proxy: {e.reason}".encode("utf-8")
+        except OSError as e:
+            data = f"markergui proxy: {str(e)}".encode("utf-8")
+        finally:
+            if gate is not None:
+                gate.release(status, retry_after)
+        if cache_key is not None and status == 200:
+            try:
+                cache.put(cache_key, reply_headers, data)
+            except OSError as e:
+                self.message.emit(f"[WORRY] 保存 LLM 响应缓存失败: {str(e)}")
+        with self._lock:
+            stats.wait_seconds += waited
+            if status == 504:
+                stats.timeouts += 1
+            elif status == 429:
+                stats.rate_limited += 1
+            elif not 200 <= status < 400:
+                stats.errors += 1
+        return status, reply_headers, data
+
+    @property
+    def status(self):
+        """队列页显示的预算和缓存状态"""
+        parts = []
+        if self.enabled:
+            with self._lock:
+                jobs = len(self._active)
+            parts.append(f"请求预算 {jobs} 个任务, " + self.gate.status)
+        if self.cache is not None:
+            parts.append("响应缓存 " + self.cache.status)
+        return "; ".join(parts)
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+            self._thread = None
@@ -0,0 +1,135 @@
+# -*- coding: utf-8 -*-
+# 标准库 imports
+import os
+from collections import deque
+from itertools import islice
+
+# 第三方库 imports
+from PySide6.QtCore import QObject, QTimer
+from PySide6.QtGui import QTextCursor
+
+
+class RotatingLogFile:
+    """
+    滚动日志文件
+    超过 max_bytes 时将当前文件重命名为 .1，依次后移，最多保留 backup_count 个
+    """
+
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=3):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._file = None
+        self._size = 0
+
+    def write_lines(self, lines):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+            self._size = self._file.tell()
+
+        data = "\n".join(lines) + "\n"
+        self._file.write(data)
+        self._size += len(data.encode("utf-8"))
+        if self._size >= self.max_bytes:
+            self._rotate()
+
+    def _rotate(self):
+        self.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+    def flush(self):
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._size = 0
+
+
+class LogSink(QObject):
+    """
+    运行日志输出缓冲
+    写入的行先进入待刷新列表，每 FLUSH_INTERVAL 毫秒合并为一次视图更新；
+    内存中只保留最近 max_lines 行，溢出的旧行写入滚动日志文件；
+    进度条等临时行 (final=False) 只更新视图中的同一行，不计入历史
+    """
+
+    FLUSH_INTERVAL = 50  # 毫秒
+
+    def __init__(self, view, max_lines=10000, spill_path="logs/runtime.log", parent=None):
+        super().__init__(parent)
+        self.view = view
+        self.view.setMaximumBlockCount(max_lines)
+        self.history = deque(maxlen=max_lines)
+        self.spill_file = RotatingLogFile(spill_path) if spill_path else None
+        self._pending = []
+        self._transient_key = None  # 视图最后一行为临时行时，记录其来源
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.FLUSH_INTERVAL)
+        self._timer.timeout.connect(self.flush)
+
+    def append(self, line, key=None, final=True):
+        """
+        添加一行，等待下一次定时刷新
+        同一 key 的临时行和随后的完整行会替换视图中的上一条临时行
+        """
+        self._pending.append((line, key, final))
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """将待刷新的行写入历史和视图"""
+        if not self._pending:
+            return
+        events, self._pending = self._pending, []
+        lines = [line for line, _, final in events if final]
+
+        # 超出环形缓冲容量的旧行写入磁盘
+        overflow = len(self.history) + len(lines) - self.history.maxlen
+        if overflow > 0 and self.spill_file is not None:
+            evicted = list(islice(self.history, min(overflow, len(self.history))))
+            if overflow > len(self.history):
+                evicted += lines[: overflow - len(self.history)]
+            try:
+                self.spill_file.write_lines(evicted)
+            except OSError:
+                self.spill_file = None
+
+        self.history.extend(lines)
+        self._render(events)
+
+    def _render(self, events):
+        """合并为一次追加；临时行就地替换"""
+        out = []
+        for line, key, final in events:
+            if key is not None and key == self._transient_key:
+                if out:
+                    out[-1] = line
+                else:
+                    self._replace_last_block(line)
+            else:
+                out.append(line)
+            self._transient_key = None if final else key
+
+        if out:
+            self.view.appendPlainText("\n".join(out[-self.history.maxlen :]))
+
+    def _replace_last_block(self, line):
+        cursor = QTextCursor(self.view.document())
+        cursor.movePosition(QTextCursor.End)
+        cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.KeepAnchor)
+        cursor.insertText(line)
+
+    def close(self):
+        self.flush()
+        if self.spill_file is not None:
+            self.spill_file.close()
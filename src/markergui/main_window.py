@@ -14,6 +14,7 @@ from PySide6.QtWidgets import (
     QCheckBox,
     QComboBox,
     QTextEdit,
+    QPlainTextEdit,
     QFileDialog,
     QMessageBox,
     QSpinBox,
@@ -22,18 +23,37 @@ from PySide6.QtWidgets import (
     QApplication,
     QSplitter,
 )
-from PySide6.QtCore import Qt, Signal
+from PySide6.QtCore import Qt, QTimer, Signal
 from PySide6.QtGui import QFont
 from .config_manager import ConfigManager
 from .tabs.basic_tab import create_basic_tab
-from .tabs.ocr_tab import create_ocr_tab
-from .tabs.llm_tab import create_llm_tab
-from .tabs.advanced_tab import AdvancedTab
-from .command_generator import generate_command
+from .tabs.queue_tab import QueueTab
+from .command_generator import (
+    generate_command,
+    build_command,
+    build_option_args,
+    format_command,
+    parse_page_range,
+    quote_arg,
+)
+# 构建窗口时就要用到的模块；批处理、增量清单、运行报告、任务队列记录、预热进程池和结果缓存等
+# 在首次使用时才导入 (见各方法内的 import)，缩短启动时间
+from .job_runner import PRIORITY_LEVELS, Job, JobRunner
+from .devices import device_slots, uses_device_slots
 from .utils import EmittingStream
+from .log_sink import LogSink
+from .progress import ProgressModel, ProgressPanel
+from .admission import AdmissionController
+from .retry import RetryManager, RetryPolicy
+from .config_binding import ConfigBinding
+from .startup import PROFILER
 
 
 class MarkerGUI(QMainWindow):
+    STORE_COMMIT_DELAY = 500  # 毫秒，合并任务队列记录的写入
+    HASH_WORKERS = min(8, os.cpu_count() or 1)  # 批处理扫描时计算内容哈希的线程数
+    PREVIEW_DELAY = 200  # 毫秒，实时预览在停止修改设置后更新命令
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Marker Document Converter")
@@ -43,6 +63,14 @@ class MarkerGUI(QMainWindow):
 
         # 初始化配置管理器
         self.config_manager = ConfigManager()
+        PROFILER.mark("加载配置")
+
+        # 任务执行器和进度模型
+        self.job_runner = JobRunner(self)
+        self.admission = self.job_runner.admission = AdmissionController()
+        self.warm_pool = None  # 预热进程池，首次启用时创建
+        self.progress_model = ProgressModel(self)
+        self.autotuner = None
 
         # 创建主分割器
         main_splitter = QSplitter(Qt.Horizontal)
@@ -80,9 +108,11 @@ class MarkerGUI(QMainWindow):
         # 运行日志组（新终端控件）
         runtime_log_group = QGroupBox("运行日志")
         runtime_log_layout = QVBoxLayout()
-        self.runtime_log = QTextEdit()
+        self.runtime_log = QPlainTextEdit()
         self.runtime_log.setReadOnly(True)
         self.runtime_log.setFont(QFont("Courier New", 9))
+        # 批量刷新并限制保留行数，溢出的旧日志写入 logs/runtime.log
+        self.log_sink = LogSink(self.runtime_log, parent=self)
         runtime_log_layout.addWidget(self.runtime_log)
         runtime_log_group.setLayout(runtime_log_layout)
         console_splitter.addWidget(runtime_log_group)
@@ -95,6 +125,7 @@ class MarkerGUI(QMainWindow):
         self.command_output.setFont(QFont("Courier New", 10))
         self.command_output.setLineWrapMode(QTextEdit.WidgetWidth)
         command_layout.addWidget(self.command_output)
+        self._command = None  # 当前显示的命令 (环境变量, argv)，运行时直接使用
 
         # 命令组按钮
         command_btn_layout = QHBoxLayout()
@@ -104,9 +135,17 @@ class MarkerGUI(QMainWindow):
         self.copy_btn.clicked.connect(self.copy_command)
         self.run_btn = QPushButton("运行命令")
         self.run_btn.clicked.connect(self.run_command)
+        self.plan_btn = QPushButton("预估")
+        self.plan_btn.setToolTip("不运行转换，统计输入的页数并按历史运行报告估算耗时、峰值内存和 LLM 调用次数")
+        self.plan_btn.clicked.connect(self.plan_conversion)
         command_btn_layout.addWidget(self.generate_btn)
         command_btn_layout.addWidget(self.copy_btn)
+        command_btn_layout.addWidget(self.plan_btn)
         command_btn_layout.addWidget(self.run_btn)
+        self.live_preview = QCheckBox("实时预览")
+        self.live_preview.setChecked(True)
+        self.live_preview.setToolTip("修改设置后自动更新生成的命令")
+        command_btn_layout.addWidget(self.live_preview)
 
         command_layout.addLayout(command_btn_layout)
         command_group.setLayout(command_layout)
@@ -115,6 +154,10 @@ class MarkerGUI(QMainWindow):
         # 设置运行日志组和命令组比例 1:1
         console_splitter.setSizes([300, 300])
 
+        # 转换进度 (解析 marker 的 tqdm 输出)
+        self.progress_panel = ProgressPanel(self.progress_model, self.job_runner)
+        console_page_layout.addWidget(self.progress_panel)
+
         # 输入和输出设置组
         input_output_group = QGroupBox("输入和输出设置")
         input_output_layout = QFormLayout()
@@ -182,20 +225,119 @@ class MarkerGUI(QMainWindow):
         right_layout.addWidget(self.tabs)
 
         # 添加标签页（基本设置页已移除转换器设置）
+        # 其余标签页在首次切换到时才构建，未构建控件的配置值保存在配置绑定层中，构建后再写入
+        self._tab_builders = {}
+        self._advanced_tab = None
+        self.config_binding = ConfigBinding(
+            {key: spec[1:] for key, spec in self._all_config_specs()},
+            self._locate_config_widget,
+            self._write_config_widget,
+            self,
+        )
         self.tabs.addTab(create_basic_tab(self), "基本设置")
-        self.tabs.addTab(create_ocr_tab(self), "OCR设置")
-        self.tabs.addTab(create_llm_tab(self), "LLM设置")
-        self.tabs.addTab(AdvancedTab(self), "高级设置")
+        self._add_lazy_tab("OCR设置", self._build_ocr_tab)
+        self._add_lazy_tab("LLM设置", self._build_llm_tab)
+        self._add_lazy_tab("高级设置", self._build_advanced_tab)
+        self.tabs.currentChanged.connect(self.ensure_tab_built)
+        PROFILER.mark("构建标签页")
+
+        # 实时预览：配置变化后防抖更新命令，连续输入时只在停下后生成一次
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(self.PREVIEW_DELAY)
+        self.preview_timer.timeout.connect(self.update_preview)
+        self.config_binding.changed.connect(self.schedule_preview)
+        self.live_preview.toggled.connect(self.toggle_live_preview)
 
         # 初始化输出重定向到运行日志
         self.init_output_redirection()
 
+        # 连接任务执行器
+        self.job_runner.jobOutput.connect(self.handle_job_output)
+        self.job_runner.jobProgress.connect(self.handle_job_progress)
+        self.job_runner.jobFinished.connect(self.handle_job_finished)
+        self.manifests = {}  # 输出目录 -> 增量清单
+        self.discovery = None  # 批处理的后台文件扫描
+        self.hash_threads = []  # 提交前计算内容哈希的后台线程 (启用结果缓存时)
+        self.planner = None  # 后台预估
+        self.page_counts = None  # PDF 页数缓存，首次预估或批处理统计页数时创建
+        self._batch = None
+
+        # 持久化任务队列：记录任务状态变化，合并后定时提交到磁盘；窗口显示后才打开 (见 open_job_store)
+        self.job_store = None
+        self._store_commit_timer = QTimer(self)
+        self._store_commit_timer.setSingleShot(True)
+        self._store_commit_timer.setInterval(self.STORE_COMMIT_DELAY)
+        self._store_commit_timer.timeout.connect(self.commit_job_store)
+        for signal in (
+            self.job_runner.jobQueued,
+            self.job_runner.jobStarted,
+            self.job_runner.jobFinished,
+            self.job_runner.jobChanged,  # 优先级和排队顺序的调整
+        ):
+            signal.connect(self.record_job_state)
+
+        # 批处理失败重试：先于任务队列页连接，队列页刷新时已能显示失败原因
+        self.retry_manager = RetryManager(self.job_runner, self)
+        self.retry_manager.retryScheduled.connect(self.handle_retry_scheduled)
+        self.retry_manager.jobRetried.connect(self.handle_job_retried)
+        self.retry_manager.jobQuarantined.connect(self.handle_job_quarantined)
+
+        # 第二页：任务队列
+        self.queue_tab = QueueTab(self.job_runner)
+        self.queue_tab.cancelAllRequested.connect(self.cancel_all_jobs)
+        self.left_tabs.addTab(self.queue_tab, "任务队列")
+
         # 初始化配置
         self.config_manager.reset_to_default()
         self.toggle_llm_options(False)
+        self.update_preview()
 
         # 添加自适应宽度逻辑
         self.adjustSize()
+        PROFILER.mark("其余初始化")
+
+        # 窗口显示后打开任务队列记录，询问是否恢复上次未完成的任务
+        QTimer.singleShot(0, self.open_job_store)
+
+    def _add_lazy_tab(self, title, builder):
+        """添加占位页，首次切换到该页时调用 builder 构建内容"""
+        placeholder = QWidget()
+        layout = QVBoxLayout(placeholder)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self._tab_builders[placeholder] = builder
+        self.tabs.addTab(placeholder, title)
+
+    def ensure_tab_built(self, index):
+        """构建尚未构建的标签页，并应用暂存的配置值"""
+        placeholder = self.tabs.widget(index)
+        builder = self._tab_builders.pop(placeholder, None)
+        if builder is None:
+            return
+        placeholder.layout().addWidget(builder())
+        self.apply_pending_config()
+
+    def _build_ocr_tab(self):
+        from .tabs.ocr_tab import create_ocr_tab
+
+        return create_ocr_tab(self)
+
+    def _build_llm_tab(self):
+        from .tabs.llm_tab import create_llm_tab
+
+        return create_llm_tab(self)
+
+    def _build_advanced_tab(self):
+        from .tabs.advanced_tab import AdvancedTab
+
+        self._advanced_tab = AdvancedTab(self)
+        return self._advanced_tab
+
+    def apply_pending_config(self):
+        """绑定新构建的控件并写入其配置值，仍未构建的继续保存在配置绑定层中"""
+        self.config_binding.attach()
+        if hasattr(self, "use_llm"):
+            self.toggle_llm_options(self.use_llm.isChecked())
 
     def init_output_redirection(self):
         """初始化输出重定向"""
@@ -203,10 +345,233 @@ class MarkerGUI(QMainWindow):
         self.program_stream = EmittingStream()
         sys.stdout = self.program_stream
         self.program_stream.textWritten.connect(self.handle_runtime_output)
+        self.program_stream.progressWritten.connect(self.handle_runtime_progress)
 
     def handle_runtime_output(self, text):
         """处理运行日志输出"""
-        self.runtime_log.append(text)
+        self.log_sink.append(text, key="program")
+
+    def handle_runtime_progress(self, text):
+        """处理程序自身的进度条输出 (就地更新同一行)"""
+        self.log_sink.append(text, key="program", final=False)
+
+    def handle_job_output(self, job, line):
+        """处理子进程输出，加上任务编号前缀以区分并发任务"""
+        self.progress_model.feed(job.id, line)
+        self.log_sink.append(f"[#{job.id}] {line}", key=job.id)
+
+    def handle_job_progress(self, job, line):
+        """处理子进程进度条输出 (就地更新同一行)"""
+        self.progress_model.feed(job.id, line)
+        self.log_sink.append(f"[#{job.id}] {line}", key=job.id, final=False)
+
+    def handle_job_finished(self, job):
+        """任务结束时记录退出状态和耗时"""
+        from .run_report import append_run_report, build_run_report, format_report
+
+        name = f"#{job.id} {job.label}"
+        if job.cancelled:
+            print(f"[WORRY] {name} 已取消: 耗时 {job.elapsed:.1f}s")
+        elif job.cache_hit:
+            print(f"[INFO] {name} 命中结果缓存: 已输出到 {job.output_dir}")
+        elif job.succeeded:
+            print(f"[INFO] {name} 执行完成: 退出码 {job.exit_code}, 耗时 {job.elapsed:.1f}s")
+        elif job.error:
+            print(f"[ERROR] {name} 启动失败: {job.error} (请确认 marker 已安装并在 PATH 中)")
+        elif job.crashed:
+            print(f"[ERROR] {name} 异常终止: 耗时 {job.elapsed:.1f}s")
+        else:
+            print(f"[ERROR] {name} 执行失败: 退出码 {job.exit_code}, 耗时 {job.elapsed:.1f}s")
+
+        # 增量模式：记录成功转换的文件，批处理结束时写盘
+        manifest = self.manifests.get(job.output_dir)
+        if manifest is not None and job.options_fingerprint:
+            if job.succeeded:
+                manifest.record(
+                    job.input_path, job.input_signature, job.options_fingerprint
+                )
+            idle = not self.job_runner.queue and not self.job_runner.running_jobs()
+            manifest.save(force=idle)
+
+        # 性能报告 (缓存命中时没有运行 marker，取消的任务没有完整运行)
+        if not job.error and not job.cache_hit and not job.cancelled:
+            report = build_run_report(
+                job, self.progress_model.job_stages(job.id), self.preset_combo.currentText()
+            )
+            append_run_report(report, job.output_dir)
+            self.admission.estimator.observe(report)
+            print(f"[INFO] {name} 性能: {format_report(report)}")
+
+        self.progress_model.forget(job.id)
+
+    def open_job_store(self):
+        """
+        打开持久化任务队列，上次运行留下未完成或失败的任务时询问是否恢复
+        先取出这些任务再记录本次提交的任务，避免两者混在一起
+        """
+        import sqlite3
+        from .job_store import JobStore
+
+        try:
+            self.job_store = JobStore()
+            unfinished, failed = self.job_store.unfinished(), self.job_store.failed()
+        except sqlite3.Error as e:
+            print(f"[WORRY] 任务队列记录不可用: {str(e)}")
+            self.job_store = None
+            return
+        if unfinished or failed:
+            self.offer_resume(unfinished, failed)
+
+    def _call_job_store(self, method, *args):
+        """调用任务队列记录的方法，出错时只提示，返回是否成功"""
+        import sqlite3
+
+        try:
+            getattr(self.job_store, method)(*args)
+        except sqlite3.Error as e:
+            print(f"[WORRY] 任务队列记录失败: {str(e)}")
+            return False
+        return True
+
+    def record_job_state(self, job):
+        """将任务的提交和状态变化写入持久化任务队列"""
+        if self.job_store is None or not job.persistent:
+            return
+        if job.store_id is None:
+            stored = self._call_job_store("add", job, self.retry_manager.retry_state(job))
+        else:
+            stored = self._call_job_store("update", job)
+        if not stored:
+            return
+        if not self._store_commit_timer.isActive():
+            self._store_commit_timer.start()
+
+    def commit_job_store(self):
+        if self.job_store is None:
+            return
+        self._call_job_store("commit")
+
+    def offer_resume(self, unfinished, failed):
+        """上次运行留下未完成或失败的任务时，询问是否恢复"""
+        if self.job_store is None:
+            return
+
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Question)
+        box.setWindowTitle("恢复任务")
+        box.setText(
+            f"上次运行留下 {len(unfinished)} 个未完成的任务和 {len(failed)} 个失败的任务。\n"
+            "是否重新提交这些任务？"
+        )
+        resume_all = box.addButton("全部恢复", QMessageBox.AcceptRole)
+        resume_unfinished = None
+        if unfinished and failed:
+            resume_unfinished = box.addButton("仅恢复未完成", QMessageBox.AcceptRole)
+        box.addButton("忽略", QMessageBox.RejectRole)
+        box.exec()
+
+        clicked = box.clickedButton()
+        if clicked is resume_all:
+            resumed, dismissed = unfinished + failed, []
+        elif clicked is not None and clicked is resume_unfinished:
+            resumed, dismissed = unfinished, failed
+        else:
+            resumed, dismissed = [], unfinished + failed
+        if self._call_job_store("mark", [stored.id for stored in dismissed], "dismissed"):
+            self._call_job_store("mark", [stored.id for stored in resumed], "resumed")
+        if resumed:
+            self.resume_jobs(resumed)
+
+    def resume_jobs(self, stored_jobs):
+        """按记录的完整命令、上次的优先级和排队顺序重新提交任务"""
+        from .manifest import Manifest
+
+        config = self.get_current_config()
+        self.admission.enabled = config["memory_admission"]
+        self.admission.reserve_mb = config["memory_reserve"]
+        self.configure_llm_proxy(config)
+        self.job_runner.set_max_concurrent(config["batch_concurrency"])
+
+        print(f"[INFO] 恢复任务: 共 {len(stored_jobs)} 个")
+        # 按上次的排队顺序依次提交 (每个任务一个新的排队分组，同一优先级内按提交顺序)
+        stored_jobs = sorted(
+            stored_jobs,
+            key=lambda stored: (
+                -stored.priority,
+                stored.queue_position is None,
+                stored.queue_position or [],
+                stored.id,
+            ),
+        )
+        for stored in stored_jobs:
+            job = Job(
+                stored.argv,
+                env=stored.env,
+                label=stored.label,
+                input_path=stored.input_path,
+                output_dir=stored.output_dir,
+            )
+            job.config = stored.config
+            job.input_signature = stored.input_signature
+            job.options_fingerprint = stored.options_fingerprint
+            job.priority = stored.priority
+            job.timeout = stored.timeout
+            if stored.retry is not None:
+                policy, attempt = stored.retry
+                self.retry_manager.watch(job, RetryPolicy(*policy), attempt)
+            # 增量模式的任务完成后继续更新清单
+            if job.options_fingerprint and job.output_dir not in self.manifests:
+                self.manifests[job.output_dir] = Manifest(job.output_dir)
+            self.job_runner.submit(job)
+        self.left_tabs.setCurrentWidget(self.queue_tab)
+
+    def handle_retry_scheduled(self, job, delay):
+        print(f"[WORRY] #{job.id} {job.label} 失败: {job.failure}")
+
+    def handle_job_retried(self, job, retry):
+        print(f"[INFO] #{job.id} {job.label} 重新提交为 #{retry.id}")
+        # 失败记录已由重试任务接替，重新启动时不再提示恢复
+        if self.job_store is not None and job.store_id is not None:
+            self._call_job_store("mark", [job.store_id], "retried")
+
+    def handle_job_quarantined(self, job, report_path):
+        print(f"[ERROR] #{job.id} {job.label} 失败: {job.failure}，详见 {report_path}")
+
+    def cancel_all_jobs(self):
+        """停止扫描批处理文件夹和计算内容哈希，取消等待中的重试和所有排队中、运行中的任务"""
+        if self.discovery is not None:
+            self._batch["cancelled"] = True
+            self.discovery.cancel()
+        self.retry_manager.cancel()
+        for thread in self.hash_threads:
+            thread.cancel()
+        count = len(self.job_runner.queue) + len(self.job_runner.running_jobs())
+        self.job_runner.cancel_all()
+        print(f"[INFO] 已取消 {count} 个任务")
+
+    def closeEvent(self, event):
+        """关闭窗口时终止仍在运行的任务"""
+        if self.autotuner is not None:
+            self.autotuner.cancel()
+        self.retry_manager.cancel()
+        if self.discovery is not None:
+            self.discovery.cancel()
+            self.discovery.wait()
+        for thread in self.hash_threads:
+            thread.cancel()
+            thread.wait()
+        if self.planner is not None:
+            self.planner.cancel()
+            self.planner.wait()
+        # 先关闭任务队列记录，被终止和仍在排队的任务保持未完成状态，下次启动时可恢复
+        if self.job_store is not None:
+            self.job_store.close()
+            self.job_store = None
+        self.job_runner.shutdown()
+        for manifest in self.manifests.values():
+            manifest.save()
+        self.log_sink.close()
+        super().closeEvent(event)
 
     def create_h_widget(self, widgets):
         widget = QWidget()
@@ -218,23 +583,33 @@ class MarkerGUI(QMainWindow):
         return widget
 
     def toggle_llm_options(self, enabled):
-        # 启用或禁用LLM相关选项
-        self.redo_inline_math.setEnabled(enabled)
-        self.llm_service.setEnabled(enabled)
-        self.gemini_api_key.setEnabled(enabled)
-        self.gemini_model_name.setEnabled(enabled)
-        self.vertex_project_id.setEnabled(enabled)
-        self.vertex_location.setEnabled(enabled)
-        self.ollama_base_url.setEnabled(enabled)
-        self.ollama_model.setEnabled(enabled)
-        self.claude_api_key.setEnabled(enabled)
-        self.claude_model_name.setEnabled(enabled)
-        self.openai_api_key.setEnabled(enabled)
-        self.openai_model.setEnabled(enabled)
-        self.openai_base_url.setEnabled(enabled)
-        self.max_concurrency.setEnabled(enabled)
-        self.timeout.setEnabled(enabled)
-        self.max_retries.setEnabled(enabled)
+        # 启用或禁用LLM相关选项 (服务设置组按需构建，跳过尚未构建的控件)
+        for name in (
+            "redo_inline_math",
+            "llm_service",
+            "gemini_api_key",
+            "gemini_model_name",
+            "vertex_project_id",
+            "vertex_location",
+            "ollama_base_url",
+            "ollama_model",
+            "claude_api_key",
+            "claude_model_name",
+            "openai_api_key",
+            "openai_model",
+            "openai_base_url",
+            "max_concurrency",
+            "timeout",
+            "max_retries",
+            "llm_budget",
+            "llm_global_concurrency",
+            "llm_rpm",
+            "llm_cache",
+            "llm_cache_dir",
+            "llm_cache_size",
+        ):
+            if hasattr(self, name):
+                getattr(self, name).setEnabled(enabled)
 
     def browse_input(self, input_type):
         """浏览输入文件或文件夹"""
@@ -259,8 +634,41 @@ class MarkerGUI(QMainWindow):
     def generate_command(self):
         """使用外部命令生成器生成命令"""
         command = generate_command(self)
-        if command:
-            self.command_output.setText(command)
+        if command is not None:
+            self.set_command(command)
+
+    def set_command(self, command):
+        """显示命令 (环境变量, argv)，None 时清空；显示的字符串只用于查看和复制"""
+        self._command = command
+        if command is None:
+            self.command_output.clear()
+            return
+        env, argv = command
+        env_prefix = "".join(f"{name}={quote_arg(value)} " for name, value in env.items())
+        self.command_output.setPlainText(env_prefix + format_command(argv[0], argv[1], argv[2:]))
+
+    def schedule_preview(self, keys=None):
+        if self.live_preview.isChecked():
+            self.preview_timer.start()
+
+    def toggle_live_preview(self, enabled):
+        if enabled:
+            self.update_preview()
+        else:
+            self.preview_timer.stop()
+            self.command_output.setPlaceholderText("")
+
+    def update_preview(self):
+        """实时预览：按当前配置重新生成命令，出错时不弹窗，在命令框中显示原因"""
+        self.preview_timer.stop()
+        if not self.live_preview.isChecked():
+            return
+        try:
+            command = build_command(self.get_current_config())
+        except ValueError as e:
+            self.command_output.setPlaceholderText(str(e))
+            command = None
+        self.set_command(command)
 
     def copy_command(self):
         command = self.command_output.toPlainText()
@@ -271,16 +679,514 @@ class MarkerGUI(QMainWindow):
             print("[WORRY] 复制错误: 没有可复制的命令")
 
     def run_command(self):
-        """在新cmd窗口中执行命令"""
-        command = self.command_output.toPlainText().strip()
-        if not command:
+        """在后台子进程中执行命令，输出实时显示在运行日志中"""
+        config = self.get_current_config()
+        self.admission.enabled = config["memory_admission"]
+        self.admission.reserve_mb = config["memory_reserve"]
+        concurrency = config["batch_concurrency"]
+        slots = None
+        if uses_device_slots(config):
+            try:
+                slots = device_slots(config)
+            except ValueError as e:
+                print(f"[ERROR] 多设备: {str(e)}")
+                return
+            # 每个设备槽位各自运行 num_workers 个任务
+            concurrency = sum(slot.workers for slot in slots)
+        self.configure_warm_pool(config["warm_pool"], concurrency)
+        self.configure_result_cache(config)
+        self.configure_llm_proxy(config)
+        self.job_runner.set_max_concurrent(concurrency)
+
+        input_path = self.input_path.text().strip()
+        per_file = config["batch_mode"] or config["incremental_mode"] or slots is not None
+        if per_file and os.path.isdir(input_path):
+            self.run_batch(input_path, config["incremental_mode"], slots)
+            return
+        if (
+            config["shard_mode"]
+            and input_path.lower().endswith(".pdf")
+            and os.path.isfile(input_path)
+            and self.run_sharded(input_path, config["shard_pages"], slots)
+        ):
+            return
+
+        # 防抖期间的修改尚未反映到预览的命令中
+        if self.preview_timer.isActive():
+            self.update_preview()
+        if self._command is None:
             print("[WORRY] 运行错误: 没有可运行的命令")
             return
 
-        # 使用os.system在新窗口执行命令
-        full_command = f'start cmd /k "{command}"'
-        print(f"[INFO] 在新窗口执行命令: {command}")
-        os.system(full_command)
+        env, argv = self._command
+        print(f"[INFO] 开始执行命令: {self.command_output.toPlainText()}")
+        job = Job(argv, env=env, input_path=input_path, output_dir=self.output_dir.text().strip())
+        job.config = config
+        job.priority = PRIORITY_LEVELS.get(config["job_priority"], 0)
+        if slots is not None:
+            # 单个文件只在第一个设备槽位上运行
+            job.env.update(slots[0].env)
+            job.device = slots[0].label
+            print(f"[INFO] 多设备: 单个文件在 {job.device} 上运行")
+        self.submit_after_hashing(input_path, lambda: self.job_runner.submit(job))
+
+    def submit_after_hashing(self, path, submit):
+        """
+        启用结果缓存且输入文件的内容哈希未知时，先在后台线程计算哈希再提交任务，
+        查询缓存时不在界面线程中读取整个文件；否则直接提交
+        """
+        cache = self.job_runner.result_cache
+        if cache is None or not os.path.isfile(path) or cache.known_hash(path) is not None:
+            submit()
+            return
+        from .discovery import HashThread
+
+        thread = HashThread([path], self)
+        thread.finished.connect(lambda: self.handle_hashed(thread, cache, submit))
+        self.hash_threads.append(thread)
+        thread.start()
+
+    def handle_hashed(self, thread, cache, submit):
+        self.hash_threads.remove(thread)
+        thread.deleteLater()
+        if thread.cancelled:
+            return
+        for path, st, digest in thread.results:
+            if digest is not None:
+                cache.remember_hash(path, st, digest)
+        submit()
+
+    def configure_warm_pool(self, enabled, size):
+        """按配置启用或停用预热进程池，首次启用时创建"""
+        if self.warm_pool is None:
+            if not enabled:
+                return
+            from .warm_pool import WarmPool
+
+            self.warm_pool = WarmPool(self)
+            self.job_runner.set_warm_pool(self.warm_pool)
+        self.warm_pool.enabled = enabled
+        self.warm_pool.size = size
+        if not enabled:
+            self.warm_pool.close_idle()
+
+    def configure_result_cache(self, config):
+        """按配置启用或停用结果缓存，缓存目录不变时保留命中统计"""
+        if not config["result_cache"]:
+            self.job_runner.result_cache = None
+            return
+        from .result_cache import MB, RESULT_CACHE_DIR, ResultCache
+
+        root = config["result_cache_dir"].strip() or RESULT_CACHE_DIR
+        cache = self.job_runner.result_cache
+        if cache is None or cache.root != root:
+            cache = self.job_runner.result_cache = ResultCache(root)
+        cache.max_bytes = config["result_cache_size"] * MB
+
+    def configure_llm_proxy(self, config):
+        """
+        按配置设置 LLM 请求预算和响应缓存 (只影响之后启动的任务，运行中的任务继续经过代理直到结束)
+        缓存目录不变时保留命中统计
+        """
+        enabled = config["use_llm"] and config["llm_budget"]
+        cached = config["use_llm"] and config["llm_cache"]
+        proxy = self.job_runner.llm_proxy
+        if proxy is None:
+            if not enabled and not cached:
+                return
+            from .llm_proxy import LLMProxy
+
+            proxy = self.job_runner.llm_proxy = LLMProxy(self)
+            # 代理线程中的提示经排队连接在界面线程中输出
+            proxy.message.connect(self.handle_llm_proxy_message)
+        proxy.enabled = enabled
+        proxy.configure(config["llm_global_concurrency"], config["llm_rpm"])
+        if not cached:
+            proxy.cache = None
+            return
+        from .llm_cache import LLM_CACHE_DIR, MB, LLMResponseCache
+
+        root = config["llm_cache_dir"].strip() or LLM_CACHE_DIR
+        if proxy.cache is None or proxy.cache.root != root:
+            proxy.cache = LLMResponseCache(root)
+        proxy.cache.max_bytes = config["llm_cache_size"] * MB
+
+    def handle_llm_proxy_message(self, text):
+        print(text)
+
+    def run_batch(self, folder, incremental=False, slots=None):
+        """
+        并行批处理：文件夹中每个文件单独提交一个 marker_single 任务
+        文件在后台线程中扫描，每找到一批就立即提交，不必等待整个文件夹列完
+        增量模式下跳过输入和选项均未变化的文件；给出设备槽位时文件按大小分配到各设备
+        """
+        from .batch import SUPPORTED_EXTENSIONS
+        from .discovery import FileDiscovery, FileFilter
+        from .manifest import Manifest, options_fingerprint
+
+        if self.discovery is not None:
+            print("[WORRY] 批处理: 上一个文件夹仍在扫描中")
+            return
+
+        output_dir = self.output_dir.text().strip()
+        if not output_dir:
+            print("[WARNING]当前未设置输出路径")
+
+        config = self.get_current_config()
+        fingerprint = ""
+        manifest = None
+        if incremental:
+            if not output_dir:
+                print("[ERROR] 增量模式需要设置输出目录")
+                return
+            fingerprint = options_fingerprint(config)
+            manifest = self.manifests.get(output_dir)
+            if manifest is None:
+                manifest = self.manifests[output_dir] = Manifest(output_dir)
+
+        # 启用结果缓存时顺带在线程池中计算内容哈希、启用内存准入时统计 PDF 页数，
+        # 提交和准入检查时无需在界面线程中读取文件
+        hash_workers = self.HASH_WORKERS if self.job_runner.result_cache is not None else 0
+        page_counts = None
+        if config["memory_admission"]:
+            from .planner import PageCountCache
+
+            if self.page_counts is None:
+                self.page_counts = PageCountCache()
+            page_counts = self.page_counts
+        self.discovery = FileDiscovery(
+            folder,
+            FileFilter.from_config(config, SUPPORTED_EXTENSIONS),
+            config["batch_recursive"],
+            hash_workers,
+            page_counts,
+            self,
+        )
+        self._batch = {
+            "folder": folder,
+            "config": config,
+            "output_dir": output_dir,
+            "fingerprint": fingerprint,
+            "manifest": manifest,
+            "option_args": build_option_args(self),
+            "policy": RetryPolicy.from_config(config),
+            "devices": self.start_device_run(slots) if slots else None,
+            # 各批文件共用一个排队分组，在执行器的队列中整体大文件优先 (而不只是每批内部)
+            "queue_group": self.job_runner.new_queue_group(),
+            "submitted": 0,
+            "skipped": 0,
+            "cancelled": False,
+        }
+        self.discovery.filesFound.connect(self.submit_batch_files)
+        self.discovery.failed.connect(
+            lambda message: print(f"[ERROR] 批处理: 无法读取文件夹: {message}")
+        )
+        self.discovery.completed.connect(self.handle_discovery_completed)
+        print(
+            f"[INFO] 并行批处理: 开始扫描 {folder}, 最大并发 {self.job_runner.max_concurrent}"
+        )
+        self.discovery.start()
+        self.left_tabs.setCurrentWidget(self.queue_tab)
+
+    def submit_batch_files(self, found):
+        """提交扫描线程找到的一批文件"""
+        from .batch import build_batch_jobs, filter_outdated
+
+        batch = self._batch
+        if batch["cancelled"]:
+            return
+        cache = self.job_runner.result_cache
+        files = []
+        pages = {}
+        for path, st, digest, page_count in found:
+            if digest is not None and cache is not None:
+                cache.remember_hash(path, st, digest)
+            pages[path] = page_count
+            files.append((path, st))
+        if batch["manifest"] is not None:
+            total = len(files)
+            files = filter_outdated(
+                files,
+                batch["manifest"],
+                batch["fingerprint"],
+                root=batch["folder"],
+                output_format=batch["config"]["output_format"],
+            )
+            batch["skipped"] += total - len(files)
+
+        devices = batch["devices"]
+        groups = devices.assign(files) if devices is not None else [(None, files)]
+        jobs = []
+        for slot, group in groups:
+            group_jobs = build_batch_jobs(
+                group,
+                batch["option_args"],
+                batch["output_dir"],
+                batch["fingerprint"],
+                root=batch["folder"],
+            )
+            if slot is not None:
+                devices.add_jobs(slot, group_jobs)
+            jobs += group_jobs
+        config = batch["config"]
+        priority = PRIORITY_LEVELS.get(config["job_priority"], 0)
+        for job in jobs:
+            job.config = config
+            job.pages = pages[job.input_path]
+            job.queue_group = batch["queue_group"]
+            job.priority = priority
+            job.timeout = config["job_timeout"] * 60
+            self.retry_manager.watch(job, batch["policy"])
+            self.job_runner.submit(job)
+        batch["submitted"] += len(jobs)
+
+    def handle_discovery_completed(self, count):
+        batch = self._batch
+        self.discovery.deleteLater()
+        self.discovery = None
+        if batch["devices"] is not None:
+            batch["devices"].close()
+        if batch["cancelled"]:
+            print(f"[WORRY] 批处理: 已停止扫描 {batch['folder']}, 已提交 {batch['submitted']} 个任务")
+            return
+        if not count:
+            print(f"[WORRY] 批处理: 文件夹中没有可转换的文件: {batch['folder']}")
+            return
+        if batch["manifest"] is not None:
+            print(f"[INFO] 增量模式: 跳过 {batch['skipped']} 个已是最新的文件")
+            if not batch["submitted"]:
+                print("[INFO] 所有文件均已是最新，无需转换")
+                return
+        print(f"[INFO] 并行批处理: 扫描完成, 共 {count} 个文件, 已提交 {batch['submitted']} 个任务")
+
+    def run_sharded(self, input_path, shard_pages, slots=None):
+        """
+        大文件分片：按页面范围拆分为多个 marker_single 任务并行转换，完成后合并
+        页数不足两个分片时返回 False，按普通方式运行；给出设备槽位时分片轮流分配到各设备
+        """
+        from .pdf_pages import count_pdf_pages
+        from .sharding import ShardedConversion
+
+        try:
+            page_range = self.page_range.text().strip()
+            if page_range:
+                pages = parse_page_range(page_range)
+            else:
+                pages = list(range(count_pdf_pages(input_path)))
+        except (OSError, ValueError) as e:
+            print(f"[ERROR] 分片: 无法确定页面范围: {str(e)}")
+            return False
+        if len(pages) <= shard_pages:
+            return False
+
+        output_dir = self.output_dir.text().strip()
+        if not output_dir:
+            print("[ERROR] 分片转换需要设置输出目录")
+            return True
+
+        conversion = ShardedConversion(
+            input_path,
+            build_option_args(self),
+            output_dir,
+            pages,
+            shard_pages,
+            self.output_format.currentText(),
+            self,
+        )
+        config = self.get_current_config()
+        for job in conversion.jobs:
+            job.config = config
+            job.priority = PRIORITY_LEVELS.get(config["job_priority"], 0)
+        if slots:
+            devices = self.start_device_run(slots)
+            for index, job in enumerate(conversion.jobs):
+                devices.add_jobs(slots[index % len(slots)], [job])
+            devices.close()
+        conversion.finished.connect(self.handle_sharded_finished)
+        print(
+            f"[INFO] 分片转换: {os.path.basename(input_path)} 共 {len(pages)} 页, "
+            f"拆分为 {len(conversion.jobs)} 个分片, 最大并发 {self.job_runner.max_concurrent}"
+        )
+        self.submit_after_hashing(input_path, lambda: conversion.submit(self.job_runner))
+        self.left_tabs.setCurrentWidget(self.queue_tab)
+        return True
+
+    def start_device_run(self, slots):
+        """开始一次多设备转换，任务提交后由其跟踪各设备槽位的进度"""
+        from .device_launcher import MultiDeviceConversion
+
+        devices = MultiDeviceConversion(slots, self)
+        devices.connect_runner(self.job_runner, self.retry_manager)
+        devices.progress.connect(self.handle_device_progress)
+        devices.finished.connect(self.handle_device_finished)
+        print(
+            f"[INFO] 多设备: {', '.join(slot.label for slot in slots)}, "
+            f"每个设备 {slots[0].workers} 个工作进程"
+        )
+        return devices
+
+    def handle_device_progress(self, devices):
+        self.queue_tab.device_label.setText(f"设备: {devices.status}")
+
+    def handle_device_finished(self, devices):
+        level = "INFO" if devices.succeeded else "WORRY"
+        print(f"[{level}] 多设备转换结束:")
+        for line in devices.summary():
+            print(f"    {line}")
+        devices.deleteLater()
+
+    def handle_sharded_finished(self, conversion):
+        if conversion.succeeded:
+            elapsed = max(job.elapsed for job in conversion.jobs)
+            print(f"[INFO] 分片转换完成: 已合并到 {conversion.merged_path} (最长分片耗时 {elapsed:.1f}s)")
+        else:
+            print(f"[ERROR] 分片转换失败: {conversion.error}")
+        conversion.deleteLater()
+
+    def plan_conversion(self):
+        """预估：不运行 marker，统计输入的页数并估算耗时、峰值内存和 LLM 调用次数"""
+        from .manifest import Manifest, options_fingerprint
+        from .planner import BatchPlanner, PageCountCache, ThroughputModel
+
+        if self.planner is not None:
+            print("[WORRY] 预估: 上一次预估仍在进行中")
+            return
+        config = self.get_current_config()
+        input_path = config["input_path"].strip()
+        if not input_path:
+            print("[WORRY] 预估: 请先选择输入文件或文件夹")
+            return
+
+        # 与运行命令相同的任务划分和并发数
+        lanes = config["batch_concurrency"]
+        per_file = config["batch_mode"] or config["incremental_mode"]
+        if uses_device_slots(config):
+            try:
+                slots = device_slots(config)
+            except ValueError as e:
+                print(f"[ERROR] 多设备: {str(e)}")
+                return
+            lanes = sum(slot.workers for slot in slots)
+            per_file = True
+        if os.path.isdir(input_path) and not per_file:
+            lanes = 1
+
+        manifest = None
+        fingerprint = ""
+        output_dir = config["output_dir"].strip()
+        if config["incremental_mode"] and output_dir:
+            fingerprint = options_fingerprint(config)
+            manifest = self.manifests.get(output_dir)
+            if manifest is None:
+                manifest = self.manifests[output_dir] = Manifest(output_dir)
+
+        if self.page_counts is None:
+            self.page_counts = PageCountCache()
+        self.planner = BatchPlanner(
+            config,
+            per_file,
+            lanes,
+            self.page_counts,
+            ThroughputModel(),
+            manifest,
+            fingerprint,
+            self,
+        )
+        self.planner.planned.connect(self.handle_plan)
+        self.planner.failed.connect(lambda message: print(f"[ERROR] 预估失败: {message}"))
+        self.planner.finished.connect(self.handle_planner_finished)
+        self.plan_btn.setEnabled(False)
+        print(f"[INFO] 预估: 开始统计 {input_path}")
+        self.planner.start()
+
+    def handle_plan(self, plan):
+        for line in plan.format():
+            print(f"[INFO] 预估: {line}")
+
+    def handle_planner_finished(self):
+        self.planner.deleteLater()
+        self.planner = None
+        self.plan_btn.setEnabled(True)
+
+    def toggle_autotune(self):
+        """开始自动调优；调优进行中时取消"""
+        from .autotune import AutoTuner
+        from .batch import scan_input_files
+
+        if self.autotuner is not None:
+            self.autotuner.cancel()
+            return
+
+        input_path = self.input_path.text().strip()
+        if os.path.isdir(input_path):
+            # 文件夹输入时以其中最大的 PDF 作为样本
+            pdfs = [p for p, _ in scan_input_files(input_path) if p.lower().endswith(".pdf")]
+            input_path = pdfs[0] if pdfs else ""
+        if not input_path or not os.path.isfile(input_path):
+            print("[WORRY] 自动调优: 请先选择有效的输入文件")
+            return
+
+        try:
+            self.autotuner = AutoTuner(
+                input_path, build_option_args(self), self.page_range.text(), self
+            )
+        except ValueError as e:
+            print(f"[ERROR] 自动调优: 页面范围格式错误: {str(e)}")
+            return
+        self.autotuner.trialFinished.connect(self.handle_autotune_trial)
+        self.autotuner.finished.connect(self.handle_autotune_finished)
+        self.autotune_btn.setText("取消调优")
+
+        candidates = [trial.settings["pdftext_workers"] for trial in self.autotuner.trials]
+        print(
+            f"[INFO] 自动调优: 样本页 {self.autotuner.sample_range}, "
+            f"测试 pdftext_workers = {candidates} (先以第 {self.autotuner.warmup_range} 页预热)"
+        )
+        self.autotuner.start()
+
+    def handle_autotune_trial(self, trial):
+        if trial.succeeded:
+            memory = f"{trial.peak_rss_mb:.0f} MB" if trial.peak_rss_mb else "未知"
+            print(
+                f"[INFO] 自动调优: {trial.settings} -> {trial.pages_per_sec:.2f} 页/秒, "
+                f"耗时 {trial.job.elapsed:.1f}s (含启动 {trial.baseline[0]:.1f}s), 峰值内存 {memory}"
+            )
+        else:
+            print(f"[ERROR] 自动调优: {trial.settings} 运行失败 (退出码 {trial.job.exit_code})")
+
+    def handle_autotune_finished(self, best):
+        cancelled = self.autotuner.cancelled
+        self.autotuner.deleteLater()
+        self.autotuner = None
+        self.autotune_btn.setText("自动调优")
+
+        if cancelled:
+            print("[INFO] 自动调优已取消")
+            return
+        if best is None:
+            print("[ERROR] 自动调优失败: 所有试运行均未成功")
+            return
+
+        self.pdftext_workers.setValue(best.settings["pdftext_workers"])
+        print(f"[INFO] 自动调优完成: 最佳设置 {best.settings} ({best.pages_per_sec:.2f} 页/秒)")
+
+        preset_name = self.preset_combo.currentText()
+        if not preset_name:
+            return
+        reply = QMessageBox.question(
+            self,
+            "保存调优结果",
+            f"是否将调优结果保存到预设 '{preset_name}'?",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+        )
+        if reply == QMessageBox.StandardButton.Yes:
+            description = self.config_manager.presets.get(preset_name, {}).get(
+                "description", ""
+            )
+            if self.config_manager.save_preset(
+                preset_name, self.get_current_config(), description, overwrite=True
+            ):
+                print(f"[INFO] 调优结果已保存到预设 '{preset_name}'")
 
     # 配置项映射表 (属性名, 获取方法, 设置方法)
     _CONFIG_MAP = {
@@ -328,6 +1234,12 @@ class MarkerGUI(QMainWindow):
         "max_concurrency": ("max_concurrency", "value", "setValue"),
         "timeout": ("timeout", "value", "setValue"),
         "max_retries": ("max_retries", "value", "setValue"),
+        "llm_budget": ("llm_budget", "isChecked", "setChecked"),
+        "llm_global_concurrency": ("llm_global_concurrency", "value", "setValue"),
+        "llm_rpm": ("llm_rpm", "value", "setValue"),
+        "llm_cache": ("llm_cache", "isChecked", "setChecked"),
+        "llm_cache_dir": ("llm_cache_dir", "text", "setText"),
+        "llm_cache_size": ("llm_cache_size", "value", "setValue"),
         # 输出内容控制
         "keep_pageheader_in_output": (
             "keep_pageheader_in_output",
@@ -340,123 +1252,91 @@ class MarkerGUI(QMainWindow):
             "setChecked",
         ),
         "disable_links": ("disable_links", "isChecked", "setChecked"),
+        # 转换器 (位于控制台页)
+        "converter_cls": ("converter_cls", "currentText", "setCurrentText"),
+        "force_layout_block": ("force_layout_block", "text", "setText"),
+    }
+
+    # 高级标签页配置项映射表 (属性名, 获取方法, 设置方法)
+    _ADVANCED_CONFIG_MAP = {
+        "processors": ("processors", "text", "setText"),
+        "num_devices": ("num_devices", "value", "setValue"),
+        "debug_data_folder": ("debug_data_folder", "text", "setText"),
+        "debug_layout_images": ("debug_layout_images", "isChecked", "setChecked"),
+        "debug_pdf_images": ("debug_pdf_images", "isChecked", "setChecked"),
+        "debug_json": ("debug_json", "isChecked", "setChecked"),
+        "num_workers": ("num_workers", "value", "setValue"),
+        "device_type": ("device_type", "currentText", "setCurrentText"),
+        "device_ids": ("device_ids", "text", "setText"),
+        "batch_mode": ("batch_mode", "isChecked", "setChecked"),
+        "batch_concurrency": ("batch_concurrency", "value", "setValue"),
+        "incremental_mode": ("incremental_mode", "isChecked", "setChecked"),
+        "batch_recursive": ("batch_recursive", "isChecked", "setChecked"),
+        "batch_patterns": ("batch_patterns", "text", "setText"),
+        "batch_min_size": ("batch_min_size", "value", "setValue"),
+        "batch_max_size": ("batch_max_size", "value", "setValue"),
+        "shard_mode": ("shard_mode", "isChecked", "setChecked"),
+        "shard_pages": ("shard_pages", "value", "setValue"),
+        "memory_admission": ("memory_admission", "isChecked", "setChecked"),
+        "memory_reserve": ("memory_reserve", "value", "setValue"),
+        "warm_pool": ("warm_pool", "isChecked", "setChecked"),
+        "result_cache": ("result_cache", "isChecked", "setChecked"),
+        "result_cache_dir": ("result_cache_dir", "text", "setText"),
+        "result_cache_size": ("result_cache_size", "value", "setValue"),
+        "job_timeout": ("job_timeout", "value", "setValue"),
+        "retry_count": ("retry_count", "value", "setValue"),
+        "retry_backoff": ("retry_backoff", "value", "setValue"),
+        "retry_fallback": ("retry_fallback", "currentText", "setCurrentText"),
+        "job_priority": ("job_priority", "currentText", "setCurrentText"),
     }
 
     def _get_advanced_tab(self):
-        """获取高级设置标签页，并缓存结果以避免重复查找"""
-        if not hasattr(self, "_advanced_tab"):
-            for i in range(self.tabs.count()):
-                if self.tabs.tabText(i) == "高级设置":
-                    self._advanced_tab = self.tabs.widget(i)
-                    break
-            else:
-                self._advanced_tab = None
+        """获取高级设置标签页，尚未构建时返回 None"""
         return self._advanced_tab
 
-    def get_current_config(self):
-        """获取当前UI配置数据"""
-        config = {}
-        advanced_tab = self._get_advanced_tab()
-
-        # 处理基本配置项
-        for key, (attr, getter, _) in self._CONFIG_MAP.items():
-            if hasattr(self, attr):
-                widget = getattr(self, attr)
-                config[key] = getattr(widget, getter)()
-            else:
-                config[key] = None
-
-        # 特殊处理项 (不在映射表中的)
-        config["converter_cls"] = (
-            self.converter_cls.currentText() if hasattr(self, "converter_cls") else ""
-        )
-        config["force_layout_block"] = (
-            self.force_layout_block.text()
-            if hasattr(self, "force_layout_block")
-            else ""
-        )
-
-        # 高级标签页配置
-        if advanced_tab:
-            config["processors"] = (
-                advanced_tab.processors.text()
-                if hasattr(advanced_tab, "processors")
-                else ""
-            )
-            config["num_devices"] = (
-                advanced_tab.num_devices.value()
-                if hasattr(advanced_tab, "num_devices")
-                else 1
-            )
-            config["debug_data_folder"] = (
-                advanced_tab.debug_data_folder.text()
-                if hasattr(advanced_tab, "debug_data_folder")
-                else ""
-            )
-            config["debug_layout_images"] = (
-                advanced_tab.debug_layout_images.isChecked()
-                if hasattr(advanced_tab, "debug_layout_images")
-                else False
-            )
-            config["debug_pdf_images"] = (
-                advanced_tab.debug_pdf_images.isChecked()
-                if hasattr(advanced_tab, "debug_pdf_images")
-                else False
-            )
-            config["debug_json"] = (
-                advanced_tab.debug_json.isChecked()
-                if hasattr(advanced_tab, "debug_json")
-                else False
-            )
-            config["num_workers"] = (
-                advanced_tab.num_workers.value()
-                if hasattr(advanced_tab, "num_workers")
-                else 32
-            )
+    def _all_config_specs(self):
+        """全部配置项的 (配置项, (属性名, 获取方法, 设置方法))"""
+        yield from self._CONFIG_MAP.items()
+        yield from self._ADVANCED_CONFIG_MAP.items()
+
+    def _locate_config_widget(self, key):
+        """配置项对应的控件，尚未构建时返回 None"""
+        if key in self._ADVANCED_CONFIG_MAP:
+            if self._advanced_tab is None:
+                return None
+            return getattr(self._advanced_tab, self._ADVANCED_CONFIG_MAP[key][0], None)
+        return getattr(self, self._CONFIG_MAP[key][0], None)
+
+    def _write_config_widget(self, key, widget, value):
+        _, _, setter = self._CONFIG_MAP.get(key) or self._ADVANCED_CONFIG_MAP[key]
+        # 特殊处理组合框设置 (高级标签页的组合框只接受已有选项)
+        if (
+            key in self._CONFIG_MAP
+            and setter == "setCurrentText"
+            and isinstance(widget, QComboBox)
+        ):
+            self.set_combo_text(widget, value)
+        else:
+            getattr(widget, setter)(value)
 
-        return config
+    def get_current_config(self):
+        """获取当前UI配置数据 (由配置绑定层维护，不逐个读取控件)"""
+        return self.config_binding.values()
 
     def apply_config(self, config_data):
-        """应用配置到UI"""
-        # 使用配置映射表应用基本配置
-        for key, (attr, _, setter) in self._CONFIG_MAP.items():
-            if key in config_data and hasattr(self, attr):
-                widget = getattr(self, attr)
-                value = config_data[key]
-
-                # 特殊处理组合框设置
-                if setter == "setCurrentText" and isinstance(widget, QComboBox):
-                    self.set_combo_text(widget, value)
-                else:
-                    getattr(widget, setter)(value)
-
-        # 特殊处理项 (不在映射表中的)
-        if "converter_cls" in config_data and hasattr(self, "converter_cls"):
-            self.set_combo_text(self.converter_cls, config_data["converter_cls"])
-
-        if "force_layout_block" in config_data and hasattr(self, "force_layout_block"):
-            self.force_layout_block.setText(config_data["force_layout_block"])
-
-        # 高级标签页配置
-        advanced_tab = self._get_advanced_tab()
-        if advanced_tab:
-            advanced_configs = [
-                ("processors", "processors", "setText"),
-                ("num_devices", "num_devices", "setValue"),
-                ("debug_data_folder", "debug_data_folder", "setText"),
-                ("debug_layout_images", "debug_layout_images", "setChecked"),
-                ("debug_pdf_images", "debug_pdf_images", "setChecked"),
-                ("debug_json", "debug_json", "setChecked"),
-                ("num_workers", "num_workers", "setValue"),
-            ]
-
-            for key, attr, setter in advanced_configs:
-                if key in config_data and hasattr(advanced_tab, attr):
-                    widget = getattr(advanced_tab, attr)
-                    getattr(widget, setter)(config_data[key])
-
+        """应用配置到UI (只写入有变化的控件)"""
+        self.config_binding.apply(config_data)
         print("[INFO] 配置已成功应用到UI")
 
+    def switch_preset(self, preset_name):
+        """切换预设：预设中的配置项覆盖当前配置，其余配置项保持不变"""
+        preset_config = self.config_manager.load_preset(preset_name)
+        # 确保配置是字典类型
+        if not preset_config or not isinstance(preset_config, dict):
+            print(f"[ERROR] 加载预设失败: '{preset_name}' 无效的配置格式")
+            return
+        self.apply_config(preset_config)
+
     def save_config(self):
         # 获取当前配置名称
         current_config = self.preset_combo.currentText()
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+"""
+增量转换清单
+记录每个输入文件转换时的大小、修改时间和选项指纹，重复运行时跳过已是最新的文件
+"""
+# 标准库 imports
+import hashlib
+import json
+import os
+import time
+
+MANIFEST_NAME = ".markergui_manifest.json"
+MANIFEST_VERSION = 1
+
+# marker 各输出格式的主输出文件扩展名 (<文件名><扩展名>)
+OUTPUT_EXTENSIONS = {"markdown": ".md", "text": ".txt", "json": ".json", "html": ".html"}
+
+# 不影响转换结果的配置项，不计入选项指纹
+_NON_CONVERSION_KEYS = {
+    "input_path",
+    "output_dir",
+    "batch_mode",
+    "batch_concurrency",
+    "incremental_mode",
+    "batch_recursive",
+    "batch_patterns",
+    "batch_min_size",
+    "batch_max_size",
+    "shard_mode",
+    "shard_pages",
+    "memory_admission",
+    "memory_reserve",
+    "warm_pool",
+    "result_cache",
+    "result_cache_dir",
+    "result_cache_size",
+    "job_timeout",
+    "retry_count",
+    "retry_backoff",
+    "retry_fallback",
+    "job_priority",
+    "num_devices",
+    "num_workers",
+    "device_type",
+    "device_ids",
+    "pdftext_workers",
+    "disable_multiprocessing",
+    "gemini_api_key",
+    "claude_api_key",
+    "openai_api_key",
+    "max_concurrency",
+    "timeout",
+    "max_retries",
+    "llm_budget",
+    "llm_global_concurrency",
+    "llm_rpm",
+    "llm_cache",
+    "llm_cache_dir",
+    "llm_cache_size",
+}
+
+
+def options_fingerprint(config):
+    """计算配置中影响转换结果的选项的指纹"""
+    options = {
+        key: value
+        for key, value in config.items()
+        if key not in _NON_CONVERSION_KEYS
+    }
+    data = json.dumps(options, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()[:16]
+
+
+def input_signature(st):
+    """由 os.stat 结果得到输入文件签名 (大小, 修改时间)"""
+    return [st.st_size, st.st_mtime_ns]
+
+
+class Manifest:
+    """
+    输出目录中的增量清单
+    格式: {"version": 1, "entries": {输入路径: [大小, 修改时间(ns), 选项指纹]}}
+    """
+
+    SAVE_INTERVAL = 5.0  # 秒
+
+    def __init__(self, output_dir):
+        self.output_dir = output_dir
+        self.path = os.path.join(output_dir, MANIFEST_NAME)
+        self.entries = {}
+        self._dirty = False
+        self._last_save = 0.0
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.entries = data.get("entries", {})
+
+    def _has_output(self, path, root=None, output_format=None):
+        """
+        marker 将结果写入 output_dir/<文件名(不含扩展名)>/；给出 root 时 (批处理) 为
+        output_dir/<相对 root 的子目录>/<文件名>/，与 batch.build_batch_jobs 的输出位置一致
+        给出 output_format 时检查其中的主输出文件 (见 OUTPUT_EXTENSIONS)，否则只检查目录
+        每次检查都读取磁盘 (只对清单中已记录且未变化的文件检查)，不缓存输出目录的内容
+        """
+        folder = self.output_dir
+        if root:
+            subdir = os.path.relpath(os.path.dirname(path), root)
+            if subdir != ".":
+                folder = os.path.join(folder, subdir)
+        stem = os.path.splitext(os.path.basename(path))[0]
+        ext = OUTPUT_EXTENSIONS.get(output_format)
+        if ext is None:
+            return os.path.isdir(os.path.join(folder, stem))
+        return os.path.isfile(os.path.join(folder, stem, stem + ext))
+
+    def is_up_to_date(self, path, signature, fingerprint, root=None, output_format=None):
+        """
+        输入文件和选项均未变化且输出仍存在时返回 True
+        root 为批处理的输入文件夹，output_format 为本次的输出格式
+        """
+        entry = self.entries.get(os.path.abspath(path))
+        if entry is None or entry != signature + [fingerprint]:
+            return False
+        return self._has_output(path, root, output_format)
+
+    def record(self, path, signature, fingerprint):
+        """记录一次成功的转换"""
+        self.entries[os.path.abspath(path)] = list(signature) + [fingerprint]
+        self._dirty = True
+
+    def save(self, force=True):
+        """原子写入清单；force=False 时距上次保存不足 SAVE_INTERVAL 则跳过"""
+        if not self._dirty:
+            return
+        if not force and time.monotonic() - self._last_save < self.SAVE_INTERVAL:
+            return
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": MANIFEST_VERSION, "entries": self.entries},
+                    f,
+                    ensure_ascii=False,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[ERROR] 保存增量清单失败: {str(e)}")
+            return
+        self._dirty = False
+        self._last_save = time.monotonic()
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+选项数据模型
+与 get_current_config / config/default.json 相同形状的配置字典，默认值与界面控件初始值保持一致
+本模块不依赖 Qt，可供命令行入口直接使用
+"""
+# 标准库 imports
+import os
+
+DEFAULT_OPTIONS = {
+    # 基本设置
+    "input_path": "",
+    "output_dir": "",
+    "output_format": "markdown",
+    "page_range": "",
+    # 基本选项
+    "paginate_output": False,
+    "image_extraction_mode": "提取图片 (默认)",
+    "disable_multiprocessing": False,
+    "debug_mode": False,
+    "pdftext_workers": 4,
+    # OCR选项
+    "format_lines": False,
+    "ocr_mode": "标准OCR (默认)",
+    "strip_existing_ocr": False,
+    "ocr_task_name": "ocr_with_boxes",
+    "disable_ocr_math": False,
+    "drop_repeated_text": False,
+    # LLM选项
+    "use_llm": False,
+    "redo_inline_math": False,
+    "llm_service": "Google Gemini (默认)",
+    "gemini_api_key": "",
+    "gemini_model_name": "gemini-2.0-flash",
+    "vertex_project_id": "",
+    "vertex_location": "us-central1",
+    "ollama_base_url": "http://localhost:11434",
+    "ollama_model": "llama3.2-vision",
+    "claude_api_key": "",
+    "claude_model_name": "claude-3-7-sonnet-20250219",
+    "openai_api_key": "",
+    "openai_model": "gpt-4o-mini",
+    "openai_base_url": "https://api.openai.com/v1",
+    "max_concurrency": 3,
+    "timeout": 30,
+    "max_retries": 2,
+    "llm_budget": False,
+    "llm_global_concurrency": 6,
+    "llm_rpm": 0,
+    "llm_cache": False,
+    "llm_cache_dir": "",
+    "llm_cache_size": 1024,
+    # 输出内容控制
+    "keep_pageheader_in_output": False,
+    "keep_pagefooter_in_output": False,
+    "disable_links": False,
+    # 转换器
+    "converter_cls": "marker.converters.pdf.PdfConverter (默认)",
+    "force_layout_block": "",
+    # 高级设置
+    "processors": "",
+    "num_devices": 1,
+    "debug_data_folder": "",
+    "debug_layout_images": False,
+    "debug_pdf_images": False,
+    "debug_json": False,
+    "num_workers": 32,
+    "device_type": "GPU (CUDA)",
+    "device_ids": "",
+    "batch_mode": False,
+    "batch_concurrency": max(1, (os.cpu_count() or 2) // 4),
+    "job_priority": "普通",
+    "incremental_mode": False,
+    "batch_recursive": False,
+    "batch_patterns": "",
+    "batch_min_size": 0,
+    "batch_max_size": 0,
+    "shard_mode": False,
+    "shard_pages": 100,
+    "memory_admission": True,
+    "memory_reserve": 2048,
+    "warm_pool": False,
+    "result_cache": False,
+    "result_cache_dir": "",
+    "result_cache_size": 10240,
+    "job_timeout": 0,
+    "retry_count": 1,
+    "retry_backoff": 10,
+    "retry_fallback": "不使用",
+}
+
+
+def resolve_config(*layers):
+    """
+    以 DEFAULT_OPTIONS 为底依次叠加配置 (如预设设置、命令行覆盖项)
+    与切换预设时的行为一致：只接受已知配置项
+    """
+    config = dict(DEFAULT_OPTIONS)
+    for layer in layers:
+        for key, value in (layer or {}).items():
+            if key in config:
+                config[key] = value
+    return config
+
+
+def coerce_option(key, value):
+    """
+    按默认值的类型转换配置值 (如预设文件中的 "4" 或 "true")
+    无法转换时抛出 ValueError
+    """
+    default = DEFAULT_OPTIONS[key]
+    if isinstance(default, bool):
+        if isinstance(value, str):
+            text = value.strip().lower()
+            if text in ("1", "true", "yes", "on"):
+                return True
+            if text in ("0", "false", "no", "off", ""):
+                return False
+        elif isinstance(value, (bool, int)) or value is None:
+            return bool(value)
+        raise ValueError(f"配置项 {key} 应为布尔值 (true/false): {value!r}")
+    if isinstance(default, int):
+        if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+            raise ValueError(f"配置项 {key} 应为整数: {value!r}")
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"配置项 {key} 应为整数: {value!r}")
+    return "" if value is None else str(value)
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+"""
+PDF 页数统计
+按 startxref → trailer 的 /Root → 文档目录的 /Pages 找到页面树根节点，读取其 /Count，
+不解析内容、不渲染页面；目录或根节点位于压缩对象流 (/ObjStm) 中时解压对象流后再查找
+文件结构无法识别时才回退为扫描全文件中页面树节点 (/Type /Pages) 的 /Count
+"""
+# 标准库 imports
+import mmap
+import re
+import zlib
+
+_PAGES_RE = re.compile(
+    rb"/Type\s*/Pages\b[^>]*?/Count\s+(\d+)|/Count\s+(\d+)[^>]*?/Type\s*/Pages\b"
+)
+_PAGE_RE = re.compile(rb"/Type\s*/Page\b")
+_OBJSTM_RE = re.compile(rb"/Type\s*/ObjStm\b")
+_STREAM_RE = re.compile(rb"stream\r?\n")
+
+_ROOT_RE = re.compile(rb"/Root\s+(\d+)\s+\d+\s+R")
+_PREV_RE = re.compile(rb"/Prev\s+(\d+)")
+_PAGES_REF_RE = re.compile(rb"/Pages\s+(\d+)\s+\d+\s+R")
+_COUNT_RE = re.compile(rb"/Count\s+(\d+)\b(?!\s+\d+\s+R)")
+_FIRST_RE = re.compile(rb"/First\s+(\d+)")
+
+# 读取对象、trailer 时最多查看的字节数
+_OBJECT_WINDOW = 1 << 16
+
+
+def _max_count(data):
+    counts = [int(a or b) for a, b in _PAGES_RE.findall(data)]
+    return max(counts, default=0)
+
+
+def _object_streams(data):
+    """依次产出文件中的对象流 (对象流字典, 解压后的内容)"""
+    for match in _OBJSTM_RE.finditer(data):
+        stream = _STREAM_RE.search(data, match.end())
+        if stream is None:
+            continue
+        start = data.rfind(b"obj", max(0, match.start() - 1024), match.start())
+        header = data[start if start >= 0 else match.start() : stream.start()]
+        try:
+            yield header, zlib.decompressobj().decompress(
+                data[stream.end() : stream.end() + (1 << 24)]
+            )
+        except zlib.error:
+            continue
+
+
+def _trailer(data, offset):
+    """offset 处的交叉引用表之后的 trailer 字典，或交叉引用流 (PDF 1.5) 的字典"""
+    if data[offset : offset + 4] == b"xref":
+        start = data.find(b"trailer", offset)
+        if start < 0:
+            return b""
+        section = data[start : start + _OBJECT_WINDOW]
+    else:
+        section = data[offset : offset + _OBJECT_WINDOW]
+        end = section.find(b"stream")
+        if end >= 0:
+            section = section[:end]
+    end = section.find(b"startxref")
+    return section[:end] if end >= 0 else section
+
+
+def _root_object(data):
+    """文档目录的对象编号：从最后一个 startxref 指向的 trailer 读取 /Root，没有时沿 /Prev 向前查找"""
+    position = data.rfind(b"startxref")
+    if position < 0:
+        return None
+    match = re.match(rb"startxref\s+(\d+)", data[position : position + 64])
+    if match is None:
+        return None
+    offset = int(match.group(1))
+    seen = set()
+    while 0 <= offset < len(data) and offset not in seen:
+        seen.add(offset)
+        trailer = _trailer(data, offset)
+        root = _ROOT_RE.search(trailer)
+        if root is not None:
+            return int(root.group(1))
+        prev = _PREV_RE.search(trailer)
+        if prev is None:
+            return None
+        offset = int(prev.group(1))
+    return None
+
+
+def _compressed_object(data, number):
+    """在对象流中查找对象 number 的内容，文件中靠后的对象流 (增量更新) 优先"""
+    found = None
+    for header, stream in _object_streams(data):
+        first = _FIRST_RE.search(header)
+        if first is None:
+            continue
+        first = int(first.group(1))
+        numbers = [int(value) for value in stream[:first].split()]
+        pairs = list(zip(numbers[0::2], numbers[1::2]))
+        for index, (object_number, offset) in enumerate(pairs):
+            if object_number != number:
+                continue
+            end = pairs[index + 1][1] if index + 1 < len(pairs) else len(stream) - first
+            found = stream[first + offset : first + end]
+    return found
+
+
+def _object(data, number):
+    """
+    对象 number 的内容 (到 endobj 为止)
+    增量更新后同一对象可能有多个版本，新版本追加在文件末尾，取最后一个
+    """
+    last = None
+    for last in re.finditer(rb"(?<![0-9])%d\s+\d+\s+obj\b" % number, data):
+        pass
+    if last is None:
+        return _compressed_object(data, number)
+    end = data.find(b"endobj", last.end(), last.end() + _OBJECT_WINDOW)
+    return data[last.end() : end if end >= 0 else last.end() + _OBJECT_WINDOW]
+
+
+def _root_count(data):
+    """页面树根节点的 /Count；文件结构无法识别时返回 0"""
+    root = _root_object(data)
+    if root is None:
+        return 0
+    catalog = _object(data, root)
+    pages = _PAGES_REF_RE.search(catalog or b"")
+    if pages is None:
+        return 0
+    tree = _object(data, int(pages.group(1)))
+    count = _COUNT_RE.search(tree or b"")
+    return int(count.group(1)) if count is not None else 0
+
+
+def count_pdf_pages(path):
+    """
+    返回 PDF 页数，即文档目录所指页面树根节点的 /Count
+    无法按文件结构读取时回退为页面树节点中最大的 /Count，再回退为统计 /Type /Page 对象个数；
+    不是 PDF 时返回 0
+    """
+    with open(path, "rb") as f:
+        if f.read(5) != b"%PDF-":
+            return 0
+        f.seek(0, 2)
+        if f.tell() == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            count = _root_count(data)
+            if count:
+                return count
+            count = _max_count(data)
+            if count:
+                return count
+            for _, stream in _object_streams(data):
+                count = max(count, _max_count(stream))
+            if count:
+                return count
+            return len(_PAGE_RE.findall(data))
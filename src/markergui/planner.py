@@ -0,0 +1,396 @@
+# -*- coding: utf-8 -*-
+"""
+转换预估 (试运行规划)
+不运行 marker，统计输入的文件数和页数 (PDF 只读取页面树，多线程并按文件大小/修改时间缓存)，
+用历史运行报告中相同转换器、OCR 模式和 LLM 设置的吞吐量估算总耗时、峰值内存和 LLM 调用次数
+"""
+# 标准库 imports
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor
+
+# 第三方库 imports
+from PySide6.QtCore import QThread, Signal
+
+# 本地 imports
+from .admission import MB, MemoryEstimator, available_memory
+from .batch import SUPPORTED_EXTENSIONS, filter_outdated
+from .command_generator import parse_page_range
+from .discovery import PAGE_COUNT_WORKERS, FileFilter, iter_files
+from .manifest import input_signature
+from .pdf_pages import count_pdf_pages
+from .run_report import load_run_reports
+
+PAGE_COUNT_CACHE = os.path.join("cache", "page_counts.json")
+
+# 单页图片
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tif", ".tiff", ".webp"}
+
+# 没有历史报告时的估计值
+DEFAULT_STARTUP_SECONDS = 30.0  # 加载模型
+DEFAULT_SECONDS_PER_PAGE = {False: 1.0, True: 3.0}  # 是否启用 LLM
+DEFAULT_LLM_CALLS_PER_PAGE = 1.0
+
+# 吞吐量按这些配置项分组
+PROFILE_KEYS = ("converter_cls", "ocr_mode", "use_llm")
+
+
+class PageCountCache:
+    """
+    PDF 页数缓存，按 (路径, 大小, 修改时间) 失效
+    保存在 cache/page_counts.json，同一会话中重复预估直接使用内存中的结果
+    """
+
+    def __init__(self, path=PAGE_COUNT_CACHE):
+        self.path = path
+        self._entries = None  # 路径 -> [大小, 修改时间(ns), 页数]
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def get(self, path, st):
+        with self._lock:
+            self._load()
+            entry = self._entries.get(path)
+        if entry is not None and entry[:2] == input_signature(st):
+            return entry[2]
+        return None
+
+    def put(self, path, st, pages):
+        with self._lock:
+            self._load()
+            self._entries[path] = input_signature(st) + [pages]
+            self._dirty = True
+
+    def save(self):
+        """有新结果时原子写入缓存文件 (临时文件 + 替换)"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"[WORRY] 保存页数缓存失败: {str(e)}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def _pdf_pages_or_none(path):
+    try:
+        return count_pdf_pages(path) or None
+    except (OSError, ValueError):
+        return None
+
+
+class ThroughputModel:
+    """
+    从历史运行报告学习 "每个任务耗时 = 启动开销 + 页数 × 每页耗时"
+    优先使用转换器、OCR 模式和 LLM 设置都相同的报告，没有时使用全部报告，再没有时使用默认值
+    """
+
+    def __init__(self):
+        self.reports = []
+        self._loaded_dirs = set()
+
+    def load(self, output_dir):
+        if output_dir in self._loaded_dirs:
+            return
+        self._loaded_dirs.add(output_dir)
+        for report in load_run_reports(output_dir):
+            if report.get("succeeded") and report.get("pages") and report.get("wall_time"):
+                self.reports.append(report)
+
+    def _matching(self, config):
+        profile = [config[key] for key in PROFILE_KEYS]
+        return [
+            report
+            for report in self.reports
+            if [report.get("settings", {}).get(key) for key in PROFILE_KEYS] == profile
+        ]
+
+    def fit(self, config):
+        """返回 (启动开销秒数, 每页秒数, 每页 LLM 调用次数, 来源说明)"""
+        reports = self._matching(config)
+        source = f"{len(reports)} 条相同转换器/OCR/LLM 设置的历史报告"
+        if not reports:
+            reports = self.reports
+            source = f"{len(reports)} 条其他设置的历史报告"
+        if not reports:
+            return (
+                DEFAULT_STARTUP_SECONDS,
+                DEFAULT_SECONDS_PER_PAGE[bool(config["use_llm"])],
+                DEFAULT_LLM_CALLS_PER_PAGE,
+                "默认值 (没有历史报告)",
+            )
+
+        xs = [report["pages"] for report in reports]
+        ys = [report["wall_time"] for report in reports]
+        # 最小二乘拟合，页数样本不足两种时全部计为每页耗时
+        startup, per_page = 0.0, sum(ys) / sum(xs)
+        if len(set(xs)) > 1:
+            n = len(xs)
+            mean_x = sum(xs) / n
+            mean_y = sum(ys) / n
+            var = sum((x - mean_x) ** 2 for x in xs)
+            slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var
+            if slope > 0 and mean_y - slope * mean_x >= 0:
+                startup, per_page = mean_y - slope * mean_x, slope
+
+        # 报告中记录了 LLM 请求数时按实际比例估算
+        llm = [r for r in reports if r.get("llm_requests") is not None]
+        llm_per_page = DEFAULT_LLM_CALLS_PER_PAGE
+        if llm:
+            llm_per_page = sum(r["llm_requests"] for r in llm) / sum(r["pages"] for r in llm)
+        return startup, per_page, llm_per_page, source
+
+
+class BatchPlan:
+    """一次预估的结果"""
+
+    def __init__(self):
+        self.files = 0
+        self.pages = 0
+        self.skipped = 0  # 增量模式下已是最新的文件
+        self.counted = 0  # 统计了页数的 PDF
+        self.cache_hits = 0
+        self.unknown = 0  # 页数未知 (非 PDF 文档)，按平均页数估计
+        self.max_pages = 0  # 单个任务的最大页数
+        self.jobs = 0
+        self.lanes = 1  # 同时运行的任务数
+        self.memory_limited = False  # 同时运行的任务数受可用内存限制
+        self.startup = 0.0
+        self.per_page = 0.0
+        self.source = ""
+        self.wall_seconds = 0.0
+        self.job_mb = 0.0
+        self.peak_mb = 0.0
+        self.llm_calls = 0
+        self.llm_limited = False  # 预计耗时受 LLM 每分钟请求数上限限制
+        self.scan_seconds = 0.0
+
+    def format(self):
+        """运行日志中的摘要行"""
+        lines = [
+            f"{self.files} 个文件, 共 {self.pages} 页"
+            + (f", 跳过 {self.skipped} 个已是最新的文件" if self.skipped else "")
+            + (f", {self.unknown} 个非 PDF 文档按平均页数估计" if self.unknown else "")
+            + f" (页数缓存命中 {self.cache_hits}/{self.counted}, 用时 {self.scan_seconds:.2f}s)",
+            f"吞吐量: {self.source}, 启动 {self.startup:.1f}s + 每页 {self.per_page:.2f}s",
+            f"{self.jobs} 个任务, 同时运行 {self.lanes} 个"
+            + (" (受可用内存限制)" if self.memory_limited else "")
+            + f", 预计耗时 {format_duration(self.wall_seconds)}"
+            + (" (受 LLM 每分钟请求数上限限制)" if self.llm_limited else ""),
+            f"峰值内存: 每个任务约 {self.job_mb:.0f} MB, 同时运行时共约 {self.peak_mb:.0f} MB",
+        ]
+        if self.llm_calls:
+            lines.append(f"LLM 调用约 {self.llm_calls} 次")
+        return lines
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m {seconds % 60:02d}s"
+    return f"{seconds // 3600}h {seconds % 3600 // 60:02d}m"
+
+
+def makespan(durations, lanes):
+    """按从长到短依次分配给最早空闲的并发槽位，返回全部完成的时间"""
+    finish = [0.0] * max(1, min(lanes, len(durations)))
+    for duration in sorted(durations, reverse=True):
+        heapq.heapreplace(finish, finish[0] + duration)
+    return max(finish, default=0.0)
+
+
+class BatchPlanner(QThread):
+    """
+    后台预估线程
+    per_file 为 True 时文件夹中每个文件一个任务，按批处理设置 (过滤、递归、增量清单) 列出文件，
+    否则整个文件夹交给一个 marker 进程；lanes 为同时运行的任务数 (批处理并发数或各设备槽位工作进程数之和)
+    """
+
+    planned = Signal(object)  # BatchPlan
+    failed = Signal(str)
+
+    def __init__(
+        self,
+        config,
+        per_file,
+        lanes,
+        page_cache,
+        throughput,
+        manifest=None,
+        fingerprint="",
+        parent=None,
+    ):
+        super().__init__(parent)
+        self.config = config
+        self.per_file = per_file
+        self.lanes = lanes
+        self.page_cache = page_cache
+        self.throughput = throughput
+        self.manifest = manifest
+        self.fingerprint = fingerprint
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def run(self):
+        try:
+            plan = self.plan()
+        except (OSError, ValueError) as e:
+            self.failed.emit(str(e))
+            return
+        if plan is not None:
+            self.planned.emit(plan)
+
+    def _list_files(self, plan):
+        config = self.config
+        input_path = config["input_path"].strip()
+        if os.path.isfile(input_path):
+            return [(input_path, os.stat(input_path))]
+        if not os.path.isdir(input_path):
+            raise ValueError(f"输入路径不存在: {input_path}")
+        if self.per_file:
+            file_filter = FileFilter.from_config(config, SUPPORTED_EXTENSIONS)
+            files = list(iter_files(input_path, file_filter, config["batch_recursive"]))
+        else:
+            # 文件夹整体交给 marker 时只处理顶层文件
+            files = list(iter_files(input_path, FileFilter(SUPPORTED_EXTENSIONS)))
+        if self.manifest is not None:
+            total = len(files)
+            files = filter_outdated(
+                files,
+                self.manifest,
+                self.fingerprint,
+                root=input_path,
+                output_format=config["output_format"],
+            )
+            plan.skipped = total - len(files)
+        return files
+
+    def count_pages(self, files, plan):
+        """返回每个文件的页数，未知为 None；未缓存的 PDF 在线程池中统计"""
+        pages = [None] * len(files)
+        missing = []
+        for i, (path, st) in enumerate(files):
+            ext = os.path.splitext(path)[1].lower()
+            if ext in IMAGE_EXTENSIONS:
+                pages[i] = 1
+            elif ext == ".pdf":
+                plan.counted += 1
+                cached = self.page_cache.get(path, st)
+                if cached is not None:
+                    pages[i] = cached
+                    plan.cache_hits += 1
+                else:
+                    missing.append(i)
+        if missing:
+            with ThreadPoolExecutor(PAGE_COUNT_WORKERS) as pool:
+                results = pool.map(lambda i: _pdf_pages_or_none(files[i][0]), missing)
+                for i, count in zip(missing, results):
+                    if self._cancelled.is_set():
+                        pool.shutdown(cancel_futures=True)
+                        return None
+                    pages[i] = count
+                    if count is not None:
+                        self.page_cache.put(files[i][0], files[i][1], count)
+            self.page_cache.save()
+        return pages
+
+    def plan(self):
+        config = self.config
+        plan = BatchPlan()
+        start = time.monotonic()
+        files = self._list_files(plan)
+        pages = self.count_pages(files, plan)
+        if pages is None:
+            return None
+        plan.scan_seconds = time.monotonic() - start
+        plan.files = len(files)
+
+        # 页面范围对每个文件分别生效
+        page_range = config["page_range"].strip()
+        selected = parse_page_range(page_range) if page_range else None
+        known = [count for count in pages if count is not None]
+        average = round(sum(known) / len(known)) if known else 1
+        per_file = []
+        for count in pages:
+            if count is None:
+                plan.unknown += 1
+                count = average
+            if selected is not None:
+                count = bisect_left(selected, count)
+            per_file.append(count)
+        plan.pages = sum(per_file)
+
+        # 单个 PDF 启用分片时按分片数并行
+        jobs = per_file
+        single = len(files) == 1 and os.path.isfile(config["input_path"].strip())
+        if single and config["shard_mode"] and files[0][0].lower().endswith(".pdf"):
+            shard = max(1, config["shard_pages"])
+            count = per_file[0]
+            jobs = [shard] * (count // shard) + ([count % shard] if count % shard else [])
+        plan.jobs = len(jobs) if self.per_file or single else 1
+        plan.max_pages = max(jobs, default=0)
+
+        # 吞吐量
+        self.throughput.load(config["output_dir"].strip())
+        plan.startup, plan.per_page, llm_per_page, plan.source = self.throughput.fit(config)
+
+        # 内存：每个任务的峰值内存，启用内存准入时同时运行的任务数受可用内存限制
+        estimator = MemoryEstimator()
+        estimator.load(config["output_dir"].strip())
+        plan.job_mb = estimator.estimate_mb(plan.max_pages)
+        lanes = max(1, min(self.lanes, plan.jobs))
+        available = available_memory()
+        if config["memory_admission"] and available is not None:
+            budget = available / MB - config["memory_reserve"]
+            fit = max(1, int(budget // plan.job_mb)) if plan.job_mb else lanes
+            if fit < lanes:
+                lanes = fit
+                plan.memory_limited = True
+        plan.lanes = lanes
+        plan.peak_mb = plan.job_mb * lanes
+
+        # 耗时：文件夹整体交给 marker 时只加载一次模型；预热进程每个并发槽位只加载一次
+        if plan.jobs == 1 and len(jobs) > 1:
+            plan.wall_seconds = plan.startup + plan.pages * plan.per_page
+        elif config["warm_pool"]:
+            durations = [count * plan.per_page for count in jobs]
+            plan.wall_seconds = plan.startup + makespan(durations, lanes)
+        else:
+            durations = [plan.startup + count * plan.per_page for count in jobs]
+            plan.wall_seconds = makespan(durations, lanes)
+
+        if config["use_llm"]:
+            plan.llm_calls = int(math.ceil(plan.pages * llm_per_page))
+            # 启用 LLM 请求预算时全部请求至少需要 请求数 / 每分钟上限 分钟
+            if config["llm_budget"] and config["llm_rpm"]:
+                floor = plan.llm_calls / config["llm_rpm"] * 60
+                if floor > plan.wall_seconds:
+                    plan.wall_seconds = floor
+                    plan.llm_limited = True
+        return plan
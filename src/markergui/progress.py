@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+marker 进度解析
+识别 tqdm 进度条输出，维护每个文档、每个阶段的进度、速率和剩余时间
+"""
+# 标准库 imports
+import re
+
+# 第三方库 imports
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtWidgets import QGridLayout, QGroupBox, QLabel, QProgressBar, QVBoxLayout
+
+# tqdm 默认格式: "{desc}: {percentage}%|{bar}| {n}/{total} [{elapsed}<{remaining}, {rate}]"
+_TQDM_RE = re.compile(
+    r"(?P<desc>[^|:]+?):\s*(?P<pct>\d+)%\|[^|]*\|\s*(?P<n>\d+)/(?P<total>\d+)"
+    r"\s*\[(?P<elapsed>[\d:]+)<(?P<remaining>[\d:]+|\?)"
+    r"(?:,\s*(?P<rate>[\d.]+|\?)\s*(?P<unit>[^,\]\s/]*/s|s/[^,\]\s]*))?"
+)
+
+
+def parse_duration(text):
+    """将 tqdm 的 "mm:ss" 或 "h:mm:ss" 转换为秒，无法解析时返回 None"""
+    if not text or text == "?":
+        return None
+    seconds = 0
+    for part in text.split(":"):
+        if not part.isdigit():
+            return None
+        seconds = seconds * 60 + int(part)
+    return seconds
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "--:--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+class StageProgress:
+    """单个处理阶段的进度"""
+
+    def __init__(self, name):
+        self.name = name
+        self.current = 0
+        self.total = 0
+        self.rate = None  # 每秒处理项数
+        self.eta = None  # 剩余秒数
+        self.elapsed = 0  # 本阶段累计耗时 (秒)
+        self._bar_elapsed = 0  # 当前进度条已用时间
+        self._done_elapsed = 0  # 之前进度条累计时间
+
+    def update(self, current, total, elapsed, eta, rate):
+        # 同名阶段重新开始一个新进度条时累计之前的耗时
+        if current < self.current or total != self.total:
+            self._done_elapsed += self._bar_elapsed
+        self.current = current
+        self.total = total
+        self.eta = eta
+        self.rate = rate
+        if elapsed is not None:
+            self._bar_elapsed = elapsed
+        self.elapsed = self._done_elapsed + self._bar_elapsed
+
+    @property
+    def fraction(self):
+        return self.current / self.total if self.total else 0.0
+
+
+def parse_progress_line(line):
+    """
+    解析一行 tqdm 输出，返回 (阶段名, 当前, 总数, 已用秒数, 剩余秒数, 速率)
+    不是进度条时返回 None
+    """
+    match = _TQDM_RE.search(line)
+    if match is None:
+        return None
+
+    rate = None
+    raw_rate, unit = match.group("rate"), match.group("unit") or ""
+    if raw_rate and raw_rate != "?":
+        rate = float(raw_rate)
+        if unit.startswith("s/"):  # "s/it" 表示每项耗时
+            rate = 1.0 / rate if rate else None
+
+    return (
+        match.group("desc").strip(),
+        int(match.group("n")),
+        int(match.group("total")),
+        parse_duration(match.group("elapsed")),
+        parse_duration(match.group("remaining")),
+        rate,
+    )
+
+
+class ProgressModel(QObject):
+    """
+    结构化进度模型
+    以任务为单位 (每个任务对应一个文档) 记录各阶段的 StageProgress
+    """
+
+    progressChanged = Signal(object)  # 任务 ID
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.stages = {}  # 任务 ID -> {阶段名: StageProgress}，按出现顺序
+
+    def feed(self, job_id, line):
+        """解析输出行，是进度条时更新模型并返回 True"""
+        parsed = parse_progress_line(line)
+        if parsed is None:
+            return False
+        name, current, total, elapsed, eta, rate = parsed
+        stages = self.stages.setdefault(job_id, {})
+        stage = stages.get(name)
+        if stage is None:
+            stage = stages[name] = StageProgress(name)
+        stage.update(current, total, elapsed, eta, rate)
+        self.progressChanged.emit(job_id)
+        return True
+
+    def job_stages(self, job_id):
+        return list(self.stages.get(job_id, {}).values())
+
+    def stage_times(self, job_id):
+        """各阶段耗时 (秒)"""
+        return {stage.name: stage.elapsed for stage in self.job_stages(job_id)}
+
+    def forget(self, job_id):
+        self.stages.pop(job_id, None)
+
+
+class ProgressPanel(QGroupBox):
+    """
+    转换进度面板
+    显示最近更新的文档各阶段进度条，以及所有运行中任务的吞吐量；
+    显示的任务结束后改为显示其他运行中的任务，没有时清空进度条
+    """
+
+    REFRESH_INTERVAL = 200  # 毫秒
+
+    def __init__(self, model, job_runner, parent=None):
+        super().__init__("转换进度", parent)
+        self.model = model
+        self.job_runner = job_runner
+        self.current_job = None
+        self._shown_job_id = None
+        self._rows = {}
+
+        layout = QVBoxLayout(self)
+        self.title_label = QLabel("暂无运行中的转换")
+        layout.addWidget(self.title_label)
+        self.grid = QGridLayout()
+        layout.addLayout(self.grid)
+        self.throughput_label = QLabel()
+        layout.addWidget(self.throughput_label)
+
+        model.progressChanged.connect(self._on_progress)
+        job_runner.jobStarted.connect(self._on_job_started)
+        job_runner.jobFinished.connect(self._on_job_finished)
+
+        # 限制刷新频率，避免每个进度更新都重绘
+        self._dirty = False
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_INTERVAL)
+        self._timer.timeout.connect(self.refresh)
+        self._timer.start()
+
+    def _on_job_started(self, job):
+        self.current_job = job
+        self._dirty = True
+
+    def _on_job_finished(self, job):
+        if self.current_job is job:
+            running = self.job_runner.running_jobs()
+            self.current_job = running[-1] if running else None
+        self._dirty = True
+
+    def _on_progress(self, job_id):
+        if self.current_job is None or self.current_job.id != job_id:
+            for job in self.job_runner.running_jobs():
+                if job.id == job_id:
+                    self.current_job = job
+                    break
+        self._dirty = True
+
+    def _clear_rows(self):
+        while self.grid.count():
+            item = self.grid.takeAt(0)
+            if item.widget() is not None:
+                item.widget().deleteLater()
+        self._rows = {}
+
+    def _row(self, name):
+        row = self._rows.get(name)
+        if row is None:
+            index = len(self._rows)
+            label = QLabel(name)
+            bar = QProgressBar()
+            bar.setFormat("%v / %m")
+            info = QLabel()
+            self.grid.addWidget(label, index, 0)
+            self.grid.addWidget(bar, index, 1)
+            self.grid.addWidget(info, index, 2)
+            row = self._rows[name] = (bar, info)
+        return row
+
+    def refresh(self):
+        if not self._dirty:
+            return
+        self._dirty = False
+
+        job = self.current_job
+        if job is None and self._shown_job_id is not None:
+            self._clear_rows()
+            self._shown_job_id = None
+            self.title_label.setText("暂无运行中的转换")
+        if job is not None:
+            if self._shown_job_id != job.id:
+                self._clear_rows()
+                self._shown_job_id = job.id
+            self.title_label.setText(f"#{job.id} {job.label}")
+            for stage in self.model.job_stages(job.id):
+                bar, info = self._row(stage.name)
+                bar.setMaximum(max(1, stage.total))
+                bar.setValue(stage.current)
+                rate = f"{stage.rate:.2f} it/s" if stage.rate else "-- it/s"
+                info.setText(
+                    f"{rate}  用时 {format_duration(stage.elapsed)}"
+                    f"  剩余 {format_duration(stage.eta)}"
+                )
+
+        # 汇总所有运行中任务当前阶段的速率
+        running = self.job_runner.running_jobs()
+        total_rate = 0.0
+        for running_job in running:
+            stages = self.model.job_stages(running_job.id)
+            active = [s for s in stages if s.current < s.total and s.rate]
+            if active:
+                total_rate += active[-1].rate
+        self.throughput_label.setText(
+            f"运行中任务: {len(running)}  总吞吐量: {total_rate:.2f} it/s"
+        )
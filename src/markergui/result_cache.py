@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+转换结果缓存
+以输入文件内容的哈希和影响输出的选项为键保存 marker_single 的输出 (Markdown/JSON/HTML 及图片)，
+相同文件以相同选项再次转换时直接从缓存复制 (支持时以写时复制克隆) 到输出目录，不再运行 marker
+"""
+# 标准库 imports
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# 本地 imports
+from .command_generator import option_value, split_options
+
+RESULT_CACHE_DIR = os.path.join("cache", "results")
+ENTRY_NAME = "entry.json"
+MB = 1024 * 1024
+
+# Linux 的 FICLONE ioctl：在 btrfs、XFS 等文件系统上克隆文件，共享数据块直到任一方被修改
+_FICLONE = 0x40049409
+
+# 不影响输出内容的参数，不计入缓存键
+_NON_OUTPUT_OPTIONS = {
+    "--output_dir",
+    "--pdftext_workers",
+    "--disable_multiprocessing",
+    "--max_concurrency",
+    "--timeout",
+    "--max_retries",
+    "--gemini_api_key",
+    "--claude_api_key",
+    "--openai_api_key",
+}
+
+# 调试输出写到其他目录，无法完整缓存
+_UNCACHEABLE_OPTIONS = {
+    "--debug",
+    "--debug_data_folder",
+    "--debug_layout_images",
+    "--debug_pdf_images",
+    "--debug_json",
+}
+
+
+def _tree_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+
+def _snapshot(folder):
+    """目录中已有的文件 {相对路径: (大小, 修改时间(ns))}，目录不存在时为空"""
+    files = {}
+    for root, _, names in os.walk(folder):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            files[os.path.relpath(path, folder)] = (st.st_size, st.st_mtime_ns)
+    return files
+
+
+def _clone_or_copy(src, dst):
+    """
+    复制文件，文件系统支持时以写时复制方式克隆
+    缓存条目与输出文件必须相互独立，不能使用硬链接：就地修改输出文件会同时改坏缓存
+    """
+    if fcntl is not None and sys.platform.startswith("linux"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                fcntl.ioctl(fdst.fileno(), _FICLONE, fsrc.fileno())
+            shutil.copystat(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+class ResultCache:
+    """
+    按内容寻址的转换结果缓存
+    目录结构: <root>/<键前两位>/<键>/ 下为输出文件和 entry.json；
+    条目目录的修改时间作为最近使用时间，超过容量上限时淘汰最久未使用的条目
+    """
+
+    def __init__(self, root=RESULT_CACHE_DIR, max_bytes=10240 * MB):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._index = None  # 键 -> [最近使用时间, 字节数]
+        self._hashes = {}  # (路径, 大小, 修改时间) -> 内容哈希
+
+    # ---- 键 ----
+
+    def remember_hash(self, path, st, digest):
+        """记录已在后台计算好的内容哈希 (见 discovery.FileDiscovery / HashThread)"""
+        self._hashes[(path, st.st_size, st.st_mtime_ns)] = digest
+
+    def known_hash(self, path):
+        """已记录的内容哈希；未记录、文件已变化或无法访问时返回 None"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return self._hashes.get((path, st.st_size, st.st_mtime_ns))
+
+    def cache_key(self, job):
+        """
+        计算任务的缓存键；无法缓存的任务返回 None
+        内容哈希须在提交前由后台线程算好，未记录时不查询也不保存缓存 (不在界面线程中读取整个文件)
+        """
+        if job.argv[:1] != ["marker_single"] or len(job.argv) < 2:
+            return None
+        args = job.argv[2:]
+        options = split_options(args)
+        names = {name for name, _ in options}
+        if "--output_dir" not in names or names & _UNCACHEABLE_OPTIONS:
+            return None
+        content = self.known_hash(job.argv[1])
+        if content is None:
+            return None
+        normalized = sorted(
+            (name, value) for name, value in options if name not in _NON_OUTPUT_OPTIONS
+        )
+        data = json.dumps([content, normalized], ensure_ascii=False)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.root, key[:2], key)
+
+    @staticmethod
+    def _output_folder(job):
+        """marker 将结果写到 <输出目录>/<输入文件名 (不含扩展名)>/"""
+        stem = os.path.splitext(os.path.basename(job.argv[1]))[0]
+        return stem, os.path.join(option_value(job.argv[2:], "--output_dir"), stem)
+
+    # ---- 索引与淘汰 ----
+
+    def _load_index(self):
+        if self._index is not None:
+            return
+        self._index = {}
+        if not os.path.isdir(self.root):
+            return
+        for bucket in os.scandir(self.root):
+            if not bucket.is_dir() or len(bucket.name) != 2:
+                continue
+            for entry in os.scandir(bucket.path):
+                try:
+                    with open(os.path.join(entry.path, ENTRY_NAME), "r", encoding="utf-8") as f:
+                        size = json.load(f)["size"]
+                    self._index[entry.name] = [entry.stat().st_mtime, size]
+                except (OSError, ValueError, KeyError):
+                    continue
+
+    @property
+    def total_bytes(self):
+        self._load_index()
+        return sum(size for _, size in self._index.values())
+
+    def evict(self):
+        """超过容量上限时按最近使用时间淘汰条目"""
+        self._load_index()
+        total = self.total_bytes
+        for key, (_, size) in sorted(self._index.items(), key=lambda item: item[1][0]):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            del self._index[key]
+            total -= size
+
+    # ---- 读写 ----
+
+    def snapshot_outputs(self, job):
+        """
+        未命中缓存的任务启动前记录输出目录中已有的文件
+        之前以其他选项运行留下的输出 (如旧的 .json、图片) 不属于本次转换，保存缓存时排除
+        """
+        if self.cache_key(job) is None:
+            return
+        job.output_snapshot = _snapshot(self._output_folder(job)[1])
+
+    def materialize(self, job):
+        """缓存命中时将输出复制到输出目录并返回 True"""
+        key = self.cache_key(job)
+        if key is None:
+            return False
+        entry_dir = self._entry_dir(key)
+        try:
+            with open(os.path.join(entry_dir, ENTRY_NAME), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            stem, output_folder = self._output_folder(job)
+            os.makedirs(output_folder, exist_ok=True)
+            for name in entry["files"]:
+                # 输出文件以输入文件名命名，内容相同但文件名不同时重命名
+                target = name
+                if os.sep not in name and name.startswith(entry["stem"]):
+                    target = stem + name[len(entry["stem"]) :]
+                dst = os.path.join(output_folder, target)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                if os.path.lexists(dst):
+                    os.remove(dst)
+                _clone_or_copy(os.path.join(entry_dir, name), dst)
+            os.utime(entry_dir)
+        except (OSError, ValueError, KeyError):
+            self.misses += 1
+            return False
+
+        self._load_index()
+        self._index[key] = [time.time(), entry["size"]]
+        self.hits += 1
+        return True
+
+    def store(self, job):
+        """保存成功任务本次产生的输出 (新建或启动后改写过的文件)"""
+        key = self.cache_key(job)
+        if key is None:
+            return
+        self._load_index()
+        if key in self._index:
+            return
+        stem, output_folder = self._output_folder(job)
+        if not os.path.isdir(output_folder):
+            return
+
+        before = job.output_snapshot or {}
+        produced = [
+            rel for rel, signature in _snapshot(output_folder).items()
+            if before.get(rel) != signature
+        ]
+        if not produced:
+            return
+
+        entry_dir = self._entry_dir(key)
+        tmp_dir = f"{entry_dir}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(tmp_dir)
+            files = []
+            for rel in produced:
+                dst = os.path.join(tmp_dir, rel)
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                _clone_or_copy(os.path.join(output_folder, rel), dst)
+                files.append(rel)
+            size = _tree_size(tmp_dir)
+            entry = {"stem": stem, "files": files, "size": size, "created": time.time()}
+            with open(os.path.join(tmp_dir, ENTRY_NAME), "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            # 整个目录改名即完成写入；其他实例已写入同一条目时保留已有的
+            os.rename(tmp_dir, entry_dir)
+        except OSError as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(entry_dir):
+                print(f"[WORRY] 保存结果缓存失败: {str(e)}")
+            return
+        self._index[key] = [time.time(), size]
+        self.evict()
+
+    @property
+    def status(self):
+        """命中统计与占用空间，显示在任务队列页"""
+        lookups = self.hits + self.misses
+        ratio = f" ({self.hits / lookups:.0%})" if lookups else ""
+        return (
+            f"命中 {self.hits} / 查询 {lookups}{ratio}, "
+            f"占用 {self.total_bytes / MB:.0f} / {self.max_bytes / MB:.0f} MB"
+        )
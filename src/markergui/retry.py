@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+批处理失败隔离与重试
+每个文件单独运行并设置超时；失败时判断原因 (崩溃、超时、内存不足、非零退出)，
+按退避时间重新排到队尾，可改用备用选项 (如 --force_ocr) 重试，
+多次失败的文件写入隔离报告，不影响其他文件的转换
+"""
+# 标准库 imports
+import json
+import os
+import time
+
+# 第三方库 imports
+from PySide6.QtCore import QObject, QTimer, Signal
+
+# 本地 imports
+from .command_generator import build_config_args, option_value, override_option
+from .job_runner import Job
+from .run_report import redact_argv
+
+QUARANTINE_NAME = "markergui_quarantine.jsonl"
+
+FAILURE_LABELS = {
+    "crash": "崩溃",
+    "timeout": "超时",
+    "oom": "内存不足",
+    "exit": "非零退出",
+    "start": "启动失败",
+}
+
+# 启动失败 (如 marker 未安装) 重试也不会成功
+RETRYABLE_FAILURES = {"crash", "timeout", "oom", "exit"}
+
+# 备用选项：重试时在任务配置上覆盖的配置项，由命令生成器生成对应参数
+FALLBACK_OPTIONS = {
+    "不使用": {},
+    "强制OCR (--force_ocr)": {"ocr_mode": "强制OCR (扫描所有)"},
+    "禁用多进程 (--disable_multiprocessing)": {"disable_multiprocessing": True},
+    "强制OCR + 禁用多进程": {
+        "ocr_mode": "强制OCR (扫描所有)",
+        "disable_multiprocessing": True,
+    },
+}
+
+_OOM_PATTERNS = (
+    "out of memory",
+    "outofmemoryerror",
+    "memoryerror",
+    "cannot allocate memory",
+)
+_SIGKILL = 9
+
+
+def classify_failure(job):
+    """判断失败任务的原因"""
+    if job.timed_out:
+        return "timeout"
+    if job.error:
+        return "start"
+    output = "\n".join(job.tail).lower()
+    if any(pattern in output for pattern in _OOM_PATTERNS):
+        return "oom"
+    # 未经本程序结束却被 SIGKILL 终止，通常是系统 OOM killer
+    if job.crashed:
+        return "oom" if job.exit_code == _SIGKILL else "crash"
+    if job.exit_code == 128 + _SIGKILL:
+        return "oom"
+    return "exit"
+
+
+class RetryPolicy:
+    """重试策略：重试次数、退避时间 (每次翻倍) 和备用选项"""
+
+    def __init__(self, retries=1, backoff=10, fallback="不使用"):
+        self.retries = retries
+        self.backoff = backoff
+        self.fallback_name = fallback
+        self.fallback = FALLBACK_OPTIONS.get(fallback, {})
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(config["retry_count"], config["retry_backoff"], config["retry_fallback"])
+
+    def to_record(self):
+        """保存到持久化任务队列的形式，RetryPolicy(*record) 可还原"""
+        return [self.retries, self.backoff, self.fallback_name]
+
+    def delay(self, attempt):
+        """第 attempt 次运行失败后的等待时间 (秒)"""
+        return self.backoff * 2 ** (attempt - 1)
+
+    def apply(self, config):
+        """在任务配置上叠加备用选项，没有备用选项或配置时原样返回"""
+        if not self.fallback or not config:
+            return config
+        config = dict(config)
+        config.update(self.fallback)
+        return config
+
+    def argv(self, job):
+        """重试命令：marker_single 任务在配置上叠加备用选项后重新生成参数"""
+        if not self.fallback or not job.config or job.argv[:1] != ["marker_single"]:
+            return list(job.argv)
+        args = build_config_args(self.apply(job.config))
+        # 保留原任务的输出目录 (递归批处理时为对应的子目录)
+        output_dir = option_value(job.argv[2:], "--output_dir")
+        if output_dir is not None:
+            args = override_option(args, "--output_dir", output_dir)
+        return ["marker_single", job.input_path] + args
+
+
+def append_quarantine_report(record, output_dir):
+    """隔离报告保存在输出目录中；未设置输出目录时保存到 logs/"""
+    path = os.path.join(output_dir or "logs", QUARANTINE_NAME)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"[ERROR] 保存隔离报告失败: {str(e)}")
+        return ""
+    return path
+
+
+class RetryManager(QObject):
+    """
+    监听任务执行器，按策略重试失败的任务
+    退避期间不占用并发槽位，重试任务排到队尾，其他文件的转换照常进行
+    """
+
+    retryScheduled = Signal(object, float)  # 失败的任务, 等待秒数
+    jobRetried = Signal(object, object)  # 失败的任务, 重新提交的任务
+    jobQuarantined = Signal(object, str)  # 失败的任务, 隔离报告路径
+    retryCancelled = Signal(object)  # 失败的任务 (等待中的重试被取消)
+
+    def __init__(self, runner, parent=None):
+        super().__init__(parent)
+        self.runner = runner
+        self._policies = {}  # 任务 ID -> RetryPolicy
+        self._attempts = {}  # 任务 ID -> 本次为第几次运行
+        self._failures = {}  # 任务 ID -> 历次失败记录
+        self._timers = {}  # 退避计时器 -> 失败的任务
+        runner.jobFinished.connect(self._on_job_finished)
+
+    def watch(self, job, policy, attempt=1):
+        """按策略重试该任务，attempt 为本次是第几次运行 (恢复的任务从记录的次数继续)"""
+        self._policies[job.id] = policy
+        self._attempts[job.id] = attempt
+        self._failures[job.id] = []
+
+    def retry_state(self, job):
+        """任务的 [重试策略记录, 本次为第几次运行]，未按策略重试的任务返回 None"""
+        policy = self._policies.get(job.id)
+        if policy is None:
+            return None
+        return [policy.to_record(), self._attempts[job.id]]
+
+    @property
+    def pending(self):
+        """等待退避结束的重试数"""
+        return len(self._timers)
+
+    def cancel(self):
+        """取消所有等待中的重试 (窗口关闭或全部取消时调用)"""
+        timers, self._timers = self._timers, {}
+        for timer, job in timers.items():
+            timer.stop()
+            timer.deleteLater()
+            self.retryCancelled.emit(job)
+
+    def _on_job_finished(self, job):
+        policy = self._policies.pop(job.id, None)
+        if policy is None:
+            return
+        attempt = self._attempts.pop(job.id)
+        failures = self._failures.pop(job.id)
+        if job.succeeded or job.cancelled:
+            return
+
+        kind = classify_failure(job)
+        failures.append(
+            {
+                "attempt": attempt,
+                "failure": kind,
+                "exit_code": job.exit_code,
+                "elapsed": round(job.elapsed, 3),
+                "argv": redact_argv(job.argv),
+                "output": list(job.tail),
+            }
+        )
+        label = FAILURE_LABELS[kind]
+
+        if kind in RETRYABLE_FAILURES and attempt <= policy.retries:
+            delay = policy.delay(attempt)
+            job.failure = f"{label}，{delay:g}s 后重试"
+            device = f"[{job.device}] " if job.device else ""
+            retry = Job(
+                policy.argv(job),
+                env=job.env,
+                label=f"{device}{os.path.basename(job.input_path) or job.label} (重试 {attempt})",
+                input_path=job.input_path,
+                output_dir=job.output_dir,
+            )
+            retry.config = policy.apply(job.config)
+            retry.input_signature = job.input_signature
+            retry.pages = job.pages
+            retry.options_fingerprint = job.options_fingerprint
+            if retry.config is not job.config and job.options_fingerprint:
+                from .manifest import options_fingerprint
+
+                # 增量清单按实际使用的选项记录，之后以原选项运行时会重新转换该文件
+                retry.options_fingerprint = options_fingerprint(retry.config)
+            retry.timeout = job.timeout
+            retry.slot = job.slot
+            retry.priority = job.priority
+            retry.device = job.device
+            self._policies[retry.id] = policy
+            self._attempts[retry.id] = attempt + 1
+            self._failures[retry.id] = failures
+
+            timer = QTimer(self)
+            timer.setSingleShot(True)
+            timer.timeout.connect(lambda: self._submit(timer, job, retry))
+            self._timers[timer] = job
+            timer.start(int(delay * 1000))
+            self.retryScheduled.emit(job, delay)
+            return
+
+        if kind == "start":
+            # 与文件本身无关，不写入隔离报告
+            job.failure = label
+            return
+        job.failure = f"{label}，已隔离"
+        record = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "input_path": job.input_path,
+            "attempts": failures,
+        }
+        self.jobQuarantined.emit(job, append_quarantine_report(record, job.output_dir))
+
+    def _submit(self, timer, job, retry):
+        del self._timers[timer]
+        timer.deleteLater()
+        self.runner.submit(retry)
+        self.jobRetried.emit(job, retry)
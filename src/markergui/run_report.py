@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+运行性能报告
+在任务运行期间采样子进程树 (Linux 下读取 /proc)，结束后生成报告并以 JSON Lines 保存
+"""
+# 标准库 imports
+import json
+import os
+import time
+
+REPORT_NAME = "markergui_runs.jsonl"
+
+# 影响性能的配置项，写入报告便于比较不同预设
+TUNING_KEYS = [
+    "converter_cls",
+    "ocr_mode",
+    "use_llm",
+    "pdftext_workers",
+    "disable_multiprocessing",
+    "num_devices",
+    "num_workers",
+    "device_type",
+    "batch_concurrency",
+]
+
+_PROC = "/proc"
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+def _read(path):
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def _children(pid):
+    """读取直接子进程 (需要内核支持 /proc/<pid>/task/<tid>/children)"""
+    children = []
+    for tid in os.listdir(f"{_PROC}/{pid}/task"):
+        children += [int(c) for c in _read(f"{_PROC}/{pid}/task/{tid}/children").split()]
+    return children
+
+
+def process_tree(pid):
+    """返回 pid 及其所有后代进程的 pid 列表"""
+    tree = []
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        tree.append(current)
+        try:
+            stack += _children(current)
+        except OSError:
+            continue
+    return tree
+
+
+def _cpu_ticks(pid):
+    """utime + stime (时钟滴答)，进程名可能含空格，从最后一个 ")" 之后解析"""
+    stat = _read(f"{_PROC}/{pid}/stat")
+    if not stat:
+        return None
+    fields = stat[stat.rfind(")") + 2 :].split()
+    return int(fields[11]) + int(fields[12])
+
+
+def _rss_bytes(pid):
+    statm = _read(f"{_PROC}/{pid}/statm").split()
+    return int(statm[1]) * _PAGE_SIZE if len(statm) > 1 else 0
+
+
+class ProcessSampler:
+    """
+    子进程树采样器
+    记录峰值常驻内存 (所有进程 RSS 之和) 和累计 CPU 时间；非 Linux 平台不采样
+    """
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.enabled = bool(pid) and os.path.isdir(f"{_PROC}/{pid}")
+        self.rss = 0  # 最近一次采样的 RSS
+        self.peak_rss = 0
+        self.cpu_seconds = 0.0
+        self.samples = 0
+        self._last_ticks = {}
+
+    def sample(self):
+        if not self.enabled:
+            return
+        rss = 0
+        for pid in process_tree(self.pid):
+            ticks = _cpu_ticks(pid)
+            if ticks is None:
+                continue
+            rss += _rss_bytes(pid)
+            last = self._last_ticks.get(pid, 0)
+            if ticks > last:
+                self.cpu_seconds += (ticks - last) / _CLK_TCK
+            self._last_ticks[pid] = ticks
+        self.rss = rss
+        self.peak_rss = max(self.peak_rss, rss)
+        self.samples += 1
+
+
+def redact_argv(argv):
+    """隐藏命令中的 API 密钥"""
+    redacted = list(argv)
+    for i, arg in enumerate(redacted[:-1]):
+        if arg.endswith("_api_key"):
+            redacted[i + 1] = "***"
+    return redacted
+
+
+def count_pages(stages):
+    """从进度模型中推断页数：优先使用版面识别阶段的总数"""
+    totals = [stage.total for stage in stages if "layout" in stage.name.lower()]
+    if not totals:
+        totals = [stage.total for stage in stages]
+    return max(totals, default=0)
+
+
+def build_run_report(job, stages, preset=""):
+    """生成单次运行的性能报告"""
+    sampler = job.sampler
+    wall = job.elapsed
+    pages = count_pages(stages)
+    config = job.config
+
+    report = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(job.start_time)),
+        "job_id": job.id,
+        "input": job.input_path,
+        "argv": redact_argv(job.argv),
+        "preset": preset,
+        "settings": {key: config[key] for key in TUNING_KEYS if key in config},
+        "exit_code": job.exit_code,
+        "succeeded": job.succeeded,
+        "wall_time": round(wall, 3),
+        "pages": pages,
+        "pages_per_sec": round(pages / wall, 3) if pages and wall else None,
+        "peak_rss_mb": None,
+        "cpu_percent": None,
+        "stage_times": {stage.name: stage.elapsed for stage in stages},
+        "execution": "cold",
+    }
+    if job.device:
+        report["device"] = job.device
+    warm = job.warm_stats
+    if warm is not None:
+        # 预热进程：wall_time 为本次请求延迟 (首个请求包含模型加载)，
+        # cold_start_s 为同样转换以 marker_single 单独运行时的估计耗时 (模型加载 + 转换)
+        report["execution"] = "warm"
+        report["worker_request"] = warm["request"]
+        report["worker_load_s"] = warm["worker_load_s"]
+        if warm["worker_load_s"] is not None and warm["convert_s"] is not None:
+            report["cold_start_s"] = round(warm["worker_load_s"] + warm["convert_s"], 3)
+    if job.llm_stats is not None:
+        # 经过 LLM 请求预算代理的请求统计
+        report.update(job.llm_stats.report())
+    if sampler is not None and sampler.samples:
+        report["peak_rss_mb"] = round(sampler.peak_rss / 1024 / 1024, 1)
+        report["cpu_percent"] = round(sampler.cpu_seconds / wall * 100, 1) if wall else None
+    return report
+
+
+def report_path(output_dir):
+    """报告保存在输出目录中；未设置输出目录时保存到 logs/"""
+    return os.path.join(output_dir or "logs", REPORT_NAME)
+
+
+def append_run_report(report, output_dir):
+    path = report_path(output_dir)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"[ERROR] 保存运行报告失败: {str(e)}")
+        return ""
+    return path
+
+
+def load_run_reports(output_dir):
+    """读取输出目录中的历史运行报告"""
+    reports = []
+    try:
+        with open(report_path(output_dir), "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    reports.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return reports
+
+
+def format_report(report):
+    """一行摘要，用于运行日志"""
+    parts = [f"耗时 {report['wall_time']:.1f}s"]
+    if report["pages"]:
+        parts.append(f"{report['pages']} 页")
+    if report["pages_per_sec"]:
+        parts.append(f"{report['pages_per_sec']:.2f} 页/秒")
+    if report["peak_rss_mb"] is not None:
+        parts.append(f"峰值内存 {report['peak_rss_mb']:.0f} MB")
+    if report["cpu_percent"] is not None:
+        parts.append(f"平均 CPU {report['cpu_percent']:.0f}%")
+    if report.get("cold_start_s") is not None:
+        parts.append(
+            f"预热进程第 {report['worker_request']} 个请求 (冷启动约 {report['cold_start_s']:.1f}s)"
+        )
+    if report.get("llm_requests") is not None:
+        notes = [
+            f"{label} {report[key]}"
+            for key, label in (
+                ("llm_retries", "重试"),
+                ("llm_timeouts", "超时"),
+                ("llm_rate_limited", "限流"),
+                ("llm_errors", "失败"),
+            )
+            if report.get(key)
+        ]
+        if report.get("llm_cache_hit_ratio") is not None:
+            notes.append(f"缓存命中 {report['llm_cache_hit_ratio']:.0%}")
+        parts.append(
+            f"LLM 请求 {report['llm_requests']} 次" + (f" ({', '.join(notes)})" if notes else "")
+        )
+    return ", ".join(parts)
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+"""
+页面范围分片
+将一个大 PDF 按页面范围拆分为多个 marker_single 任务并行转换，全部完成后按页序合并输出
+"""
+# 标准库 imports
+import json
+import os
+import re
+import shutil
+
+# 第三方库 imports
+from PySide6.QtCore import QObject, Signal
+
+# 本地 imports
+from .command_generator import format_page_range, override_option
+from .job_runner import Job
+from .manifest import OUTPUT_EXTENSIONS
+
+SHARD_DIR_NAME = ".markergui_shards"
+
+
+def plan_shards(pages, shard_pages):
+    """将页码列表按 shard_pages 页一组拆分为连续的分片"""
+    shard_pages = max(1, shard_pages)
+    return [pages[i : i + shard_pages] for i in range(0, len(pages), shard_pages)]
+
+
+def _merge_json(documents):
+    """合并 marker 的 JSON 输出：依次拼接顶层 children (页面) 列表"""
+    merged = documents[0]
+    for document in documents[1:]:
+        merged.setdefault("children", []).extend(document.get("children") or [])
+    return merged
+
+
+def _merge_meta(metas):
+    """合并 *_meta.json：拼接目录和每页统计，其余字段取第一个分片"""
+    merged = metas[0]
+    for meta in metas[1:]:
+        for key in ("table_of_contents", "page_stats"):
+            if isinstance(meta.get(key), list):
+                merged.setdefault(key, []).extend(meta[key])
+    return merged
+
+
+def _rewrite_image_refs(text, renames):
+    """将 Markdown/HTML 中对改名图片的引用 (](name)、src="name") 替换为新文件名"""
+    for old, new in renames.items():
+        pattern = re.compile(r"""(\]\(|src=\\?["'])""" + re.escape(old) + r"""(?=[)"'\\\s])""")
+        text = pattern.sub(lambda m, new=new: m.group(1) + new, text)
+    return text
+
+
+def merge_shard_outputs(shard_dirs, stem, output_dir, output_format="markdown"):
+    """
+    将各分片的输出合并到 output_dir/<stem>/
+    marker 在 --page_range 下保留原始页码，图片名 (_page_N_...) 通常不会冲突，直接移动；
+    万一与已合并的文件重名，改名为 shard<序号>_<原名> 并同步改写该分片输出中的引用
+    返回合并后的主输出文件路径
+    """
+    ext = OUTPUT_EXTENSIONS.get(output_format, ".md")
+    target_dir = os.path.join(output_dir, stem)
+    os.makedirs(target_dir, exist_ok=True)
+
+    contents, metas = [], []
+    for index, shard_dir in enumerate(shard_dirs):
+        folder = os.path.join(shard_dir, stem)
+        main_file = os.path.join(folder, stem + ext)
+        meta_file = os.path.join(folder, stem + "_meta.json")
+
+        # 移动图片等附属文件
+        renames = {}
+        for name in os.listdir(folder):
+            if name in (stem + ext, stem + "_meta.json"):
+                continue
+            target = os.path.join(target_dir, name)
+            if os.path.exists(target):
+                renames[name] = f"shard{index}_{name}"
+                target = os.path.join(target_dir, renames[name])
+            shutil.move(os.path.join(folder, name), target)
+
+        with open(main_file, "r", encoding="utf-8") as f:
+            text = _rewrite_image_refs(f.read(), renames)
+        contents.append(json.loads(text) if ext == ".json" else text)
+        if os.path.exists(meta_file):
+            with open(meta_file, "r", encoding="utf-8") as f:
+                metas.append(json.load(f))
+
+    main_path = os.path.join(target_dir, stem + ext)
+    with open(main_path, "w", encoding="utf-8") as f:
+        if ext == ".json":
+            json.dump(_merge_json(contents), f, ensure_ascii=False, indent=2)
+        else:
+            f.write("\n\n".join(content.strip("\n") for content in contents) + "\n")
+    if metas:
+        with open(os.path.join(target_dir, stem + "_meta.json"), "w", encoding="utf-8") as f:
+            json.dump(_merge_meta(metas), f, ensure_ascii=False, indent=2)
+    return main_path
+
+
+class ShardedConversion(QObject):
+    """
+    一个分片转换
+    为每个分片生成独立输出目录的 marker_single 任务，全部成功后合并结果
+    """
+
+    finished = Signal(object)  # 自身
+
+    def __init__(self, input_path, option_args, output_dir, pages, shard_pages,
+                 output_format="markdown", parent=None):
+        super().__init__(parent)
+        self.input_path = input_path
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.stem = os.path.splitext(os.path.basename(input_path))[0]
+        self.work_dir = os.path.join(output_dir, SHARD_DIR_NAME, self.stem)
+        self.merged_path = ""
+        self.error = ""
+
+        self.jobs = []
+        self.shard_dirs = []
+        shards = plan_shards(pages, shard_pages)
+        for index, shard in enumerate(shards):
+            shard_dir = os.path.join(self.work_dir, f"{index:04d}")
+            page_range = format_page_range(shard)
+            args = override_option(option_args, "--output_dir", shard_dir)
+            args = override_option(args, "--page_range", page_range)
+            job = Job(
+                ["marker_single", input_path] + args,
+                label=f"{os.path.basename(input_path)} [{page_range}]",
+                input_path=input_path,
+                output_dir=output_dir,
+            )
+            # 单个分片无法脱离合并步骤恢复，不写入持久化任务队列
+            job.persistent = False
+            self.jobs.append(job)
+            self.shard_dirs.append(shard_dir)
+        self._pending = {job.id for job in self.jobs}
+
+    def submit(self, job_runner):
+        job_runner.jobFinished.connect(self._on_job_finished)
+        self._runner = job_runner
+        for job in self.jobs:
+            job_runner.submit(job)
+
+    @property
+    def succeeded(self):
+        return bool(self.merged_path)
+
+    def _on_job_finished(self, job):
+        if job.id not in self._pending:
+            return
+        self._pending.discard(job.id)
+        if self._pending:
+            return
+        self._runner.jobFinished.disconnect(self._on_job_finished)
+
+        failed = [job for job in self.jobs if not job.succeeded]
+        if failed:
+            self.error = f"{len(failed)} 个分片转换失败，分片输出保留在 {self.work_dir}"
+        else:
+            try:
+                self.merged_path = merge_shard_outputs(
+                    self.shard_dirs, self.stem, self.output_dir, self.output_format
+                )
+                shutil.rmtree(self.work_dir, ignore_errors=True)
+                try:
+                    os.rmdir(os.path.dirname(self.work_dir))  # 仅在没有其他分片转换时删除
+                except OSError:
+                    pass
+            except (OSError, ValueError) as e:
+                self.error = f"合并分片输出失败: {str(e)}"
+        self.finished.emit(self)
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""
+启动耗时分析
+使用 --profile-startup 参数或设置环境变量 MARKERGUI_PROFILE_STARTUP=1 启动时，
+按阶段 (导入模块、加载配置、构建标签页、首次绘制) 输出启动耗时
+"""
+# 标准库 imports
+import os
+import sys
+import time
+
+# 第三方库 imports
+from PySide6.QtCore import QEvent, QObject
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_ENV = "MARKERGUI_PROFILE_STARTUP"
+
+
+def profiling_requested(argv=None):
+    argv = sys.argv if argv is None else argv
+    return PROFILE_FLAG in argv or os.environ.get(PROFILE_ENV) == "1"
+
+
+class StartupProfiler(QObject):
+    """记录各启动阶段耗时，窗口首次绘制后输出汇总"""
+
+    def __init__(self):
+        super().__init__()
+        self.enabled = False
+        self.phases = []  # [(阶段名, 秒)]
+        self._origin = None
+        self._last = None
+        self._on_first_paint = None
+
+    def start(self, origin=None):
+        """开始计时；origin 为进程入口处记录的 time.perf_counter()"""
+        self.enabled = True
+        self._origin = self._last = origin if origin is not None else time.perf_counter()
+
+    def mark(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds in self.phases)
+
+    def watch_first_paint(self, widget, callback=None):
+        """窗口首次绘制时记录"首次绘制"阶段，输出汇总后调用 callback"""
+        if not self.enabled:
+            return
+        self._on_first_paint = callback
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            self.mark("首次绘制")
+            self.report()
+            if self._on_first_paint is not None:
+                self._on_first_paint()
+        return False
+
+    def report(self):
+        # 主窗口会重定向 sys.stdout，直接写到原始输出
+        out = sys.__stdout__
+        out.write("[INFO] 启动耗时:\n")
+        for name, seconds in self.phases:
+            out.write(f"  {name:<8} {seconds * 1000:8.1f} ms\n")
+        out.write(f"  {'合计':<8} {self.total * 1000:8.1f} ms\n")
+        out.flush()
+
+
+PROFILER = StartupProfiler()
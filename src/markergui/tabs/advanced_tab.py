@@ -12,6 +12,11 @@ from PySide6.QtWidgets import (
     QVBoxLayout,
 )
 from PySide6.QtCore import Qt
+import os
+from ..devices import DEVICE_TYPES, uses_device_slots
+from ..job_runner import PRIORITY_LEVELS
+from ..result_cache import RESULT_CACHE_DIR
+from ..retry import FALLBACK_OPTIONS
 
 
 class AdvancedTab(BaseTab):
@@ -50,14 +55,175 @@ class AdvancedTab(BaseTab):
         num_workers_layout.addWidget(self.num_workers)
         gpu_layout.addRow(num_workers_layout)
 
+        self.device_type = QComboBox()
+        self.device_type.addItems(list(DEVICE_TYPES))
+        self.device_type.setToolTip(
+            "CPU: 不使用 GPU，按设备数量模拟多个槽位，可在没有 GPU 的机器上测试多设备转换"
+        )
+        gpu_layout.addRow("设备类型:", self.device_type)
+
+        self.device_ids = QLineEdit()
+        self.device_ids.setPlaceholderText("留空使用 0 ~ GPU数量-1，如 0,2,3")
+        self.device_ids.setToolTip("指定使用的 GPU 编号 (CUDA_VISIBLE_DEVICES)，设置后忽略 GPU 数量")
+        gpu_layout.addRow("设备编号:", self.device_ids)
+        gpu_layout.addRow(
+            QLabel("多设备时输入文件按大小分配到各设备，每个设备同时运行的任务数为工作进程数")
+        )
+
         gpu_group.setLayout(gpu_layout)
         self.add_to_layout(gpu_group)
 
-        # 连接信号：当GPU数量改变时更新工作进程状态
+        # 连接信号：当设备设置改变时更新工作进程状态
         self.num_devices.valueChanged.connect(self.update_workers_state)
+        self.device_type.currentIndexChanged.connect(self.update_workers_state)
+        self.device_ids.textChanged.connect(self.update_workers_state)
+        parent.config_binding.add_dependent(
+            ["num_devices", "device_type", "device_ids"], self.update_workers_state
+        )
         # 初始化工作进程状态
         self.update_workers_state()
 
+        # 批处理设置
+        batch_group = QGroupBox("批处理设置")
+        batch_layout = QFormLayout()
+
+        self.batch_mode = QCheckBox("并行批处理 (文件夹中每个文件单独运行 marker_single)")
+        batch_layout.addRow(self.batch_mode)
+
+        self.batch_concurrency = QSpinBox()
+        self.batch_concurrency.setRange(1, 64)
+        self.batch_concurrency.setValue(max(1, (os.cpu_count() or 2) // 4))
+        batch_layout.addRow("最大并发任务数:", self.batch_concurrency)
+
+        self.job_priority = QComboBox()
+        self.job_priority.addItems(list(PRIORITY_LEVELS))
+        self.job_priority.setCurrentText("普通")
+        self.job_priority.setToolTip(
+            "新提交任务的优先级：高优先级的任务排在所有低优先级的排队任务之前 (不打断运行中的任务)"
+        )
+        batch_layout.addRow("提交优先级:", self.job_priority)
+
+        self.incremental_mode = QCheckBox("增量模式 (跳过输入和选项均未变化的文件)")
+        self.incremental_mode.setToolTip(
+            "在输出目录中维护转换清单，仅转换新增、修改过或选项发生变化的文件"
+        )
+        batch_layout.addRow(self.incremental_mode)
+
+        self.batch_recursive = QCheckBox("包含子文件夹 (输出按子文件夹分开保存)")
+        batch_layout.addRow(self.batch_recursive)
+
+        self.batch_patterns = QLineEdit()
+        self.batch_patterns.setPlaceholderText("全部支持的文件，如 *.pdf; report_*")
+        self.batch_patterns.setToolTip("文件名通配符，多个用分号分隔，满足其一即可")
+        batch_layout.addRow("文件名过滤:", self.batch_patterns)
+
+        self.batch_min_size = QSpinBox()
+        self.batch_min_size.setRange(0, 10485760)
+        self.batch_min_size.setSuffix(" KB")
+        self.batch_min_size.setSpecialValueText("不限")
+        self.batch_max_size = QSpinBox()
+        self.batch_max_size.setRange(0, 1048576)
+        self.batch_max_size.setSuffix(" MB")
+        self.batch_max_size.setSpecialValueText("不限")
+        size_layout = QHBoxLayout()
+        size_layout.addWidget(self.batch_min_size)
+        size_layout.addWidget(QLabel("至"))
+        size_layout.addWidget(self.batch_max_size)
+        batch_layout.addRow("文件大小:", size_layout)
+
+        self.shard_mode = QCheckBox("大文件分片 (按页面范围拆分并行转换后合并)")
+        self.shard_mode.setToolTip(
+            "单个 PDF 页数超过分片页数时，每个分片单独运行 marker_single，完成后按页序合并输出"
+        )
+        batch_layout.addRow(self.shard_mode)
+
+        self.shard_pages = QSpinBox()
+        self.shard_pages.setRange(10, 1000)
+        self.shard_pages.setValue(100)
+        batch_layout.addRow("每个分片页数:", self.shard_pages)
+
+        self.memory_admission = QCheckBox("内存准入控制 (可用内存不足时暂停启动新任务)")
+        self.memory_admission.setChecked(True)
+        self.memory_admission.setToolTip(
+            "根据历史运行报告估算每个任务的峰值内存，仅在系统可用内存足够时启动排队中的任务"
+        )
+        batch_layout.addRow(self.memory_admission)
+
+        self.memory_reserve = QSpinBox()
+        self.memory_reserve.setRange(0, 65536)
+        self.memory_reserve.setSingleStep(256)
+        self.memory_reserve.setValue(2048)
+        self.memory_reserve.setSuffix(" MB")
+        batch_layout.addRow("保留系统内存:", self.memory_reserve)
+
+        self.warm_pool = QCheckBox("预热进程 (marker_single 任务在常驻进程中运行，模型只加载一次)")
+        self.warm_pool.setToolTip(
+            "启动最多与最大并发任务数相同的常驻工作进程，省去每个文档的模型加载时间；"
+            "每个工作进程都会常驻占用模型内存"
+        )
+        batch_layout.addRow(self.warm_pool)
+
+        batch_group.setLayout(batch_layout)
+        self.add_to_layout(batch_group)
+
+        # 结果缓存
+        cache_group = QGroupBox("结果缓存")
+        cache_layout = QFormLayout()
+
+        self.result_cache = QCheckBox("启用结果缓存 (相同文件和选项直接复用已有输出，不再运行 marker)")
+        self.result_cache.setToolTip(
+            "以输入文件内容的哈希和影响输出的选项为键缓存 marker_single 的输出，"
+            "命中时以硬链接 (或复制) 输出到输出目录"
+        )
+        cache_layout.addRow(self.result_cache)
+
+        self.result_cache_dir = QLineEdit()
+        self.result_cache_dir.setPlaceholderText(RESULT_CACHE_DIR)
+        self.result_cache_dir.setToolTip("可设置为共享目录，供多台机器共用")
+        cache_layout.addRow("缓存目录:", self.result_cache_dir)
+
+        self.result_cache_size = QSpinBox()
+        self.result_cache_size.setRange(100, 1048576)
+        self.result_cache_size.setSingleStep(1024)
+        self.result_cache_size.setValue(10240)
+        self.result_cache_size.setSuffix(" MB")
+        cache_layout.addRow("缓存容量上限:", self.result_cache_size)
+
+        cache_group.setLayout(cache_layout)
+        self.add_to_layout(cache_group)
+
+        # 失败处理 (并行批处理)
+        retry_group = QGroupBox("失败处理 (并行批处理)")
+        retry_layout = QFormLayout()
+
+        self.job_timeout = QSpinBox()
+        self.job_timeout.setRange(0, 1440)
+        self.job_timeout.setValue(0)
+        self.job_timeout.setSuffix(" 分钟")
+        self.job_timeout.setSpecialValueText("不限")
+        self.job_timeout.setToolTip("单个文件转换超过该时间后强制结束 (包括其工作进程)")
+        retry_layout.addRow("单个文件超时:", self.job_timeout)
+
+        self.retry_count = QSpinBox()
+        self.retry_count.setRange(0, 10)
+        self.retry_count.setValue(1)
+        retry_layout.addRow("失败重试次数:", self.retry_count)
+
+        self.retry_backoff = QSpinBox()
+        self.retry_backoff.setRange(0, 3600)
+        self.retry_backoff.setValue(10)
+        self.retry_backoff.setSuffix(" 秒")
+        self.retry_backoff.setToolTip("第一次重试前的等待时间，之后每次翻倍；等待期间其他文件照常转换")
+        retry_layout.addRow("重试等待时间:", self.retry_backoff)
+
+        self.retry_fallback = QComboBox()
+        self.retry_fallback.addItems(list(FALLBACK_OPTIONS))
+        self.retry_fallback.setToolTip("重试时在当前配置上额外启用的选项")
+        retry_layout.addRow("重试备用选项:", self.retry_fallback)
+
+        retry_group.setLayout(retry_layout)
+        self.add_to_layout(retry_group)
+
         # 调试设置
         debug_group = QGroupBox("调试设置")
         debug_layout = QFormLayout()
@@ -80,8 +246,14 @@ class AdvancedTab(BaseTab):
         self.add_stretch()
 
     def update_workers_state(self):
-        """根据GPU数量启用或禁用工作进程设置"""
-        if self.num_devices.value() == 1:
-            self.num_workers.setEnabled(False)
-        else:
-            self.num_workers.setEnabled(True)
+        """只有按设备槽位运行时工作进程设置才生效"""
+        self.num_workers.setEnabled(
+            uses_device_slots(
+                {
+                    "num_devices": self.num_devices.value(),
+                    "device_type": self.device_type.currentText(),
+                    "device_ids": self.device_ids.text(),
+                }
+            )
+        )
+        self.num_devices.setEnabled(not self.device_ids.text().strip())
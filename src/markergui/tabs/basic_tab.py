@@ -14,9 +14,11 @@ from PySide6.QtWidgets import (
     QSizePolicy,
     QGridLayout,
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer
 from PySide6.QtGui import QFont
 
+PRESET_SWITCH_DEBOUNCE = 150  # 毫秒，连续切换预设 (如用方向键浏览) 时合并为一次
+
 
 def create_basic_tab(parent):
     # 创建滚动区域
@@ -60,6 +62,10 @@ def create_basic_tab(parent):
     parent.pdftext_workers.setRange(1, 16)
     parent.pdftext_workers.setValue(4)
     pdftext_layout.addWidget(parent.pdftext_workers)
+    parent.autotune_btn = QPushButton("自动调优")
+    parent.autotune_btn.setToolTip("在输入文档的少量样本页上试运行不同的工作进程数，选出最快的设置")
+    parent.autotune_btn.clicked.connect(parent.toggle_autotune)
+    pdftext_layout.addWidget(parent.autotune_btn)
     pdftext_layout.addStretch()
     basic_layout.addLayout(pdftext_layout)
 
@@ -96,20 +102,26 @@ def create_basic_tab(parent):
         for preset in presets:
             parent.preset_combo.addItem(preset)
 
-    # 预设切换处理函数
+    # 预设切换处理函数：第一次切换立即应用，之后防抖时间内的切换合并为最后一次
+    switch_timer = QTimer(parent)
+    switch_timer.setSingleShot(True)
+    switch_timer.setInterval(PRESET_SWITCH_DEBOUNCE)
+    deferred = []
+
+    def apply_deferred_preset():
+        if deferred:
+            parent.switch_preset(deferred.pop())
+
     def on_preset_changed(preset_name):
         if not preset_name:
             return
-        preset_config = parent.config_manager.load_preset(preset_name)
-        # 确保配置是字典类型
-        if not preset_config or not isinstance(preset_config, dict):
-            print(f"[ERROR] 加载预设失败: '{preset_name}' 无效的配置格式")
-            return
-        current_config = parent.get_current_config()
-        for key in preset_config:
-            if key in current_config:
-                current_config[key] = preset_config[key]
-        parent.apply_config(current_config)
+        if switch_timer.isActive():
+            deferred[:] = [preset_name]
+        else:
+            parent.switch_preset(preset_name)
+        switch_timer.start()
+
+    switch_timer.timeout.connect(apply_deferred_preset)
 
     # 连接信号
     parent.preset_combo.currentTextChanged.connect(on_preset_changed)
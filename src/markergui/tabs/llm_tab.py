@@ -13,6 +13,7 @@ from PySide6.QtWidgets import (
     QScrollArea,
 )
 from PySide6.QtCore import Qt
+from ..llm_cache import LLM_CACHE_DIR
 
 
 def create_llm_tab(parent):
@@ -49,90 +50,105 @@ def create_llm_tab(parent):
     service_group.setLayout(service_layout)
     layout.addWidget(service_group)
 
-    # 隐藏所有服务控件组
+    # 各服务的设置组在首次选择该服务时才构建
+    providers_layout = QVBoxLayout()
+    providers_layout.setContentsMargins(0, 0, 0, 0)
+    layout.addLayout(providers_layout)
+
+    def build_gemini_group():
+        gemini_group = QGroupBox("Google Gemini设置")
+        gemini_layout = QFormLayout()
+
+        parent.gemini_api_key = QLineEdit()
+        gemini_layout.addRow("API密钥:", parent.gemini_api_key)
+        parent.gemini_model_name = QLineEdit("gemini-2.0-flash")
+        gemini_layout.addRow("模型名称:", parent.gemini_model_name)
+
+        gemini_group.setLayout(gemini_layout)
+        return gemini_group
+
+    def build_vertex_group():
+        vertex_group = QGroupBox("Google Vertex设置")
+        vertex_layout = QFormLayout()
+
+        parent.vertex_project_id = QLineEdit()
+        vertex_layout.addRow("项目ID:", parent.vertex_project_id)
+        parent.vertex_location = QLineEdit("us-central1")
+        vertex_layout.addRow("位置:", parent.vertex_location)
+
+        vertex_group.setLayout(vertex_layout)
+        return vertex_group
+
+    def build_ollama_group():
+        ollama_group = QGroupBox("Ollama设置")
+        ollama_layout = QFormLayout()
+
+        parent.ollama_base_url = QLineEdit("http://localhost:11434")
+        ollama_layout.addRow("基础URL:", parent.ollama_base_url)
+        parent.ollama_model = QLineEdit("llama3.2-vision")
+        ollama_layout.addRow("模型名称:", parent.ollama_model)
+
+        ollama_group.setLayout(ollama_layout)
+        return ollama_group
+
+    def build_claude_group():
+        claude_group = QGroupBox("Claude设置")
+        claude_layout = QFormLayout()
+
+        parent.claude_api_key = QLineEdit()
+        claude_layout.addRow("API密钥:", parent.claude_api_key)
+        parent.claude_model_name = QLineEdit("claude-3-7-sonnet-20250219")
+        claude_layout.addRow("模型名称:", parent.claude_model_name)
+
+        claude_group.setLayout(claude_layout)
+        return claude_group
+
+    def build_openai_group():
+        openai_group = QGroupBox("OpenAI设置")
+        openai_layout = QFormLayout()
+
+        parent.openai_api_key = QLineEdit()
+        openai_layout.addRow("API密钥:", parent.openai_api_key)
+        parent.openai_model = QLineEdit("gpt-4o-mini")
+        openai_layout.addRow("模型名称:", parent.openai_model)
+        parent.openai_base_url = QLineEdit("https://api.openai.com/v1")
+        openai_layout.addRow("自定义API端点:", parent.openai_base_url)
+
+        openai_group.setLayout(openai_layout)
+        return openai_group
+
+    group_builders = [
+        build_gemini_group,
+        build_vertex_group,
+        build_ollama_group,
+        build_claude_group,
+        build_openai_group,
+    ]
+    service_groups = {}
+
+    # 只显示当前服务的控件组
     def toggle_service_visibility(index):
-        service_groups = [
-            gemini_group,
-            vertex_group,
-            ollama_group,
-            claude_group,
-            openai_group,
-        ]
-        for i, group in enumerate(service_groups):
+        if 0 <= index < len(group_builders) and index not in service_groups:
+            group = service_groups[index] = group_builders[index]()
+            providers_layout.addWidget(group)
+            # 新建控件应用暂存的配置值和LLM启用状态
+            parent.apply_pending_config()
+        # 应用暂存的配置值时服务选择可能已改变，以当前选择为准
+        index = parent.llm_service.currentIndex()
+        for i, group in service_groups.items():
             group.setVisible(i == index)
 
-    # 监听服务选择变化
+    # 监听服务选择变化 (应用配置时控件信号被屏蔽，由配置绑定层统一更新)
     parent.llm_service.currentIndexChanged.connect(toggle_service_visibility)
+    parent.config_binding.add_dependent(
+        ["llm_service"], lambda: toggle_service_visibility(parent.llm_service.currentIndex())
+    )
+    parent.config_binding.add_dependent(
+        ["use_llm"], lambda: parent.toggle_llm_options(parent.use_llm.isChecked())
+    )
 
-    # Gemini设置
-    gemini_group = QGroupBox("Google Gemini设置")
-    gemini_layout = QFormLayout()
-    gemini_group.setVisible(False)
-
-    parent.gemini_api_key = QLineEdit()
-    gemini_layout.addRow("API密钥:", parent.gemini_api_key)
-    parent.gemini_model_name = QLineEdit("gemini-2.0-flash")
-    gemini_layout.addRow("模型名称:", parent.gemini_model_name)
-
-    gemini_group.setLayout(gemini_layout)
-    layout.addWidget(gemini_group)
-
-    # Vertex设置
-    vertex_group = QGroupBox("Google Vertex设置")
-    vertex_layout = QFormLayout()
-    vertex_group.setVisible(False)
-
-    parent.vertex_project_id = QLineEdit()
-    vertex_layout.addRow("项目ID:", parent.vertex_project_id)
-    parent.vertex_location = QLineEdit("us-central1")
-    vertex_layout.addRow("位置:", parent.vertex_location)
-
-    vertex_group.setLayout(vertex_layout)
-    layout.addWidget(vertex_group)
-
-    # Ollama设置
-    ollama_group = QGroupBox("Ollama设置")
-    ollama_layout = QFormLayout()
-    ollama_group.setVisible(False)
-
-    parent.ollama_base_url = QLineEdit("http://localhost:11434")
-    ollama_layout.addRow("基础URL:", parent.ollama_base_url)
-    parent.ollama_model = QLineEdit("llama3.2-vision")
-    ollama_layout.addRow("模型名称:", parent.ollama_model)
-
-    ollama_group.setLayout(ollama_layout)
-    layout.addWidget(ollama_group)
-
-    # Claude设置
-    claude_group = QGroupBox("Claude设置")
-    claude_layout = QFormLayout()
-    claude_group.setVisible(False)
-
-    parent.claude_api_key = QLineEdit()
-    claude_layout.addRow("API密钥:", parent.claude_api_key)
-    parent.claude_model_name = QLineEdit("claude-3-7-sonnet-20250219")
-    claude_layout.addRow("模型名称:", parent.claude_model_name)
-
-    claude_group.setLayout(claude_layout)
-    layout.addWidget(claude_group)
-
-    # OpenAI设置
-    openai_group = QGroupBox("OpenAI设置")
-    openai_layout = QFormLayout()
-    openai_group.setVisible(False)
-
-    parent.openai_api_key = QLineEdit()
-    openai_layout.addRow("API密钥:", parent.openai_api_key)
-    parent.openai_model = QLineEdit("gpt-4o-mini")
-    openai_layout.addRow("模型名称:", parent.openai_model)
-    parent.openai_base_url = QLineEdit("https://api.openai.com/v1")
-    openai_layout.addRow("自定义API端点:", parent.openai_base_url)
-
-    openai_group.setLayout(openai_layout)
-    layout.addWidget(openai_group)
-
-    # 默认显示第一个服务的控件组
-    toggle_service_visibility(0)
+    # 默认显示当前服务的控件组
+    toggle_service_visibility(parent.llm_service.currentIndex())
 
     # LLM高级选项
     advanced_group = QGroupBox("LLM高级选项")
@@ -165,5 +181,57 @@ def create_llm_tab(parent):
     advanced_group.setLayout(advanced_layout)
     layout.addWidget(advanced_group)
 
+    # LLM请求预算 (多个任务同时运行时共享)
+    budget_group = QGroupBox("LLM请求预算 (多任务并行)")
+    budget_layout = QFormLayout()
+
+    parent.llm_budget = QCheckBox("所有任务共享LLM请求预算")
+    parent.llm_budget.setToolTip(
+        "OpenAI / Ollama 的请求经过本机代理，统一限制所有同时运行的任务的并发请求数和每分钟请求数，"
+        "服务限流 (429) 时自动降低并发并暂停发送。Gemini / Vertex / Claude 无法经过代理，"
+        "启动时从同一全局并发数中分得一份固定的最大并发请求数，不受每分钟上限和限流退避约束"
+    )
+    budget_layout.addRow(parent.llm_budget)
+
+    parent.llm_global_concurrency = QSpinBox()
+    parent.llm_global_concurrency.setRange(1, 100)
+    parent.llm_global_concurrency.setValue(6)
+    budget_layout.addRow("全局最大并发请求数:", parent.llm_global_concurrency)
+
+    parent.llm_rpm = QSpinBox()
+    parent.llm_rpm.setRange(0, 100000)
+    parent.llm_rpm.setValue(0)
+    parent.llm_rpm.setSpecialValueText("不限")
+    parent.llm_rpm.setToolTip("所有任务每分钟发出的请求数上限 (仅 OpenAI / Ollama)")
+    budget_layout.addRow("每分钟请求数上限:", parent.llm_rpm)
+
+    budget_group.setLayout(budget_layout)
+    layout.addWidget(budget_group)
+
+    # LLM响应缓存
+    cache_group = QGroupBox("LLM响应缓存")
+    cache_layout = QFormLayout()
+
+    parent.llm_cache = QCheckBox("启用LLM响应缓存 (相同的请求直接返回已保存的响应)")
+    parent.llm_cache.setToolTip(
+        "OpenAI / Ollama 的请求经过本机代理，以模型、提示词和图片的哈希为键将响应保存到磁盘，"
+        "修改不相关的选项后重新转换同一文档时不再重复调用LLM服务"
+    )
+    cache_layout.addRow(parent.llm_cache)
+
+    parent.llm_cache_dir = QLineEdit()
+    parent.llm_cache_dir.setPlaceholderText(LLM_CACHE_DIR)
+    cache_layout.addRow("缓存目录:", parent.llm_cache_dir)
+
+    parent.llm_cache_size = QSpinBox()
+    parent.llm_cache_size.setRange(10, 1048576)
+    parent.llm_cache_size.setSingleStep(256)
+    parent.llm_cache_size.setValue(1024)
+    parent.llm_cache_size.setSuffix(" MB")
+    cache_layout.addRow("缓存容量上限:", parent.llm_cache_size)
+
+    cache_group.setLayout(cache_layout)
+    layout.addWidget(cache_group)
+
     layout.addStretch()
     return scroll
@@ -0,0 +1,270 @@
+from bisect import bisect_left
+
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QComboBox,
+    QProgressBar,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QAbstractItemView,
+)
+from PySide6.QtCore import QTimer, Signal
+from ..job_runner import PRIORITY_LEVELS
+
+STATE_LABELS = {
+    "pending": "排队中",
+    "running": "运行中",
+    "finished": "已完成",
+    "failed": "失败",
+    "cancelled": "已取消",
+}
+
+PRIORITY_NAMES = {value: name for name, value in PRIORITY_LEVELS.items()}
+
+
+class QueueTab(QWidget):
+    """
+    任务队列页：显示每个任务的状态、耗时和整体进度
+    可取消、暂停/继续选中的任务，调整排队中任务的顺序和优先级；
+    执行器移除的已结束任务 (超过保留数量或"清除已结束") 同时从表格和统计中移除
+    """
+
+    COLUMNS = ["ID", "文件", "状态", "优先级", "耗时", "说明"]
+
+    cancelAllRequested = Signal()
+
+    def __init__(self, job_runner, parent=None):
+        super().__init__(parent)
+        self.job_runner = job_runner
+        self._rows = {}
+        self._jobs = {}  # 任务 ID -> 任务
+        self._states = {}  # 任务 ID -> 上次显示时的状态
+        self._counts = {state: 0 for state in STATE_LABELS}  # 各状态的任务数，状态变化时增减
+
+        layout = QVBoxLayout(self)
+
+        self.summary_label = QLabel()
+        layout.addWidget(self.summary_label)
+
+        self.budget_label = QLabel()
+        layout.addWidget(self.budget_label)
+
+        self.cache_label = QLabel()
+        layout.addWidget(self.cache_label)
+
+        self.llm_label = QLabel()  # LLM 请求预算和响应缓存
+        layout.addWidget(self.llm_label)
+
+        self.device_label = QLabel()  # 多设备转换各槽位的进度
+        layout.addWidget(self.device_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("%v / %m")
+        layout.addWidget(self.progress_bar)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(1, QHeaderView.Stretch)
+        layout.addWidget(self.table)
+
+        # 任务操作 (作用于选中的任务)
+        control_layout = QHBoxLayout()
+        self.cancel_btn = QPushButton("取消")
+        self.cancel_btn.clicked.connect(self.cancel_selected)
+        self.pause_btn = QPushButton("暂停")
+        self.pause_btn.clicked.connect(self.pause_selected)
+        self.pause_btn.setEnabled(job_runner.can_pause)
+        self.resume_btn = QPushButton("继续")
+        self.resume_btn.clicked.connect(self.resume_selected)
+        self.resume_btn.setEnabled(job_runner.can_pause)
+        self.top_btn = QPushButton("置顶")
+        self.top_btn.clicked.connect(lambda: self.move_selected(None))
+        self.up_btn = QPushButton("上移")
+        self.up_btn.clicked.connect(lambda: self.move_selected(-1))
+        self.down_btn = QPushButton("下移")
+        self.down_btn.clicked.connect(lambda: self.move_selected(1))
+        self.priority_combo = QComboBox()
+        self.priority_combo.addItems(list(PRIORITY_LEVELS))
+        self.priority_combo.setCurrentText("普通")
+        self.priority_combo.setToolTip("设置选中的任务的优先级，高优先级的任务排在所有低优先级的排队任务之前")
+        self.priority_btn = QPushButton("设置优先级")
+        self.priority_btn.clicked.connect(self.set_selected_priority)
+        self.clear_finished_btn = QPushButton("清除已结束")
+        self.clear_finished_btn.clicked.connect(job_runner.clear_finished)
+        self.cancel_all_btn = QPushButton("全部取消")
+        self.cancel_all_btn.clicked.connect(self.cancelAllRequested)
+        for widget in (
+            self.cancel_btn,
+            self.pause_btn,
+            self.resume_btn,
+            self.top_btn,
+            self.up_btn,
+            self.down_btn,
+            self.priority_combo,
+            self.priority_btn,
+        ):
+            control_layout.addWidget(widget)
+        control_layout.addStretch()
+        control_layout.addWidget(self.clear_finished_btn)
+        control_layout.addWidget(self.cancel_all_btn)
+        layout.addLayout(control_layout)
+
+        job_runner.jobQueued.connect(self.add_job)
+        job_runner.jobStarted.connect(self.update_job)
+        job_runner.jobFinished.connect(self.update_job)
+        job_runner.jobWaiting.connect(self.update_job)
+        job_runner.jobChanged.connect(self.update_job)
+        job_runner.jobChanged.connect(self.update_positions)
+        job_runner.jobsForgotten.connect(self.remove_jobs)
+
+        # 定时刷新运行中任务的耗时
+        self.refresh_timer = QTimer(self)
+        self.refresh_timer.setInterval(1000)
+        self.refresh_timer.timeout.connect(self.refresh_running)
+        self.refresh_timer.start()
+
+        self.update_summary()
+
+    def add_job(self, job):
+        row = self.table.rowCount()
+        self.table.insertRow(row)
+        self._rows[job.id] = row
+        self._jobs[job.id] = job
+        self.table.setItem(row, 0, QTableWidgetItem(str(job.id)))
+        self.table.setItem(row, 1, QTableWidgetItem(job.label))
+        for column in range(2, len(self.COLUMNS)):
+            self.table.setItem(row, column, QTableWidgetItem())
+        self.update_job(job)
+
+    def remove_jobs(self, jobs):
+        """移除任务的行，之后各行的行号一次性重新计算"""
+        removed = sorted(self._rows.pop(job.id) for job in jobs if job.id in self._rows)
+        for row in reversed(removed):
+            self.table.removeRow(row)
+        for job in jobs:
+            self._jobs.pop(job.id, None)
+            state = self._states.pop(job.id, None)
+            if state is not None:
+                self._counts[state] -= 1
+        if removed:
+            for job_id, row in self._rows.items():
+                self._rows[job_id] = row - bisect_left(removed, row)
+        self.update_summary()
+
+    def _state_text(self, job, position=None):
+        if job.state == "pending" and position is not None:
+            return f"排队中 ({position})"
+        if job.state == "running" and job.cancelled:
+            return "取消中"
+        if job.state == "running" and job.paused:
+            return "已暂停"
+        return STATE_LABELS.get(job.state, job.state)
+
+    def update_job(self, job):
+        row = self._rows.get(job.id)
+        if row is None:
+            return
+        previous = self._states.get(job.id)
+        if previous != job.state:
+            if previous is not None:
+                self._counts[previous] -= 1
+            self._counts[job.state] = self._counts.get(job.state, 0) + 1
+            self._states[job.id] = job.state
+        # 排队位置由 update_positions 定时刷新
+        state_item = self.table.item(row, 2)
+        if job.state != "pending" or not state_item.text():
+            state_item.setText(self._state_text(job))
+        self.table.item(row, 3).setText(PRIORITY_NAMES.get(job.priority, str(job.priority)))
+        elapsed = f"{job.elapsed:.1f}s" if job.state != "pending" else ""
+        self.table.item(row, 4).setText(elapsed)
+        note = job.wait_reason if job.state == "pending" else ""
+        if job.state == "failed":
+            note = job.failure
+        elif job.cache_hit:
+            note = "命中结果缓存"
+        if job.memory_estimate is not None and job.state == "running":
+            note = f"预计内存 {job.memory_estimate:.0f} MB"
+        self.table.item(row, 5).setText(note)
+        self.update_summary()
+
+    def update_positions(self, *_):
+        """排队中的任务显示其在队列中的位置 (只更新有变化的行)"""
+        for position, job in enumerate(self.job_runner.queue, 1):
+            row = self._rows.get(job.id)
+            if row is None:
+                continue
+            item = self.table.item(row, 2)
+            text = self._state_text(job, position)
+            if item.text() != text:
+                item.setText(text)
+
+    # ---- 任务操作 ----
+
+    def selected_jobs(self):
+        rows = sorted({index.row() for index in self.table.selectionModel().selectedRows()})
+        jobs = [self._jobs.get(int(self.table.item(row, 0).text())) for row in rows]
+        return [job for job in jobs if job is not None]
+
+    def cancel_selected(self):
+        for job in self.selected_jobs():
+            self.job_runner.cancel(job)
+        self.update_positions()
+
+    def pause_selected(self):
+        for job in self.selected_jobs():
+            self.job_runner.pause(job)
+
+    def resume_selected(self):
+        for job in self.selected_jobs():
+            self.job_runner.resume(job)
+
+    def move_selected(self, offset):
+        """offset 为 None 时移到队首，否则上移 (-1) 或下移 (1) 一位"""
+        queue = self.job_runner.queue
+        jobs = [job for job in self.selected_jobs() if self.job_runner.is_queued(job)]
+        if offset is None:
+            # 保持选中任务之间的相对顺序
+            for index, job in enumerate(sorted(jobs, key=queue.index)):
+                self.job_runner.move_job(job, index)
+            return
+        jobs.sort(key=queue.index, reverse=offset > 0)
+        for job in jobs:
+            self.job_runner.move_job(job, max(0, queue.index(job) + offset))
+
+    def set_selected_priority(self):
+        priority = PRIORITY_LEVELS[self.priority_combo.currentText()]
+        for job in self.selected_jobs():
+            if job.state == "pending":
+                self.job_runner.set_priority(job, priority)
+
+    def refresh_running(self):
+        for job in self.job_runner.running_jobs():
+            self.update_job(job)
+        self.update_positions()
+        admission = self.job_runner.admission
+        status = admission.status if admission is not None and admission.enabled else ""
+        self.budget_label.setText(f"内存准入: {status}" if status else "")
+        cache = self.job_runner.result_cache
+        self.cache_label.setText(f"结果缓存: {cache.status}" if cache is not None else "")
+        proxy = self.job_runner.llm_proxy
+        status = proxy.status if proxy is not None else ""
+        self.llm_label.setText(f"LLM 代理: {status}" if status else "")
+
+    def update_summary(self):
+        counts = self._counts
+        done = counts["finished"] + counts["failed"] + counts["cancelled"]
+
+        self.progress_bar.setMaximum(max(1, len(self._states)))
+        self.progress_bar.setValue(done)
+        self.summary_label.setText(
+            "  ".join(f"{STATE_LABELS[state]}: {counts[state]}" for state in STATE_LABELS)
+        )
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 # 标准库 imports
+import re
 import sys
 
 # 第三方库 imports
@@ -19,20 +20,90 @@ class DummyWriter:
         pass
 
 
+class LineSplitter:
+    """
+    增量行拆分器
+    未完成的行以片段列表累积，每次只扫描新追加的文本；
+    以 "\r" 结尾的覆盖写 (tqdm 进度条) 作为临时行输出，后续内容替换同一行
+    """
+
+    _SEPARATORS = re.compile(r"[\r\n]")
+
+    def __init__(self):
+        self._chunks = []
+        self._pending_cr = False  # 上一段文本以 "\r" 结尾，需确认是否为 "\r\n"
+
+    def feed(self, text):
+        """
+        处理新文本，返回 [(行内容, 是否为完整行)]
+        完整行以 "\n" 结束；临时行以 "\r" 结束，应替换同一行之前显示的内容
+        """
+        events = []
+        if not text:
+            return events
+
+        start = 0
+        if self._pending_cr:
+            self._pending_cr = False
+            if text[0] == "\n":
+                events.append(self._take(True))
+                start = 1
+            else:
+                self._emit_progress(events)
+
+        for match in self._SEPARATORS.finditer(text, start):
+            end = match.start()
+            if end > start:
+                self._chunks.append(text[start:end])
+            start = match.end()
+
+            if match.group() == "\n":
+                events.append(self._take(True))
+            elif start == len(text):
+                # 文本以 "\r" 结尾，等待下一段确认
+                self._pending_cr = True
+            elif text[start] == "\n":
+                continue
+            else:
+                self._emit_progress(events)
+
+        if start < len(text):
+            self._chunks.append(text[start:])
+        return events
+
+    def flush(self):
+        """取出缓冲区中剩余的内容作为完整行"""
+        self._pending_cr = False
+        if not self._chunks:
+            return []
+        return [self._take(True)]
+
+    def _take(self, final):
+        line = "".join(self._chunks)
+        self._chunks = []
+        return line, final
+
+    def _emit_progress(self, events):
+        if self._chunks:
+            events.append(self._take(False))
+
+
 class EmittingStream(QObject):
     """
     输出重定向流
     将标准输出重定向到GUI界面，支持调试信息过滤
+    进度条覆盖写通过 progressWritten 发送，终端输出按每次 write 合并写入
     """
 
     textWritten = Signal(str)
+    progressWritten = Signal(str)
 
     def __init__(self):
         super().__init__()
 
         # 确保 original_stdout 不为 None
         self.original_stdout = sys.stdout if sys.stdout is not None else DummyWriter()
-        self._buffer = ""
+        self._splitter = LineSplitter()
 
         # 控制选项
         self.show_debug_gui = False  # 是否在 GUI 中显示 DEBUG
@@ -46,42 +117,35 @@ class EmittingStream(QObject):
 
     def write(self, text):
         """处理输出文本，根据配置决定是否发送到GUI和终端"""
-        # 先缓存文本
-        self._buffer += text
-
-        # 如果有换行符，则处理每一行
-        if "\n" in self._buffer:
-            lines = self._buffer.split("\n")
-            self._buffer = lines[-1]  # 最后一行可能是未完成的
-
-            for line in lines[:-1]:
-                full_line = line
-
-                # 判断是否是 DEBUG 行
-                is_debug = full_line.startswith("[DEBUG]")
-
-                # 决定是否发送到 GUI
-                if self.show_debug_gui or not is_debug:
-                    self.textWritten.emit(full_line)
-
-                # 决定是否输出到终端
-                if self.show_debug_terminal or not is_debug:
-                    self.original_stdout.write(full_line + "\n")  # 添加换行
-                    self.original_stdout.flush()
+        self._dispatch(self._splitter.feed(text))
 
     def flush(self):
         """刷新缓冲区，处理剩余未输出的内容"""
-        # 处理缓冲区最后的内容（可能没有换行）
-        if self._buffer:
-            full_line = self._buffer
-            self._buffer = ""
-            is_debug = full_line.startswith("[DEBUG]")
+        self._dispatch(self._splitter.flush(), final_newline=False)
+
+    def _dispatch(self, events, final_newline=True):
+        if not events:
+            return
+
+        terminal = []
+        for line, final in events:
+            # 判断是否是 DEBUG 行
+            is_debug = line.startswith("[DEBUG]")
 
-            # 发送到 GUI
+            # 决定是否发送到 GUI
             if self.show_debug_gui or not is_debug:
-                self.textWritten.emit(full_line)
+                if final:
+                    self.textWritten.emit(line)
+                else:
+                    self.progressWritten.emit(line)
 
-            # 输出到终端
+            # 决定是否输出到终端
             if self.show_debug_terminal or not is_debug:
-                self.original_stdout.write(full_line)
-                self.original_stdout.flush()
+                terminal.append(line)
+                terminal.append("\n" if final else "\r")
+
+        if terminal:
+            if not final_newline and terminal[-1] == "\n":
+                terminal.pop()
+            self.original_stdout.write("".join(terminal))
+            self.original_stdout.flush()
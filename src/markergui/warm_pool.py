@@ -0,0 +1,229 @@
+# -*- coding: utf-8 -*-
+"""
+预热进程池
+marker_single 任务改由常驻的工作进程 (worker.py) 执行，模型只在工作进程启动时加载一次
+"""
+# 标准库 imports
+import codecs
+import json
+import locale
+import os
+import signal
+import sys
+
+# 第三方库 imports
+from PySide6.QtCore import QObject, QProcess, QProcessEnvironment, Signal
+
+# 本地 imports
+from .run_report import process_tree
+from .worker import OUTPUT_END
+
+_OUTPUT_END_LINE = f"\n{OUTPUT_END}\n"
+
+
+class WarmWorker(QObject):
+    """单个工作进程，一次处理一个请求"""
+
+    output = Signal(object, str)  # 任务, 输出文本
+    done = Signal(object, object, int, str)  # 工作进程, 任务, 退出码, 错误信息
+    exited = Signal(object)
+
+    def __init__(self, env=None, parent=None):
+        super().__init__(parent)
+        self.env = dict(env or {})  # 启动时设置的环境变量 (如设备槽位的 CUDA_VISIBLE_DEVICES)
+        self.job = None
+        self.load_s = None  # 模型加载耗时，就绪前为 None
+        self.requests = 0
+        self.closing = False
+        self._reply = None
+        self._output_ended = False
+        self._pending = ""
+        self._stdout = b""
+        self._decoder = codecs.getincrementaldecoder(
+            locale.getpreferredencoding(False) or "utf-8"
+        )(errors="replace")
+
+        self.process = QProcess(self)
+        env = QProcessEnvironment.systemEnvironment()
+        env.insert("PYTHONUNBUFFERED", "1")
+        # 以源码运行时让子进程能导入 markergui
+        package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env.insert(
+            "PYTHONPATH",
+            os.pathsep.join(filter(None, [package_root, env.value("PYTHONPATH")])),
+        )
+        for name, value in self.env.items():
+            env.insert(name, str(value))
+        self.process.setProcessEnvironment(env)
+        self.process.readyReadStandardOutput.connect(self._on_stdout)
+        self.process.readyReadStandardError.connect(self._on_stderr)
+        self.process.finished.connect(self._on_finished)
+        self.process.errorOccurred.connect(self._on_error)
+        self.process.start(sys.executable, ["-m", "markergui.worker"])
+
+    @property
+    def pid(self):
+        return self.process.processId()
+
+    @property
+    def busy(self):
+        return self.job is not None
+
+    @property
+    def available(self):
+        """可接收新请求：进程在运行、空闲且未在关闭中"""
+        return self.process.state() != QProcess.NotRunning and not self.busy and not self.closing
+
+    def run(self, job):
+        self.job = job
+        self.requests += 1
+        self._reply = None
+        self._output_ended = False
+        request = {"id": job.id, "argv": job.launch_argv[1:]}
+        self.process.write((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    def kill(self):
+        """结束工作进程及其子进程"""
+        pid = self.pid
+        if pid and hasattr(signal, "SIGKILL"):
+            for child in process_tree(pid)[1:]:
+                try:
+                    os.kill(child, signal.SIGKILL)
+                except OSError:
+                    continue
+        self.process.kill()
+
+    def close(self):
+        """关闭 stdin，工作进程处理完当前请求后退出"""
+        self.closing = True
+        self.process.closeWriteChannel()
+
+    def _on_stdout(self):
+        self._stdout += bytes(self.process.readAllStandardOutput())
+        *lines, self._stdout = self._stdout.split(b"\n")
+        for line in lines:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                continue
+            if message.get("event") == "ready":
+                self.load_s = message["load_s"]
+            elif message.get("event") == "done" and self.job is not None:
+                self._reply = message
+                self._try_finish()
+
+    def _on_stderr(self):
+        text = self._pending + self._decoder.decode(bytes(self.process.readAllStandardError()))
+        index = text.find(_OUTPUT_END_LINE)
+        if index >= 0:
+            self._emit_output(text[:index])
+            self._pending = ""
+            self._output_ended = True
+            self._try_finish()
+            return
+        # 结束标记可能被拆分到两次读取中，保留可能的前缀
+        keep = 0
+        for size in range(1, len(_OUTPUT_END_LINE)):
+            if text.endswith(_OUTPUT_END_LINE[:size]):
+                keep = size
+        self._pending = text[len(text) - keep :]
+        self._emit_output(text[: len(text) - keep])
+
+    def _emit_output(self, text):
+        if text and self.job is not None:
+            self.output.emit(self.job, text)
+
+    def _try_finish(self):
+        """done 消息和输出结束标记都收到后才完成任务，避免丢失最后几行输出"""
+        if self._reply is None or not self._output_ended:
+            return
+        job, reply = self.job, self._reply
+        self.job = self._reply = None
+        job.warm_stats = {
+            "worker_load_s": self.load_s,
+            "convert_s": reply.get("convert_s"),
+            "request": self.requests,
+        }
+        self.done.emit(self, job, 0 if reply["ok"] else 1, "")
+
+    def _on_finished(self, exit_code, exit_status):
+        self._on_stderr()
+        self._emit_output(self._pending)
+        self._pending = ""
+        if self.job is not None:
+            job, self.job = self.job, None
+            job.crashed = exit_status == QProcess.CrashExit
+            self.done.emit(self, job, exit_code, "")
+        self.exited.emit(self)
+
+    def _on_error(self, error):
+        if error == QProcess.FailedToStart and self.job is not None:
+            job, self.job = self.job, None
+            self.done.emit(self, job, -1, self.process.errorString())
+            self.exited.emit(self)
+
+
+class WarmPool(QObject):
+    """
+    预热进程池
+    工作进程按需启动，最多 size 个；空闲进程保留以复用已加载的模型
+    环境变量不同的任务 (如分配到不同设备槽位) 使用各自的工作进程
+    """
+
+    jobOutput = Signal(object, str)
+    jobDone = Signal(object, int, str)  # 任务, 退出码, 错误信息 (启动失败时)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.enabled = False
+        self.size = 1
+        self.workers = []
+
+    def accepts(self, job):
+        """只接管 marker_single 任务；打包后的程序无法以 python -m 启动工作进程"""
+        return (
+            self.enabled
+            and not getattr(sys, "frozen", False)
+            and job.argv[:1] == ["marker_single"]
+        )
+
+    def run(self, job):
+        """将任务交给空闲的工作进程，返回其 pid (用于资源采样)"""
+        worker = next((w for w in self.workers if w.available and w.env == job.env), None)
+        if worker is None:
+            worker = WarmWorker(job.env, self)
+            worker.output.connect(self.jobOutput)
+            worker.done.connect(self._on_done)
+            worker.exited.connect(self._on_exited)
+            self.workers.append(worker)
+        job.worker = worker
+        worker.run(job)
+        return worker.pid
+
+    def kill(self, job):
+        if job.worker is not None:
+            job.worker.kill()
+
+    def _on_done(self, worker, job, exit_code, error):
+        job.worker = None
+        self.jobDone.emit(job, exit_code, error)
+        # 进程数超过上限 (如调低了并发数) 时关闭多余的空闲进程
+        active = [w for w in self.workers if not w.closing]
+        idle = [w for w in active if w.available]
+        for extra in idle[: max(0, len(active) - self.size)]:
+            extra.close()
+
+    def _on_exited(self, worker):
+        if worker in self.workers:
+            self.workers.remove(worker)
+            worker.deleteLater()
+
+    def close_idle(self):
+        for worker in self.workers:
+            if worker.available:
+                worker.close()
+
+    def shutdown(self):
+        for worker in list(self.workers):
+            worker.kill()
+            worker.process.waitForFinished(3000)
@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+预热工作进程
+模型只加载一次，之后逐个处理转换请求，省去每次运行 marker_single 时的模型加载时间
+
+    python -m markergui.worker
+
+协议 (每行一个 JSON 对象):
+    stdin  <- {"id": 1, "argv": ["doc.pdf", "--output_dir", "out", ...]}
+    stdout -> {"event": "ready", "load_s": 12.3}
+    stdout -> {"event": "done", "id": 1, "ok": true, "convert_s": 4.5}
+    stdout -> {"event": "done", "id": 1, "ok": false, "error": "..."}
+
+argv 与 marker_single 的命令行参数相同 (不含程序名)；转换过程的日志和进度条写到 stderr，
+每个请求的输出以单独一行 OUTPUT_END 结束 (先于 done 消息写出)，界面据此确认输出已读完。
+设置环境变量 MARKERGUI_WORKER_SIMULATE=<秒> 时使用模拟后端：不依赖 marker，
+加载耗时为给定秒数，用于测试。
+"""
+# 标准库 imports
+import json
+import os
+import sys
+import time
+import traceback
+
+SIMULATE_ENV = "MARKERGUI_WORKER_SIMULATE"
+OUTPUT_END = "\x1e"
+
+
+class MarkerBackend:
+    """与 marker_single 相同的转换流程，模型在进程内复用"""
+
+    def __init__(self):
+        self.models = None
+
+    def load(self):
+        from marker.models import create_model_dict
+
+        self.models = create_model_dict()
+
+    def convert(self, argv):
+        from marker.config.parser import ConfigParser
+        from marker.output import save_output
+        from marker.scripts.convert_single import convert_single_cli
+
+        # 借用 marker_single 的命令行定义解析参数，选项与命令行模式完全一致
+        kwargs = convert_single_cli.make_context("marker_single", list(argv)).params
+        fpath = kwargs["fpath"]
+        config_parser = ConfigParser(kwargs)
+        converter_cls = config_parser.get_converter_cls()
+        converter = converter_cls(
+            config=config_parser.generate_config_dict(),
+            artifact_dict=self.models,
+            processor_list=config_parser.get_processors(),
+            renderer=config_parser.get_renderer(),
+            llm_service=config_parser.get_llm_service(),
+        )
+        rendered = converter(fpath)
+        out_folder = config_parser.get_output_folder(fpath)
+        save_output(rendered, out_folder, config_parser.get_base_filename(fpath))
+
+
+class SimulatedBackend:
+    """模拟后端：加载耗时固定，转换时输出进度条并写出占位 Markdown"""
+
+    PAGES = 4
+    PAGE_SECONDS = 0.05
+
+    def __init__(self, load_seconds):
+        self.load_seconds = load_seconds
+
+    def load(self):
+        time.sleep(self.load_seconds)
+
+    def convert(self, argv):
+        fpath = argv[0]
+        output_dir = argv[argv.index("--output_dir") + 1] if "--output_dir" in argv else "."
+        if not os.path.exists(fpath):
+            raise FileNotFoundError(fpath)
+        for i in range(self.PAGES + 1):
+            sys.stderr.write(
+                f"\rRecognizing Layout: {i * 100 // self.PAGES:3d}%|{'#' * i:<{self.PAGES}}| "
+                f"{i}/{self.PAGES} [00:00<00:00, {1 / self.PAGE_SECONDS:.2f}it/s]"
+            )
+            sys.stderr.flush()
+            time.sleep(self.PAGE_SECONDS)
+        sys.stderr.write("\n")
+        stem = os.path.splitext(os.path.basename(fpath))[0]
+        out_folder = os.path.join(output_dir, stem)
+        os.makedirs(out_folder, exist_ok=True)
+        with open(os.path.join(out_folder, stem + ".md"), "w", encoding="utf-8") as f:
+            f.write(f"# {stem}\n")
+
+
+def main():
+    # 协议独占原始 stdout，库中的 print 输出改写到 stderr
+    protocol = os.fdopen(os.dup(sys.stdout.fileno()), "w", encoding="utf-8")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    def send(message):
+        protocol.write(json.dumps(message, ensure_ascii=False) + "\n")
+        protocol.flush()
+
+    simulate = os.environ.get(SIMULATE_ENV)
+    backend = SimulatedBackend(float(simulate)) if simulate else MarkerBackend()
+
+    start = time.perf_counter()
+    backend.load()
+    send({"event": "ready", "load_s": round(time.perf_counter() - start, 3)})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        start = time.perf_counter()
+        reply = {"event": "done", "id": request["id"], "ok": True}
+        try:
+            backend.convert(request["argv"])
+            reply["convert_s"] = round(time.perf_counter() - start, 3)
+        except Exception as e:
+            traceback.print_exc()
+            reply.update(ok=False, error=f"{type(e).__name__}: {e}")
+        sys.stderr.write(f"\n{OUTPUT_END}\n")
+        sys.stderr.flush()
+        send(reply)
+
+
+if __name__ == "__main__":
+    main()
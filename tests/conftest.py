@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共设施
+以 offscreen 平台运行 Qt，wait_until 在等待期间处理事件循环 (QProcess、QTimer 的信号)，
+runner 为每个测试提供新的 JobRunner，fake_marker 生成一个可执行的 marker_single 替身并放到 PATH 最前面，
+upstream 在本机启动替身 OpenAI 服务
+"""
+# 标准库 imports
+import json
+import os
+import stat
+import sys
+import textwrap
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 第三方库 imports
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtCore import QCoreApplication, QEvent  # noqa: E402
+
+from markergui.job_runner import JobRunner  # noqa: E402
+
+# marker_single 替身：按参数写出输出文件，行为由环境变量控制
+#   FAKE_SLEEP=<秒>  转换前等待
+#   FAKE_FAIL=1      以退出码 1 失败 (带 --force_ocr 时照常成功，用于测试备用选项重试)
+_FAKE_MARKER = """\
+#!{python}
+import os
+import sys
+import time
+
+args = sys.argv[1:]
+print("fake marker_single", " ".join(args), flush=True)
+time.sleep(float(os.environ.get("FAKE_SLEEP") or 0))
+if os.environ.get("FAKE_FAIL") and "--force_ocr" not in args:
+    print("conversion failed", flush=True)
+    sys.exit(1)
+output_dir = args[args.index("--output_dir") + 1] if "--output_dir" in args else "."
+stem = os.path.splitext(os.path.basename(args[0]))[0]
+os.makedirs(os.path.join(output_dir, stem), exist_ok=True)
+with open(os.path.join(output_dir, stem, stem + ".md"), "w", encoding="utf-8") as f:
+    f.write("# " + stem + "\\n")
+"""
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+
+def wait_until(predicate, timeout=10.0):
+    """处理 Qt 事件直到 predicate() 为真，超时返回 False"""
+    app = QCoreApplication.instance()
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        app.processEvents()
+        if predicate():
+            return True
+        time.sleep(0.01)
+    app.processEvents()
+    return predicate()
+
+
+@pytest.fixture
+def runner(qapp):
+    runner = JobRunner()
+    yield runner
+    runner.shutdown()
+    # 任务结束时 deleteLater 的 QProcess 要在执行器之前删除
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+
+
+@pytest.fixture
+def fake_marker(tmp_path, monkeypatch):
+    """PATH 中的 marker_single 替换为替身脚本，返回其所在目录"""
+    if sys.platform == "win32":
+        pytest.skip("替身脚本依赖 shebang")
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "marker_single"
+    script.write_text(textwrap.dedent(_FAKE_MARKER.format(python=sys.executable)))
+    script.chmod(script.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    monkeypatch.setenv("PATH", str(bin_dir) + os.pathsep + os.environ.get("PATH", ""))
+    monkeypatch.delenv("FAKE_SLEEP", raising=False)
+    monkeypatch.delenv("FAKE_FAIL", raising=False)
+    return bin_dir
+
+
+class _Upstream(BaseHTTPRequestHandler):
+    """替身 OpenAI 服务：按 statuses 依次返回状态码，之后返回 200"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        with server.lock:
+            server.paths.append(self.path)
+            status = server.statuses.pop(0) if server.statuses else 200
+        data = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode("utf-8")
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def upstream():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Upstream)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.paths = []
+    server.statuses = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    server.url = f"http://{host}:{port}/v1"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def post_json(url, payload):
+    """POST JSON 请求，返回状态码"""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""设备槽位：CPU 模拟槽位的环境变量、文件分配和每槽位并发上限"""
+# 标准库 imports
+import os
+import sys
+
+# 第三方库 imports
+import pytest
+
+# 本地 imports
+from conftest import wait_until
+from markergui.device_launcher import MultiDeviceConversion
+from markergui.devices import device_slots, parse_device_ids, uses_device_slots
+from markergui.job_runner import Job
+from markergui.options import DEFAULT_OPTIONS
+
+CPU = "CPU (模拟设备槽位)"
+
+
+def _config(**values):
+    return dict(DEFAULT_OPTIONS, **values)
+
+
+def test_cpu_slots():
+    config = _config(device_type=CPU, num_devices=3, num_workers=2, device_ids="")
+    assert uses_device_slots(config)
+    slots = device_slots(config)
+    assert [slot.label for slot in slots] == ["CPU 0", "CPU 1", "CPU 2"]
+    assert [slot.index for slot in slots] == [0, 1, 2]
+    assert all(slot.workers == 2 for slot in slots)
+    assert all(slot.env == {"CUDA_VISIBLE_DEVICES": "", "TORCH_DEVICE": "cpu"} for slot in slots)
+
+    # 单个 CPU 槽位也按设备槽位运行
+    assert uses_device_slots(_config(device_type=CPU, num_devices=1, device_ids=""))
+    assert not uses_device_slots(_config(num_devices=1, device_ids=""))
+
+
+def test_device_ids():
+    assert parse_device_ids("0, 2;2,3") == [0, 2, 3]
+    assert parse_device_ids("") == []
+    with pytest.raises(ValueError):
+        parse_device_ids("0,gpu1")
+
+    slots = device_slots(_config(device_type="GPU (CUDA)", device_ids="3,1", num_workers=0))
+    assert [slot.label for slot in slots] == ["GPU 3", "GPU 1"]
+    assert slots[0].env == {"CUDA_VISIBLE_DEVICES": "3", "TORCH_DEVICE": "cuda"}
+    assert all(slot.workers == 1 for slot in slots)
+
+
+def test_cpu_slots_run_with_slot_env_and_limits(runner, tmp_path):
+    slots = device_slots(_config(device_type=CPU, num_devices=2, num_workers=1, device_ids=""))
+    devices = MultiDeviceConversion(slots)
+    devices.connect_runner(runner)
+    runner.set_max_concurrent(4)
+    finished = []
+    devices.finished.connect(finished.append)
+
+    files = []
+    for index, size in enumerate([400, 300, 200, 100]):
+        path = tmp_path / f"doc{index}.pdf"
+        path.write_bytes(b"x" * size)
+        files.append((str(path), os.stat(path)))
+    groups = devices.assign(files)
+    # 大文件先分配，每个文件分给已分配总大小最小的槽位
+    assert [[os.path.basename(path) for path, _ in group] for _, group in groups] == [
+        ["doc0.pdf", "doc3.pdf"],
+        ["doc1.pdf", "doc2.pdf"],
+    ]
+
+    busy, peak = {}, {}
+
+    def started(job):
+        busy[job.slot] = busy.get(job.slot, 0) + 1
+        peak[job.slot] = max(peak.get(job.slot, 0), busy[job.slot])
+
+    def ended(job):
+        busy[job.slot] -= 1
+
+    runner.jobStarted.connect(started)
+    runner.jobFinished.connect(ended)
+    lines = []
+    runner.jobOutput.connect(lambda job, line: lines.append((job.slot, line)))
+    code = (
+        "import os, time; "
+        "print(os.environ['TORCH_DEVICE'], repr(os.environ['CUDA_VISIBLE_DEVICES'])); "
+        "time.sleep(0.2)"
+    )
+    for slot, group in groups:
+        jobs = [Job([sys.executable, "-c", code], label=os.path.basename(p)) for p, _ in group]
+        devices.add_jobs(slot, jobs)
+        for job in jobs:
+            runner.submit(job)
+    devices.close()
+
+    assert wait_until(lambda: finished, timeout=20)
+    assert devices.succeeded
+    assert peak == {0: 1, 1: 1}
+    assert sorted(lines) == [(0, "cpu ''")] * 2 + [(1, "cpu ''")] * 2
+    assert devices.jobs[0].label == "[CPU 0] doc0.pdf"
+    assert devices.status == "CPU 0: 2/2  CPU 1: 2/2"
+    assert runner.slot_limits == {}
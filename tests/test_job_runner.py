@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""JobRunner：排队顺序、取消、失败和已结束任务的清理"""
+# 标准库 imports
+import sys
+
+# 本地 imports
+from conftest import wait_until
+from markergui.job_runner import Job, JobRunner
+
+
+def _sleep_job(seconds, label=""):
+    return Job([sys.executable, "-c", f"import time; time.sleep({seconds})"], label=label)
+
+
+def _exit_job(code, label=""):
+    return Job([sys.executable, "-c", f"import sys; print('bye'); sys.exit({code})"], label=label)
+
+
+def _finished(jobs):
+    return lambda: all(job.state in ("finished", "failed", "cancelled") for job in jobs)
+
+
+def test_runs_job_and_records_exit_code(runner):
+    ok, bad = _exit_job(0), _exit_job(3)
+    lines = []
+    runner.jobOutput.connect(lambda job, line: lines.append((job.id, line)))
+    runner.set_max_concurrent(2)
+    runner.submit(ok)
+    runner.submit(bad)
+    assert wait_until(_finished([ok, bad]))
+    assert ok.state == "finished" and ok.exit_code == 0
+    assert bad.state == "failed" and bad.exit_code == 3
+    assert (bad.id, "bye") in lines
+    assert list(bad.tail) == ["bye"]
+
+
+def test_priority_and_queue_group_order(runner):
+    started = []
+    runner.jobStarted.connect(lambda job: started.append(job.label))
+    blocker = runner.submit(_sleep_job(0.3, "blocker"))
+    group = runner.new_queue_group()
+    jobs = []
+    for label, size, priority in [("small", 1, 0), ("large", 100, 0), ("urgent", 1, 1)]:
+        job = _exit_job(0, label)
+        job.queue_group, job.size, job.priority = group, size, priority
+        jobs.append(runner.submit(job))
+    late = runner.submit(_exit_job(0, "late"))
+    assert [job.label for job in runner.queue] == ["urgent", "large", "small", "late"]
+
+    runner.move_job(late, 0)
+    # 移到高优先级任务之前时取用其优先级，队列仍按排序键有序
+    assert late.priority == 1
+    keys = [runner._queue_key(job) for job in runner.queue]
+    assert keys == sorted(keys)
+    # 之后提交的同优先级任务排在手动调整的任务之后
+    after = _exit_job(0, "after")
+    after.priority = 1
+    runner.submit(after)
+
+    assert wait_until(_finished([blocker, late, after] + jobs))
+    assert started == ["blocker", "late", "urgent", "after", "large", "small"]
+
+
+def test_cancel_queued_and_running(runner):
+    running = runner.submit(_sleep_job(30, "running"))
+    queued = runner.submit(_sleep_job(30, "queued"))
+    assert wait_until(lambda: running.sampler is not None)
+    assert runner.is_queued(queued)
+
+    runner.cancel(queued)
+    assert queued.state == "cancelled"
+    assert not runner.is_queued(queued)
+    assert queued.process is None
+
+    runner.cancel(running)
+    assert wait_until(_finished([running]), timeout=5)
+    assert running.state == "cancelled"
+    assert running.elapsed < 10
+    assert runner.running_jobs() == []
+
+
+def test_cancel_all_empties_queue(runner):
+    jobs = [runner.submit(_sleep_job(30)) for _ in range(3)]
+    runner.cancel_all()
+    assert wait_until(_finished(jobs), timeout=5)
+    assert [job.state for job in jobs] == ["cancelled"] * 3
+    assert not runner.queue
+
+
+def test_failed_start(runner):
+    job = runner.submit(Job(["markergui-no-such-program"]))
+    assert wait_until(_finished([job]))
+    assert job.state == "failed"
+    assert job.error
+
+
+def test_finished_jobs_are_trimmed(runner, monkeypatch):
+    monkeypatch.setattr(JobRunner, "MAX_FINISHED", 3)
+    monkeypatch.setattr(JobRunner, "TRIM_BATCH", 2)
+    forgotten = []
+    runner.jobsForgotten.connect(forgotten.extend)
+    runner.set_max_concurrent(4)
+    jobs = [runner.submit(_exit_job(0)) for _ in range(6)]
+    assert wait_until(_finished(jobs))
+    # 超过 MAX_FINISHED + TRIM_BATCH 个时一次移除到 MAX_FINISHED 个
+    assert len(forgotten) == 3
+    assert len(runner.jobs) == 3
+    assert {job.id for job in runner.jobs}.isdisjoint(job.id for job in forgotten)
+
+    runner.clear_finished()
+    assert runner.jobs == []
+    assert len(forgotten) == 6
+
+
+def test_marker_single_output(runner, fake_marker, tmp_path):
+    source = tmp_path / "doc.pdf"
+    source.write_bytes(b"%PDF-1.4\n")
+    job = runner.submit(
+        Job(["marker_single", str(source), "--output_dir", str(tmp_path / "out")])
+    )
+    assert wait_until(_finished([job]))
+    assert job.succeeded
+    assert (tmp_path / "out" / "doc" / "doc.md").read_text(encoding="utf-8") == "# doc\n"
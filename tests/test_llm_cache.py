@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""LLM 响应缓存：缓存键、读写、按最近使用淘汰，以及代理中的命中"""
+# 标准库 imports
+import json
+import time
+
+# 第三方库 imports
+import pytest
+
+# 本地 imports
+from conftest import post_json
+from markergui.command_generator import option_value
+from markergui.job_runner import Job
+from markergui.llm_cache import LLMResponseCache, request_key
+from markergui.llm_proxy import LLMProxy
+
+OPENAI = "marker.services.openai.OpenAIService"
+
+
+def test_request_key():
+    a = json.dumps({"model": "m", "messages": [{"role": "user", "content": "hi"}]}).encode()
+    b = json.dumps({"messages": [{"content": "hi", "role": "user"}], "model": "m"}).encode()
+    assert request_key("/chat/completions", a) == request_key("/chat/completions", b)
+    assert request_key("/chat/completions", a) != request_key("/api/generate", a)
+    assert request_key("/chat/completions", json.dumps({"stream": True}).encode()) is None
+    assert request_key("/chat/completions", b"not json")
+
+
+def test_put_get_round_trip(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm"))
+    key = request_key("/chat/completions", b"{}")
+    assert cache.get(key) is None
+    headers = [("Content-Type", "application/json"), ("Date", "today")]
+    cache.put(key, headers, b'{"ok": true}')
+    # 只保存与内容有关的响应头
+    assert cache.get(key) == ([("Content-Type", "application/json")], b'{"ok": true}')
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert "命中 1 / 查询 2 (50%)" in cache.status
+
+    reopened = LLMResponseCache(str(tmp_path / "llm"))
+    assert reopened.total_bytes == cache.total_bytes > 0
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm"), max_bytes=250)
+    keys = [request_key("/chat/completions", str(i).encode()) for i in range(3)]
+    cache.put(keys[0], [], b"a" * 100)
+    time.sleep(0.01)
+    cache.put(keys[1], [], b"b" * 100)
+    time.sleep(0.01)
+    assert cache.get(keys[0]) is not None
+    time.sleep(0.01)
+    cache.put(keys[2], [], b"c" * 100)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+    assert cache.total_bytes <= 250
+
+
+@pytest.fixture
+def proxy(qapp, tmp_path):
+    proxy = LLMProxy()
+    proxy.cache = LLMResponseCache(str(tmp_path / "llm"))
+    yield proxy
+    proxy.shutdown()
+
+
+def _proxied_url(proxy, upstream):
+    job = Job(
+        ["marker_single", "doc.pdf", "--use_llm", "--llm_service", OPENAI]
+        + ["--openai_base_url", upstream.url]
+    )
+    argv = proxy.prepare(job)
+    # 只启用缓存时不改写并发数
+    assert option_value(argv[2:], "--max_concurrency") is None
+    return job, option_value(argv[2:], "--openai_base_url") + "/chat/completions"
+
+
+def test_proxy_serves_repeated_requests_from_cache(proxy, upstream):
+    job, url = _proxied_url(proxy, upstream)
+    payload = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+    assert post_json(url, payload) == 200
+    assert post_json(url, payload) == 200
+    assert post_json(url, dict(payload, model="other")) == 200
+    assert len(upstream.paths) == 2
+
+    report = proxy.release(job).report()
+    assert report["llm_requests"] == 3
+    assert report["llm_cache_hits"] == 1
+    assert report["llm_cache_hit_ratio"] == pytest.approx(0.333)
+    # 命中缓存的重复请求不计为重试
+    assert report["llm_retries"] == 0
+
+
+def test_proxy_reports_cache_write_failure(proxy, upstream, tmp_path):
+    blocker = tmp_path / "blocker"
+    blocker.write_text("")
+    proxy.cache = LLMResponseCache(str(blocker / "llm"))
+    messages = []
+    proxy.message.connect(messages.append)
+    job, url = _proxied_url(proxy, upstream)
+    route, path = proxy.route(url[len(proxy.url):])
+    status, _, _ = proxy.forward(route, "POST", path, {}, b'{"model": "m"}')
+    assert status == 200
+    assert len(messages) == 1 and messages[0].startswith("[WORRY] 保存 LLM 响应缓存失败")
+    assert list(tmp_path.glob("**/*.tmp")) == []
+    proxy.release(job)
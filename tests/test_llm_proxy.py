@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+"""LLM 请求预算：RateGate 的限流减半与恢复、预留和截止时间，以及代理的转发统计"""
+# 标准库 imports
+import threading
+import time
+
+# 第三方库 imports
+import pytest
+
+# 本地 imports
+from conftest import post_json
+from markergui.command_generator import option_value
+from markergui.job_runner import Job
+from markergui.llm_proxy import LLMProxy, RateGate
+
+OPENAI = "marker.services.openai.OpenAIService"
+GEMINI = "marker.services.gemini.GoogleGeminiService"
+
+
+def _cycle(gate, status, retry_after=None):
+    assert gate.acquire(time.monotonic() + 1) is not None
+    gate.release(status, retry_after)
+
+
+def test_gate_halves_on_429_and_recovers():
+    gate = RateGate(4)
+    for _ in range(4):
+        assert gate.acquire(time.monotonic() + 1) is not None
+    assert gate.acquire(time.monotonic() + 0.05) is None
+
+    gate.release(429, 0)
+    assert gate.limit == 2
+    # 减半后运行中的请求结束前不再发出新请求
+    for _ in range(3):
+        gate.release(200)
+    assert gate.active == 0
+    assert gate.limit == 3
+
+    # 每连续成功 limit 个请求上限加一，直到恢复为 max_concurrency
+    for _ in range(3):
+        _cycle(gate, 200)
+    assert gate.limit == 4
+    for _ in range(10):
+        _cycle(gate, 200)
+    assert gate.limit == 4
+
+    # 失败 (非 2xx、非 429) 不影响上限
+    _cycle(gate, 429, 0)
+    _cycle(gate, 500)
+    assert gate.limit == 2
+
+
+def test_gate_pauses_for_retry_after():
+    gate = RateGate(2)
+    _cycle(gate, 429, 0.3)
+    waited = gate.acquire(time.monotonic() + 2)
+    assert waited is not None and waited >= 0.25
+    gate.release(200)
+    # 暂停超过截止时间时放弃
+    _cycle(gate, 429, 5)
+    start = time.monotonic()
+    assert gate.acquire(start + 0.1) is None
+    assert time.monotonic() - start < 1
+
+
+def test_gate_reservation_and_rpm():
+    gate = RateGate(4)
+    gate.reserve(3)
+    assert gate.acquire(time.monotonic() + 1) is not None
+    assert gate.acquire(time.monotonic() + 0.05) is None
+    assert "其他服务预留 3" in gate.status
+
+    # 另一个线程归还预留后，等待中的请求立即得到预算
+    timer = threading.Timer(0.1, gate.reserve, args=(-3,))
+    timer.start()
+    waited = gate.acquire(time.monotonic() + 2)
+    timer.join()
+    assert waited is not None and waited < 1
+    assert gate.active == 2 and gate.reserved == 0
+
+    limited = RateGate(4, rpm=2)
+    _cycle(limited, 200)
+    _cycle(limited, 200)
+    assert limited.acquire(time.monotonic() + 0.05) is None
+    assert "(上限 2)" in limited.status
+
+
+@pytest.fixture
+def proxy(qapp):
+    proxy = LLMProxy()
+    proxy.enabled = True
+    proxy.configure(4, 0)
+    yield proxy
+    proxy.shutdown()
+
+
+def _llm_job(service, *extra):
+    return Job(
+        ["marker_single", "doc.pdf", "--use_llm", "--llm_service", service, "--timeout", "5"]
+        + list(extra)
+    )
+
+
+def test_proxy_forwards_and_counts_rate_limits(proxy, upstream):
+    upstream.statuses = [429]
+    job = _llm_job(OPENAI, "--openai_base_url", upstream.url, "--max_concurrency", "1")
+    argv = proxy.prepare(job)
+    base_url = option_value(argv[2:], "--openai_base_url")
+    assert base_url == f"{proxy.url}/j/{job.id}"
+    assert option_value(argv[2:], "--max_concurrency") == "4"
+
+    payload = {"model": "m", "messages": [{"role": "user", "content": "hi"}]}
+    assert post_json(base_url + "/chat/completions", payload) == 429
+    assert proxy.gate.limit == 2
+    assert post_json(base_url + "/chat/completions", payload) == 200
+    assert upstream.paths == ["/v1/chat/completions"] * 2
+
+    stats = proxy.release(job)
+    report = stats.report()
+    assert report["llm_requests"] == 2
+    assert report["llm_rate_limited"] == 1
+    assert report["llm_retries"] == 1
+    assert proxy.route(f"/j/{job.id}/chat/completions") == (None, "/chat/completions")
+
+
+def test_proxy_returns_504_past_deadline(proxy, upstream):
+    job = _llm_job(OPENAI, "--openai_base_url", upstream.url)
+    job.argv[job.argv.index("--timeout") + 1] = "1"
+    argv = proxy.prepare(job)
+    base_url = option_value(argv[2:], "--openai_base_url")
+    # 占满预算，请求等到 marker 的 --timeout 仍得不到预算
+    proxy.configure(1, 0)
+    assert proxy.gate.acquire() is not None
+    start = time.monotonic()
+    assert post_json(base_url + "/chat/completions", {"model": "m"}) == 504
+    assert 0.9 <= time.monotonic() - start < 5
+    assert upstream.paths == []
+    proxy.gate.release(200)
+    assert proxy.release(job).report()["llm_timeouts"] == 1
+
+
+def test_unproxied_services_reserve_their_share(proxy):
+    proxy.configure(6, 0)
+    openai = _llm_job(OPENAI)
+    gemini = _llm_job(GEMINI, "--workers", "2")
+    assert option_value(proxy.prepare(openai)[2:], "--max_concurrency") == "6"
+    # 3 个 LLM 客户端平分 6 个并发，Gemini 任务的 2 个进程各得 2 个并在闸门中预留
+    assert option_value(proxy.prepare(gemini)[2:], "--max_concurrency") == "2"
+    assert proxy.gate.reserved == 4
+    assert proxy.release(gemini) is None
+    assert proxy.gate.reserved == 0
+    proxy.release(openai)
+
+    proxy.enabled = False
+    assert proxy.prepare(openai) == openai.argv
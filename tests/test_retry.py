@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+"""RetryPolicy 与 RetryManager：失败分类、备用选项重试和隔离报告"""
+# 标准库 imports
+import json
+
+# 本地 imports
+from conftest import wait_until
+from markergui.command_generator import build_config_args, option_value
+from markergui.job_runner import Job
+from markergui.options import DEFAULT_OPTIONS
+from markergui.retry import QUARANTINE_NAME, RetryManager, RetryPolicy, classify_failure
+
+FORCE_OCR = "强制OCR (--force_ocr)"
+
+
+def _marker_job(tmp_path, output_dir=None):
+    source = tmp_path / "doc.pdf"
+    source.write_bytes(b"%PDF-1.4\n")
+    config = dict(DEFAULT_OPTIONS, input_path=str(source), output_dir=str(tmp_path / "out"))
+    args = build_config_args(config)
+    if output_dir is not None:
+        args = ["--output_dir", output_dir] + args[2:]
+    job = Job(
+        ["marker_single", str(source)] + args,
+        input_path=str(source),
+        output_dir=config["output_dir"],
+    )
+    job.config = config
+    return job
+
+
+def test_classify_failure():
+    job = Job(["marker_single"])
+    job.exit_code = 1
+    assert classify_failure(job) == "exit"
+    job.tail.append("torch.cuda.OutOfMemoryError: CUDA out of memory")
+    assert classify_failure(job) == "oom"
+    job.tail.clear()
+    job.crashed, job.exit_code = True, 9
+    assert classify_failure(job) == "oom"
+    job.exit_code = 11
+    assert classify_failure(job) == "crash"
+    job.timed_out = True
+    assert classify_failure(job) == "timeout"
+
+
+def test_policy_record_round_trip(tmp_path):
+    policy = RetryPolicy(2, 5, FORCE_OCR)
+    restored = RetryPolicy(*policy.to_record())
+    assert restored.to_record() == [2, 5, FORCE_OCR]
+    assert [restored.delay(attempt) for attempt in (1, 2, 3)] == [5, 10, 20]
+
+    # 递归批处理的子目录输出位置在重试命令中保留
+    job = _marker_job(tmp_path, output_dir=str(tmp_path / "out" / "sub"))
+    argv = restored.argv(job)
+    assert argv[:2] == job.argv[:2]
+    assert "--force_ocr" in argv
+    assert option_value(argv[2:], "--output_dir") == str(tmp_path / "out" / "sub")
+    assert restored.apply(job.config)["ocr_mode"] == "强制OCR (扫描所有)"
+    assert job.config["ocr_mode"] == DEFAULT_OPTIONS["ocr_mode"]
+
+    assert RetryPolicy(1, 0).argv(job) == job.argv
+    other = Job(["marker", str(tmp_path)])
+    other.config = job.config
+    assert restored.argv(other) == other.argv
+
+
+def test_retry_with_fallback(runner, fake_marker, monkeypatch, tmp_path):
+    monkeypatch.setenv("FAKE_FAIL", "1")
+    manager = RetryManager(runner)
+    retried = []
+    manager.jobRetried.connect(lambda job, retry: retried.append(retry))
+    job = _marker_job(tmp_path)
+    manager.watch(job, RetryPolicy(1, 0, FORCE_OCR))
+    runner.submit(job)
+
+    assert wait_until(lambda: retried and retried[0].state == "finished")
+    retry = retried[0]
+    assert job.state == "failed"
+    assert job.failure.startswith("非零退出")
+    assert "--force_ocr" in retry.argv
+    assert retry.config["ocr_mode"] == "强制OCR (扫描所有)"
+    assert (tmp_path / "out" / "doc" / "doc.md").is_file()
+    assert manager.pending == 0
+    assert manager.retry_state(retry) is None
+
+
+def test_quarantine_after_retries(runner, fake_marker, monkeypatch, tmp_path):
+    monkeypatch.setenv("FAKE_FAIL", "1")
+    manager = RetryManager(runner)
+    quarantined = []
+    manager.jobQuarantined.connect(lambda job, path: quarantined.append((job, path)))
+    job = _marker_job(tmp_path)
+    manager.watch(job, RetryPolicy(1, 0))
+    assert manager.retry_state(job) == [[1, 0, "不使用"], 1]
+    runner.submit(job)
+
+    assert wait_until(lambda: quarantined)
+    failed, path = quarantined[0]
+    assert failed is not job
+    assert failed.failure.endswith("已隔离")
+    assert path == str(tmp_path / "out" / QUARANTINE_NAME)
+    with open(path, encoding="utf-8") as f:
+        record = json.loads(f.readline())
+    assert record["input_path"] == job.input_path
+    assert [attempt["attempt"] for attempt in record["attempts"]] == [1, 2]
+    assert all(attempt["failure"] == "exit" for attempt in record["attempts"])
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""预热进程池：通过模拟后端 (MARKERGUI_WORKER_SIMULATE) 的请求/响应往返"""
+# 第三方库 imports
+import pytest
+
+# 本地 imports
+from conftest import wait_until
+from markergui.job_runner import Job
+from markergui.warm_pool import WarmPool
+from markergui.worker import SIMULATE_ENV
+
+LOAD_SECONDS = 0.3
+
+
+@pytest.fixture
+def pool(runner, monkeypatch):
+    monkeypatch.setenv(SIMULATE_ENV, str(LOAD_SECONDS))
+    pool = WarmPool(runner)
+    pool.enabled = True
+    runner.set_warm_pool(pool)
+    return pool
+
+
+def _job(source, output_dir):
+    return Job(["marker_single", str(source), "--output_dir", str(output_dir)])
+
+
+def _done(job):
+    return lambda: job.state in ("finished", "failed")
+
+
+def test_requests_reuse_loaded_worker(runner, pool, tmp_path):
+    progress = []
+    runner.jobProgress.connect(lambda job, line: progress.append(line))
+    jobs = []
+    for name in ("a", "b"):
+        source = tmp_path / f"{name}.pdf"
+        source.write_bytes(b"%PDF-1.4\n")
+        jobs.append(runner.submit(_job(source, tmp_path / "out")))
+
+    assert wait_until(lambda: all(_done(job)() for job in jobs), timeout=20)
+    assert [job.state for job in jobs] == ["finished", "finished"]
+    for name in ("a", "b"):
+        assert (tmp_path / "out" / name / f"{name}.md").read_text(encoding="utf-8") == f"# {name}\n"
+    # 两个请求由同一个工作进程处理，模型只加载一次
+    assert len(pool.workers) == 1
+    assert [job.warm_stats["request"] for job in jobs] == [1, 2]
+    assert jobs[0].warm_stats["worker_load_s"] >= LOAD_SECONDS
+    assert jobs[1].warm_stats["worker_load_s"] == jobs[0].warm_stats["worker_load_s"]
+    assert all(job.warm_stats["convert_s"] is not None for job in jobs)
+    assert any(line.startswith("Recognizing Layout") for line in progress)
+    assert all(job.worker is None for job in jobs)
+
+
+def test_failed_request_keeps_worker(runner, pool, tmp_path):
+    lines = []
+    runner.jobOutput.connect(lambda job, line: lines.append((job.id, line)))
+    missing = runner.submit(_job(tmp_path / "missing.pdf", tmp_path / "out"))
+    assert wait_until(_done(missing), timeout=20)
+    assert missing.state == "failed"
+    assert any("FileNotFoundError" in line for job_id, line in lines if job_id == missing.id)
+
+    source = tmp_path / "c.pdf"
+    source.write_bytes(b"%PDF-1.4\n")
+    job = runner.submit(_job(source, tmp_path / "out"))
+    assert wait_until(_done(job), timeout=20)
+    assert job.state == "finished"
+    assert job.warm_stats["request"] == 2
+
+
+def test_other_commands_bypass_pool(pool):
+    assert pool.accepts(Job(["marker_single", "doc.pdf"]))
+    assert not pool.accepts(Job(["marker", "folder"]))
+    pool.enabled = False
+    assert not pool.accepts(Job(["marker_single", "doc.pdf"]))